@@ -17,6 +17,9 @@ from app.models.daylight_personality import (
     DaylightMatchingTable,
     DaylightMatchingScore
 )
+from app.models.event_buyer import EventBuyerOrder, EventBuyerSync
+from app.models.search_index import EventSearchDocument, WPUserSearchDocument, SearchIndexSync
+from app.models.query_plan import SlowQueryPlan
 from app.core.config import settings
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,39 @@
+"""matching job progress
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 09:00:00
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    return name in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'daylight_matching_sessions',
+        sa.Column('progress', sa.JSON(), nullable=True, comment='Last job progress: tier, tables formed, participants remaining')
+    )
+    
+    # matching_sessions is created by migrations/create_matching_tables.py
+    if _has_table('matching_sessions'):
+        op.add_column('matching_sessions', sa.Column('progress', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _has_table('matching_sessions'):
+        op.drop_column('matching_sessions', 'progress')
+    op.drop_column('daylight_matching_sessions', 'progress')
@@ -0,0 +1,35 @@
+"""matching result snapshot
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 10:00:00
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'daylight_matching_sessions',
+        sa.Column('result_snapshot', sa.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql'), nullable=True, comment='orjson-encoded MatchingSessionResult')
+    )
+    op.add_column(
+        'daylight_matching_sessions',
+        sa.Column('result_etag', sa.String(64), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('daylight_matching_sessions', 'result_etag')
+    op.drop_column('daylight_matching_sessions', 'result_snapshot')
@@ -0,0 +1,59 @@
+"""event buyer orders
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 11:00:00
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    
+    # Create event_buyer_orders table (local copy of WooCommerce orders per event)
+    op.create_table(
+        'event_buyer_orders',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.BigInteger(), nullable=False, comment='wprq_posts.ID'),
+        sa.Column('order_id', sa.BigInteger(), nullable=False, comment='wprq_wc_orders.id'),
+        sa.Column('user_id', sa.BigInteger(), nullable=False, comment='wprq_users.ID'),
+        sa.Column('user_login', sa.String(60), nullable=True),
+        sa.Column('user_email', sa.String(100), nullable=True),
+        sa.Column('display_name', sa.String(250), nullable=True),
+        sa.Column('order_status', sa.String(20), nullable=True),
+        sa.Column('total_amount', sa.Numeric(10, 2), nullable=True),
+        sa.Column('payment_method_title', sa.Text(), nullable=True),
+        sa.Column('date_created_gmt', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('event_id', 'order_id', name='uq_event_buyer_orders_event_order')
+    )
+    op.create_index(op.f('ix_event_buyer_orders_id'), 'event_buyer_orders', ['id'], unique=False)
+    op.create_index(op.f('ix_event_buyer_orders_event_id'), 'event_buyer_orders', ['event_id'], unique=False)
+    
+    # Create event_buyer_syncs table (incremental sync watermark per event)
+    op.create_table(
+        'event_buyer_syncs',
+        sa.Column('event_id', sa.BigInteger(), nullable=False),
+        sa.Column('last_order_created_gmt', sa.DateTime(), nullable=True, comment='Watermark on wprq_wc_orders.date_created_gmt'),
+        sa.Column('synced_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('event_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('event_buyer_syncs')
+    
+    op.drop_index(op.f('ix_event_buyer_orders_event_id'), table_name='event_buyer_orders')
+    op.drop_index(op.f('ix_event_buyer_orders_id'), table_name='event_buyer_orders')
+    op.drop_table('event_buyer_orders')
@@ -0,0 +1,67 @@
+"""search documents
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 12:00:00
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    
+    # Create event_search_documents table (mirror of product posts)
+    op.create_table(
+        'event_search_documents',
+        sa.Column('ID', sa.BigInteger(), autoincrement=False, nullable=False, comment='wprq_posts.ID'),
+        sa.Column('post_title', mysql.LONGTEXT(), nullable=True),
+        sa.Column('post_content', mysql.LONGTEXT(), nullable=True),
+        sa.Column('post_excerpt', mysql.LONGTEXT(), nullable=True),
+        sa.Column('post_modified', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('ID')
+    )
+    op.create_index('ft_event_search_documents', 'event_search_documents', ['post_title', 'post_content', 'post_excerpt'], mysql_prefix='FULLTEXT')
+    
+    # Create wp_user_search_documents table (mirror of WordPress users)
+    op.create_table(
+        'wp_user_search_documents',
+        sa.Column('ID', sa.BigInteger(), autoincrement=False, nullable=False, comment='wprq_users.ID'),
+        sa.Column('user_login', sa.String(60), nullable=True),
+        sa.Column('user_email', sa.String(100), nullable=True),
+        sa.Column('display_name', sa.String(250), nullable=True),
+        sa.Column('user_nicename', sa.String(50), nullable=True),
+        sa.Column('user_registered', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('ID')
+    )
+    op.create_index('ft_wp_user_search_documents', 'wp_user_search_documents', ['user_login', 'user_email', 'display_name', 'user_nicename'], mysql_prefix='FULLTEXT')
+    
+    # Create search_index_syncs table
+    op.create_table(
+        'search_index_syncs',
+        sa.Column('name', sa.String(50), nullable=False),
+        sa.Column('watermark', sa.DateTime(), nullable=True),
+        sa.Column('synced_at', sa.DateTime(), nullable=True),
+        sa.Column('full_synced_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('search_index_syncs')
+    
+    op.drop_index('ft_wp_user_search_documents', table_name='wp_user_search_documents')
+    op.drop_table('wp_user_search_documents')
+    
+    op.drop_index('ft_event_search_documents', table_name='event_search_documents')
+    op.drop_table('event_search_documents')
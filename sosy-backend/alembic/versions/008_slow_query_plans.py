@@ -0,0 +1,47 @@
+"""slow query plans
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 14:00:00
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    
+    # Create slow_query_plans table (EXPLAIN capture for slow WordPress queries)
+    op.create_table(
+        'slow_query_plans',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('fingerprint', sa.String(40), nullable=False, comment='sha1 of the normalized statement'),
+        sa.Column('statement', sa.Text(), nullable=False),
+        sa.Column('last_route', sa.String(255), nullable=True),
+        sa.Column('calls', sa.Integer(), nullable=False),
+        sa.Column('total_ms', sa.Float(), nullable=False),
+        sa.Column('max_ms', sa.Float(), nullable=False),
+        sa.Column('last_ms', sa.Float(), nullable=True),
+        sa.Column('plan', sa.JSON(), nullable=True, comment='Latest EXPLAIN rows'),
+        sa.Column('full_scan_tables', sa.String(500), nullable=True),
+        sa.Column('explained_at', sa.DateTime(), nullable=True),
+        sa.Column('first_seen', sa.DateTime(), nullable=True),
+        sa.Column('last_seen', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('fingerprint', name='uq_slow_query_plans_fingerprint')
+    )
+    op.create_index(op.f('ix_slow_query_plans_id'), 'slow_query_plans', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_slow_query_plans_id'), table_name='slow_query_plans')
+    op.drop_table('slow_query_plans')
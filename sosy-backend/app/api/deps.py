@@ -1,18 +1,37 @@
+import secrets
+from ipaddress import ip_address, ip_network
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.base import get_local_db, get_wp_db
+from app.db.base import get_local_db, get_wp_db, get_async_local_db
 from app.crud.user import user
+from app.core.config import settings
 from app.core.security import verify_token
+from app.core.principals import Principal, principal_cache
 from app.models.user import User
 
 security = HTTPBearer()
 
-def get_current_user(
-    db: Session = Depends(get_local_db),
+internal_networks = [
+    ip_network(network.strip(), strict=False)
+    for network in settings.INTERNAL_ALLOWED_NETWORKS.split(",") if network.strip()
+]
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_local_db),
     credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> User:
+) -> Principal:
+    """
+    Authenticated principal for the bearer token
+    
+    Served from the in-process principal cache when possible, so most
+    requests never touch the local DB here. The cache entry is dropped when
+    the user is updated or deleted through CRUDUser. Runs on the event loop
+    (async session on a cache miss), so async endpoints never need a
+    threadpool slot for auth.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -23,20 +42,57 @@ def get_current_user(
     if username is None:
         raise credentials_exception
     
-    db_user = user.get_by_username(db, username=username)
-    if db_user is None:
-        raise credentials_exception
+    principal = principal_cache.get(username)
+    if principal is None:
+        db_user = await db.run_sync(user.get_by_username, username)
+        if db_user is None:
+            raise credentials_exception
+        
+        principal = Principal.from_user(db_user)
+        principal_cache.set(username, principal)
     
-    return db_user
+    return principal
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def get_current_superuser(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_superuser(current_user: Principal = Depends(get_current_user)) -> Principal:
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+def get_current_active_db_user(
+    db: Session = Depends(get_local_db),
+    current_user: Principal = Depends(get_current_active_user)
+) -> User:
+    """Full User row of the current user, for endpoints that return or modify it"""
+    db_user = user.get(db, id=current_user.id)
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return db_user
+
+def require_internal_access(request: Request) -> None:
+    """
+    Gate for the operational endpoints (/metrics, /health/db, /health/hashing):
+    the client must be in INTERNAL_ALLOWED_NETWORKS or send INTERNAL_ACCESS_TOKEN
+    as a bearer token
+    """
+    authorization = request.headers.get("Authorization", "")
+    token = settings.INTERNAL_ACCESS_TOKEN
+    if token and secrets.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+        return
+    
+    try:
+        client = ip_address(request.client.host) if request.client else None
+    except ValueError:
+        client = None
+    if client is None or not any(client in network for network in internal_networks):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, wp_users, events, personality_test, matching, daylight_personality
+from app.api.v1.endpoints import auth, users, wp_users, events, personality_test, matching, daylight_personality, diagnostics
 
 api_router = APIRouter()
 
@@ -9,4 +9,5 @@ api_router.include_router(wp_users.router, prefix="/wp-users", tags=["wordpress-
 api_router.include_router(events.router, prefix="/events", tags=["events"])
 api_router.include_router(personality_test.router, prefix="/personality-test", tags=["personality-test"])
 api_router.include_router(matching.router, prefix="/matching", tags=["matching"])
-api_router.include_router(daylight_personality.router, prefix="/daylight", tags=["daylight-personality"])  
\ No newline at end of file
+api_router.include_router(daylight_personality.router, prefix="/daylight", tags=["daylight-personality"])  
+api_router.include_router(diagnostics.router, prefix="/diagnostics", tags=["diagnostics"])
@@ -1,25 +1,25 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.db.base import get_local_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.base import get_async_local_db
 from app.crud.user import user
 from app.core.security import create_access_token
 from app.core.config import settings
 from app.schemas.user import Token
-from app.api.deps import get_current_active_user
+from app.api.deps import get_current_active_db_user
 
 router = APIRouter()
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(
-    db: Session = Depends(get_local_db),
+async def login_for_access_token(
+    db: AsyncSession = Depends(get_async_local_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    authenticated_user = user.authenticate(
+    authenticated_user = await user.authenticate_async(
         db, username=form_data.username, password=form_data.password
     )
     if not authenticated_user:
@@ -40,7 +40,7 @@ def login_for_access_token(
     }
 
 @router.post("/test-token")
-def test_token(current_user = Depends(get_current_active_user)):
+def test_token(current_user = Depends(get_current_active_db_user)):
     """
     Test access token
     """
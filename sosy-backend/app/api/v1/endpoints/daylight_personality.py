@@ -1,21 +1,33 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.base import get_local_db
+from app.db.base import get_local_db, get_async_local_db, LocalSessionLocal
+from app.core.jobs import MATCHING_JOB_CANCELLED, job_runner
+from app.core.config import settings
 from app.crud.daylight_personality import daylight_personality
 from app.schemas.daylight_personality import (
     PersonalityTestSubmission, PersonalityTestResult, PersonalityTestList,
     MatchingSessionCreate, MatchingSessionResult, MatchingSessionSummary,
-    MatchingParticipant, MatchingTableResult, MatchScoreDetail
+    MatchingJobStatus
 )
 from app.api.deps import get_current_active_user
 from app.models.user import User
-from app.models.daylight_personality import (
-    DaylightMatchingTable, DaylightMatchingScore
-)
+from app.utils.cache import TTLCache
 
 router = APIRouter()
 
+# Completed session snapshots: session_id -> (etag, orjson bytes). Never
+# stale, but bounded by count, total bytes and age
+session_snapshots = TTLCache(
+    maxsize=settings.SNAPSHOT_CACHE_SIZE,
+    ttl=settings.SNAPSHOT_CACHE_TTL,
+    maxbytes=settings.SNAPSHOT_CACHE_MB * 1024 * 1024,
+    sizeof=lambda snapshot: len(snapshot[1])
+)
+
 # ==================== Personality Test Endpoints ====================
 
 @router.post("/test", response_model=PersonalityTestResult)
@@ -108,9 +120,14 @@ def get_all_personality_tests(
 
 # ==================== Matching Endpoints ====================
 
-@router.post("/matching", response_model=MatchingSessionResult)
+@router.post(
+    "/matching",
+    response_model=MatchingSessionResult,
+    responses={202: {"model": MatchingJobStatus, "description": "Accepted as a background job"}}
+)
 def create_matching_session(
     session_data: MatchingSessionCreate,
+    background: bool = Query(False, description="Run as a background job and return 202 immediately"),
     db: Session = Depends(get_local_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -129,6 +146,10 @@ def create_matching_session(
     - 50-59% → Fair compatibility 🤝
     - Minimum group: 3 people
     - Maximum group: 5 people (ideal)
+    
+    With `?background=true` the session is saved as `pending`, matching runs
+    on the local job pool and progress can be polled at
+    `GET /matching/{session_id}/status`.
     """
     
     # Validate participant count
@@ -148,6 +169,23 @@ def create_matching_session(
                 detail=f"User {user.username if user else user_id} has not taken personality test"
             )
     
+    if background:
+        session = daylight_personality.create_pending_matching_session(
+            db,
+            session_data.session_name,
+            current_user.id,
+            session_data.participant_user_ids,
+            session_data.min_match_threshold
+        )
+        job_runner.submit(
+            ("daylight", session.id), _run_matching_job, session.id,
+            on_cancel=lambda: _cancel_matching_job(session.id)
+        )
+        return JSONResponse(
+            status_code=202,
+            content=jsonable_encoder(build_matching_job_status(session))
+        )
+    
     # Create session with SMART algorithm
     session = daylight_personality.create_matching_session(
         db,
@@ -157,22 +195,54 @@ def create_matching_session(
         session_data.min_match_threshold
     )
     
+    # Serve the stored snapshot instead of rebuilding the result
+    snapshot = _load_snapshot(session)
+    if snapshot:
+        return _snapshot_response(snapshot)
+    
     # Build result
-    return build_matching_session_result(db, session)
+    return daylight_personality.build_session_result(db, session)
 
-@router.get("/matching/{session_id}", response_model=MatchingSessionResult)
-def get_matching_session_result(
+@router.get("/matching/{session_id}/status", response_model=MatchingJobStatus)
+async def get_matching_session_status(
     session_id: int = Path(..., description="Matching Session ID"),
-    db: Session = Depends(get_local_db),
+    db: AsyncSession = Depends(get_async_local_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get matching session results"""
-    session = daylight_personality.get_matching_session(db, session_id)
+    """Poll the status / progress of a matching session"""
+    session = await db.run_sync(daylight_personality.get_matching_session, session_id)
     
     if not session:
         raise HTTPException(status_code=404, detail="Matching session not found")
     
-    return build_matching_session_result(db, session)
+    return build_matching_job_status(session)
+
+@router.get("/matching/{session_id}", response_model=MatchingSessionResult)
+async def get_matching_session_result(
+    session_id: int = Path(..., description="Matching Session ID"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_local_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get matching session results
+    
+    Completed sessions are served from their stored snapshot with an ETag;
+    send it back in If-None-Match to get a 304 without a database read.
+    """
+    snapshot = session_snapshots.get(session_id)
+    
+    if snapshot is None:
+        snapshot, live_result = await db.run_sync(_load_session_result, session_id)
+        if snapshot is None:
+            # Not completed yet (or pre-snapshot session) - built live
+            return live_result
+    
+    etag = snapshot[0]
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    return _snapshot_response(snapshot)
 
 @router.get("/matching", response_model=List[MatchingSessionSummary])
 def get_all_matching_sessions(
@@ -184,14 +254,19 @@ def get_all_matching_sessions(
     """Get all matching sessions (summary)"""
     sessions = daylight_personality.get_all_matching_sessions(db, skip, limit)
     
+    # Creator names for the whole page in one query
+    creator_ids = {session.created_by for session in sessions}
+    creator_names = dict(
+        db.query(User.id, User.username).filter(User.id.in_(creator_ids)).all()
+    ) if creator_ids else {}
+    
     results = []
     for session in sessions:
-        creator = db.query(User).filter(User.id == session.created_by).first()
         results.append(MatchingSessionSummary(
             id=session.id,
             session_name=session.session_name,
             created_by=session.created_by,
-            creator_name=creator.username if creator else "Unknown",
+            creator_name=creator_names.get(session.created_by, "Unknown"),
             status=session.status,
             total_participants=session.total_participants,
             total_tables=session.total_tables,
@@ -204,111 +279,72 @@ def get_all_matching_sessions(
 
 # ==================== Helper Functions ====================
 
-def build_matching_session_result(db: Session, session) -> MatchingSessionResult:
-    """Build detailed matching session result"""
-    
-    # Get creator
-    creator = db.query(User).filter(User.id == session.created_by).first()
-    
-    # Get all participants
-    all_participants = []
-    matched_user_ids = set()
-    
-    for participant in session.participants:
-        user = db.query(User).filter(User.id == participant.user_id).first()
-        test = participant.personality_test
-        
-        all_participants.append(MatchingParticipant(
-            user_id=user.id,
-            username=user.username,
-            full_name=user.full_name,
-            archetype=test.archetype,
-            archetype_symbol=test.archetype_symbol,
-            profile_score=test.profile_score
-        ))
+def _cancel_matching_job(session_id: int) -> None:
+    """Shutdown cancelled the queued job: fail the session so polling ends"""
+    with LocalSessionLocal() as db:
+        daylight_personality.mark_session_failed(db, session_id, MATCHING_JOB_CANCELLED)
+
+def _run_matching_job(session_id: int) -> None:
+    """Background job: run matching for a pending session in its own DB session"""
+    key = ("daylight", session_id)
+    db = LocalSessionLocal()
+    try:
+        session = daylight_personality.get_matching_session(db, session_id)
+        if not session:
+            return
+        daylight_personality.run_matching_session(
+            db, session, progress=job_runner.reporter(key)
+        )
+    except Exception as e:
+        db.rollback()
+        daylight_personality.mark_session_failed(db, session_id, str(e))
+        raise
+    finally:
+        db.close()
+
+def _load_session_result(
+    db: Session,
+    session_id: int
+) -> Tuple[Optional[Tuple[str, bytes]], Optional[MatchingSessionResult]]:
+    """(snapshot, None) for a completed session, (None, live result) otherwise"""
+    session = daylight_personality.get_matching_session(db, session_id)
     
-    # Get all tables with detailed information
-    tables = db.query(DaylightMatchingTable).filter(
-        DaylightMatchingTable.session_id == session.id
-    ).order_by(DaylightMatchingTable.table_number).all()
-    
-    formatted_tables = []
-    size_distribution = {}
-    
-    for table in tables:
-        # Track size distribution
-        size_distribution[table.table_size] = size_distribution.get(table.table_size, 0) + 1
-        
-        # Get members
-        members = []
-        for member_data in table.members_data:
-            matched_user_ids.add(member_data['user_id'])
-            members.append(MatchingParticipant(
-                user_id=member_data['user_id'],
-                username=member_data.get('username', ''),
-                full_name=member_data.get('full_name', ''),
-                archetype=member_data['archetype'],
-                archetype_symbol=member_data['archetype_symbol'],
-                profile_score=member_data['profile_score']
-            ))
-        
-        # Get pairwise scores
-        scores = db.query(DaylightMatchingScore).filter(
-            DaylightMatchingScore.table_id == table.id
-        ).all()
-        
-        pairwise_scores = []
-        for score in scores:
-            user1 = db.query(User).filter(User.id == score.user1_id).first()
-            user2 = db.query(User).filter(User.id == score.user2_id).first()
-            
-            pairwise_scores.append(MatchScoreDetail(
-                user1_id=score.user1_id,
-                user1_name=user1.full_name or user1.username if user1 else f"User {score.user1_id}",
-                user2_id=score.user2_id,
-                user2_name=user2.full_name or user2.username if user2 else f"User {score.user2_id}",
-                e_diff=score.e_diff,
-                o_diff=score.o_diff,
-                s_diff=score.s_diff,
-                a_diff=score.a_diff,
-                trait_similarity=score.trait_similarity,
-                lifestyle_bonus=score.lifestyle_bonus,
-                comfort_bonus=score.comfort_bonus,
-                serendipity_bonus=score.serendipity_bonus,
-                total_match_score=score.total_match_score,
-                meets_threshold=score.meets_threshold
-            ))
-        
-        formatted_tables.append(MatchingTableResult(
-            table_number=table.table_number,
-            table_size=table.table_size,
-            average_match_score=table.average_match_score,
-            members=members,
-            pairwise_scores=pairwise_scores
-        ))
+    if not session:
+        raise HTTPException(status_code=404, detail="Matching session not found")
     
-    # Get unmatched participants
-    all_participant_ids = {p.user_id for p in all_participants}
-    unmatched_ids = all_participant_ids - matched_user_ids
-    unmatched_participants = [p for p in all_participants if p.user_id in unmatched_ids]
+    snapshot = _load_snapshot(session)
+    if snapshot is None:
+        return None, daylight_personality.build_session_result(db, session)
+    return snapshot, None
+
+def _load_snapshot(session) -> Optional[Tuple[str, bytes]]:
+    """(ETag, body) for a completed session's stored result, cached in-process"""
+    if session.status != 'completed' or not session.result_etag:
+        return None
     
-    # Determine most used size
-    optimal_size_used = max(size_distribution, key=size_distribution.get) if size_distribution else 5
+    snapshot = (f'"{session.result_etag}"', session.result_snapshot)
+    session_snapshots.set(session.id, snapshot)
+    return snapshot
+
+def _snapshot_response(snapshot: Tuple[str, bytes]) -> Response:
+    etag, body = snapshot
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def build_matching_job_status(session) -> MatchingJobStatus:
+    """Job status from live progress if this process runs the job, else from the session row"""
+    progress = job_runner.get_progress(("daylight", session.id))
+    if progress is None or session.status in ('completed', 'failed'):
+        progress = session.progress
     
-    return MatchingSessionResult(
-        id=session.id,
-        session_name=session.session_name,
-        created_by=session.created_by,
-        creator_name=creator.username if creator else "Unknown",
+    return MatchingJobStatus(
+        session_id=session.id,
         status=session.status,
+        progress=progress,
         total_participants=session.total_participants,
         total_tables=session.total_tables,
-        average_match_score=session.average_match_score,
-        min_match_threshold=session.min_match_threshold,
-        tables=formatted_tables,
-        unmatched_participants=unmatched_participants,
-        created_at=session.created_at,
-        completed_at=session.completed_at,
-        optimal_size_used=optimal_size_used,
-        size_distribution=size_distribution
-    )
\ No newline at end of file
+        completed_at=session.completed_at
+    )
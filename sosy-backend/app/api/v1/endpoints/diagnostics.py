@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.api.deps import get_current_superuser
+from app.core.config import settings
+from app.core.principals import Principal
+from app.crud.query_plan import slow_query_plan
+from app.db.base import get_local_db, slow_plan_capture
+from app.schemas.diagnostics import SlowQueryPlanList
+
+router = APIRouter()
+
+@router.get("/slow-queries", response_model=SlowQueryPlanList)
+def read_slow_queries(
+    db: Session = Depends(get_local_db),
+    limit: int = Query(20, ge=1, le=200, description="Number of fingerprints"),
+    sort_by: str = Query("total_ms", description="Sort by total_ms, max_ms or calls"),
+    current_user: Principal = Depends(get_current_superuser)
+):
+    """
+    Worst WordPress queries captured in diagnostic mode (Admin only)
+    
+    Each entry is one normalized statement with its timings, the last EXPLAIN
+    plan and the tables it scans in full. Enable capture with
+    WP_EXPLAIN_ENABLED; WP_EXPLAIN_THRESHOLD_MS sets what counts as slow.
+    """
+    valid_sort_fields = ["total_ms", "max_ms", "calls"]
+    if sort_by not in valid_sort_fields:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort field. Must be one of: {', '.join(valid_sort_fields)}"
+        )
+    
+    rows = slow_query_plan.get_worst(db, sort_by=sort_by, limit=limit)
+    
+    return {
+        "enabled": settings.WP_EXPLAIN_ENABLED,
+        "threshold_ms": settings.WP_EXPLAIN_THRESHOLD_MS,
+        "dropped": slow_plan_capture.dropped,
+        "data": [
+            {
+                "fingerprint": row.fingerprint,
+                "statement": row.statement,
+                "last_route": row.last_route,
+                "calls": row.calls,
+                "total_ms": round(row.total_ms, 3),
+                "max_ms": round(row.max_ms, 3),
+                "avg_ms": round(row.total_ms / row.calls, 3) if row.calls else 0.0,
+                "last_ms": row.last_ms,
+                "plan": row.plan,
+                "full_scan_tables": row.full_scan_tables.split(",") if row.full_scan_tables else [],
+                "explained_at": row.explained_at,
+                "first_seen": row.first_seen,
+                "last_seen": row.last_seen
+            }
+            for row in rows
+        ]
+    }
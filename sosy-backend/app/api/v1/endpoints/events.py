@@ -1,26 +1,37 @@
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.db.base import get_wp_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.base import get_async_wp_db, get_async_local_db
 from app.crud.event import event
+from app.utils.pagination import InvalidCursor
 from app.schemas.event import EventListResponse, Event, EventDetailResponse, EventBuyer
 from app.api.deps import get_current_active_user
 
 router = APIRouter()
 
 @router.get("/", response_model=EventListResponse)
-def read_events(
-    db: Session = Depends(get_wp_db),
+async def read_events(
+    db: AsyncSession = Depends(get_async_wp_db),
+    local_db: AsyncSession = Depends(get_async_local_db),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(10, ge=1, le=100, description="Items per page"),
-    search: Optional[str] = Query(None, description="Search by title, content, or excerpt"),
+    search: Optional[str] = Query(None, description="Search by title, content, or excerpt; matches the start of words"),
     sort_by: Optional[str] = Query("post_date", description="Sort by field"),
     sort_order: Optional[str] = Query("desc", regex="^(asc|desc)$", description="Sort order"),
     post_status: Optional[str] = Query(None, description="Filter by post status"),
+    cursor: Optional[str] = Query(None, description="Cursor pagination: empty for the first page, then next_cursor"),
+    include_total: bool = Query(False, description="Cursor mode: also return the total count"),
     current_user = Depends(get_current_active_user)
 ):
     """
     Retrieve events (products) with pagination and search
+    
+    Pass `cursor` (empty for the first page, then `next_cursor`) for keyset
+    pagination; the total is then only returned with `include_total=true`.
+    
+    `search` matches words from their start ("john" finds "Johnson", "ohn"
+    finds nothing), except right after deployment while the search index
+    is first built, when it matches any substring.
     """
     # Calculate skip
     skip = (page - 1) * page_size
@@ -33,14 +44,44 @@ def read_events(
             detail=f"Invalid sort field. Must be one of: {', '.join(valid_sort_fields)}"
         )
     
-    events, total_count = event.get_events(
-        db=db,
+    # Cursor mode (opt-in): keyset pagination on (sort_by, ID)
+    if cursor is not None:
+        try:
+            events, next_cursor = await event.get_events_keyset_async(
+                db,
+                cursor=cursor or None,
+                limit=page_size,
+                search=search,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                post_status=post_status,
+                local_db=local_db
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        total = None
+        if include_total:
+            total = await event.count_events_async(db, search, post_status, local_db)
+        
+        return EventListResponse(
+            data=events,
+            total=total,
+            page_size=page_size,
+            has_next=next_cursor is not None,
+            has_prev=bool(cursor),
+            next_cursor=next_cursor
+        )
+    
+    events, total_count = await event.get_events_async(
+        db,
         skip=skip,
         limit=page_size,
         search=search,
         sort_by=sort_by,
         sort_order=sort_order,
-        post_status=post_status
+        post_status=post_status,
+        local_db=local_db
     )
     
     # Calculate pagination info
@@ -59,21 +100,22 @@ def read_events(
     )
 
 @router.get("/{event_id}", response_model=EventDetailResponse)
-def read_event_detail(
+async def read_event_detail(
     event_id: int,
-    db: Session = Depends(get_wp_db),
+    db: AsyncSession = Depends(get_async_wp_db),
+    local_db: AsyncSession = Depends(get_async_local_db),
     current_user = Depends(get_current_active_user)
 ):
     """
     Get event detail with list of buyers who have purchased the event
     """
     # Get event
-    db_event = event.get_event_by_id(db, event_id=event_id)
+    db_event = await event.get_event_by_id_async(db, event_id)
     if not db_event:
         raise HTTPException(status_code=404, detail="Event not found")
     
     # Get buyers
-    buyers_data = event.get_event_buyers(db, event_id=event_id)
+    buyers_data = await event.get_event_buyers_async(db, event_id, local_db=local_db)
     
     # Convert to EventBuyer schema
     buyers = [EventBuyer(**buyer) for buyer in buyers_data]
@@ -1,16 +1,22 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.base import get_local_db, get_wp_db
+from app.db.base import (
+    get_local_db, get_wp_db, get_async_local_db, get_async_wp_db,
+    LocalSessionLocal, WPSessionLocal
+)
+from app.core.jobs import MATCHING_JOB_CANCELLED, job_runner
 from app.crud.matching import matching
 from app.crud.event import event
-from app.crud.personality_test import personality_test
 from app.schemas.matching import (
     UserProfile, UserProfileCreate, UserProfileUpdate,
     MatchingSession, MatchingSessionCreate,
     MatchingGroup, MatchingResult, GroupMember,
     EnergyFeedbackCreate, EnergyFeedback,
-    MatchScoreDetail
+    MatchScoreDetail, MatchingJobStatus
 )
 from app.api.deps import get_current_active_user
 
@@ -69,11 +75,16 @@ def update_user_profile(
 
 # ==================== Matching Endpoints ====================
 
-@router.post("/events/{event_id}/match", response_model=MatchingResult)
+@router.post(
+    "/events/{event_id}/match",
+    response_model=MatchingResult,
+    responses={202: {"model": MatchingJobStatus, "description": "Accepted as a background job"}}
+)
 def create_matching_for_event(
     event_id: int = Path(..., description="Event ID"),
     target_group_size: int = Query(4, description="4 for deep, 6 for casual"),
     conversation_style: str = Query("deep", regex="^(deep|casual)$"),
+    background: bool = Query(False, description="Run as a background job and return 202 immediately"),
     wp_db: Session = Depends(get_wp_db),
     local_db: Session = Depends(get_local_db),
     current_user = Depends(get_current_active_user)
@@ -87,6 +98,9 @@ def create_matching_for_event(
     3. Get/create their matching profiles
     4. Run the matching algorithm
     5. Return matched groups
+    
+    With `?background=true` the session is saved as `pending` and steps 1-4
+    run on the local job pool; poll `GET /sessions/{session_id}/status`.
     """
     # Validate conversation style and group size alignment
     if conversation_style == "deep" and target_group_size != 4:
@@ -100,8 +114,26 @@ def create_matching_for_event(
             detail="Casual conversation style requires 6-person groups"
         )
     
+    if background:
+        event_obj = event.get_event_by_id(wp_db, event_id)
+        if not event_obj:
+            raise HTTPException(status_code=404, detail="Event not found")
+        
+        session = matching.create_pending_session(
+            local_db, event_id, target_group_size, conversation_style,
+            event_obj.post_title
+        )
+        job_runner.submit(
+            ("sosy", session.id), _run_matching_job, session.id,
+            on_cancel=lambda: _cancel_matching_job(session.id)
+        )
+        return JSONResponse(
+            status_code=202,
+            content=jsonable_encoder(_build_job_status(session))
+        )
+    
     # Get event buyers
-    buyers = event.get_event_buyers(wp_db, event_id)
+    buyers = event.get_event_buyers(wp_db, event_id, local_db=local_db, refresh=True)
     
     if not buyers:
         raise HTTPException(
@@ -116,67 +148,7 @@ def create_matching_for_event(
         )
     
     # Prepare user profiles for matching
-    user_profiles = []
-    
-    for buyer in buyers:
-        user_id = buyer['user_id']
-        
-        # Try to get existing profile
-        profile = matching.get_user_profile(local_db, user_id)
-        
-        profile_data = {
-            'user_id': user_id,
-            'username': buyer['user_login'],
-            'email': buyer['user_email'],
-            'display_name': buyer['display_name'],
-            'has_personality_test': buyer['has_personality_test']
-        }
-        
-        # If user has personality test, extract relevant data
-        if buyer['has_personality_test']:
-            try:
-                test_result = personality_test.get_user_personality_test(
-                    wp_db, user_id
-                )
-                
-                if test_result:
-                    # Map personality test results to profile attributes
-                    # This is a simplified mapping - adjust based on your actual test structure
-                    profile_data.update(
-                        _extract_profile_from_test(test_result)
-                    )
-            except Exception as e:
-                print(f"Error getting personality test for user {user_id}: {e}")
-        
-        # If profile exists, merge with existing data
-        if profile:
-            # Keep existing profile data, only update from test if available
-            profile_dict = {
-                'user_id': user_id,
-                'username': buyer['user_login'],
-                'email': buyer['user_email'],
-                'display_name': buyer['display_name'],
-                'social_energy': profile.social_energy,
-                'conversation_style': profile.conversation_style,
-                'social_goal': profile.social_goal,
-                'group_size_preference': profile.group_size_preference,
-                'gender': profile.gender,
-                'gender_preference': profile.gender_preference,
-                'activity_types': profile.activity_types,
-                'discussion_topics': profile.discussion_topics,
-                'life_stage': profile.life_stage,
-                'cultural_background': profile.cultural_background,
-                'price_tier': profile.price_tier,
-                'reliability_score': profile.reliability_score,
-                'attendance_rate': profile.attendance_rate
-            }
-            # Update with new data from test if available
-            profile_dict.update({k: v for k, v in profile_data.items() 
-                               if v is not None and k not in ['user_id', 'username', 'email', 'display_name', 'has_personality_test']})
-        else:
-            profile_dict = profile_data
-        
-        user_profiles.append(profile_dict)
+    user_profiles = matching.build_user_profiles(wp_db, local_db, buyers)
     
     # Run matching algorithm
     session, groups = matching.create_matching_groups(
@@ -233,70 +205,42 @@ def create_matching_for_event(
         total_users=total_users,
         matched_users=matched_users,
         unmatched_users=unmatched_users,
-        average_group_score=avg_score
+        average_group_score=avg_score,
+        timings=session.timings
     )
 
+@router.get("/sessions/{session_id}/status", response_model=MatchingJobStatus)
+async def get_matching_session_status(
+    session_id: int = Path(..., description="Matching Session ID"),
+    db: AsyncSession = Depends(get_async_local_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Poll the status / progress of a matching session
+    """
+    session = await db.run_sync(matching.get_matching_session, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Matching session not found")
+    
+    return _build_job_status(session)
+
 @router.get("/sessions/{session_id}", response_model=MatchingResult)
-def get_matching_session_result(
+async def get_matching_session_result(
     session_id: int = Path(..., description="Matching Session ID"),
-    db: Session = Depends(get_local_db),
-    wp_db: Session = Depends(get_wp_db),
+    db: AsyncSession = Depends(get_async_local_db),
+    wp_db: AsyncSession = Depends(get_async_wp_db),
     current_user = Depends(get_current_active_user)
 ):
     """
     Get matching session results by session ID
     """
-    session = matching.get_matching_session(db, session_id)
+    session = await db.run_sync(matching.get_matching_session, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Matching session not found")
     
-    groups = matching.get_matching_groups(db, session_id)
-    
-    # Get buyer data to enrich member info
-    buyers = event.get_event_buyers(wp_db, session.event_id)
-    buyer_map = {b['user_id']: b for b in buyers}
-    
-    formatted_groups = []
-    total_matched = 0
-    
-    for group in groups:
-        members = []
-        for member_data in group.members_data:
-            buyer = buyer_map.get(member_data['user_id'], {})
-            members.append(GroupMember(
-                user_id=member_data['user_id'],
-                username=member_data.get('username', ''),
-                email=member_data.get('email', ''),
-                display_name=member_data.get('display_name', ''),
-                social_energy=member_data.get('social_energy'),
-                match_score=None,
-                has_personality_test=buyer.get('has_personality_test', False)
-            ))
-            total_matched += 1
-        
-        formatted_groups.append(MatchingGroup(
-            id=group.id,
-            session_id=group.session_id,
-            group_number=group.group_number,
-            group_size=group.group_size,
-            average_match_score=group.average_match_score,
-            members=members,
-            created_at=group.created_at
-        ))
-    
-    avg_score = (
-        sum(g.average_match_score for g in formatted_groups) / len(formatted_groups)
-        if formatted_groups else 0
-    )
-    
-    return MatchingResult(
-        session=session,
-        groups=formatted_groups,
-        total_users=len(buyers),
-        matched_users=total_matched,
-        unmatched_users=len(buyers) - total_matched,
-        average_group_score=avg_score
-    )
+    # Buyer data to enrich member info; each session runs in its own run_sync
+    buyers = await event.get_event_buyers_async(wp_db, session.event_id, local_db=db)
+    return await db.run_sync(_build_session_result, session, buyers)
 
 @router.get("/groups/{group_id}/scores", response_model=List[MatchScoreDetail])
 def get_group_match_scores(
@@ -374,54 +318,109 @@ def create_energy_feedback(
 
 # ==================== Helper Functions ====================
 
-def _extract_profile_from_test(test_result: dict) -> dict:
+def _cancel_matching_job(session_id: int) -> None:
+    """Shutdown cancelled the queued job: fail the session so polling ends"""
+    with LocalSessionLocal() as db:
+        matching.mark_session_failed(db, session_id, MATCHING_JOB_CANCELLED)
+
+def _run_matching_job(session_id: int) -> None:
     """
-    Extract matching profile attributes from personality test results
-    This is a simplified version - adjust based on your actual test structure
+    Background job: fetch buyers and profiles, then run the matching algorithm
+    for a pending session using its own DB sessions
     """
-    profile = {}
-    
-    # Example: Extract social energy from test results
-    # You'll need to adjust this based on your actual personality test questions
-    total_points = test_result.get('total_points', 0)
+    key = ("sosy", session_id)
+    local_db = LocalSessionLocal()
+    wp_db = WPSessionLocal()
+    try:
+        session = matching.get_matching_session(local_db, session_id)
+        if not session:
+            return
+        
+        job_runner.report(key, phase='loading')
+        buyers = event.get_event_buyers(wp_db, session.event_id, local_db=local_db, refresh=True)
+        if len(buyers) < session.target_group_size:
+            matching.mark_session_failed(
+                local_db, session_id,
+                f"Not enough buyers ({len(buyers)}) for group size {session.target_group_size}"
+            )
+            return
+        
+        user_profiles = matching.build_user_profiles(wp_db, local_db, buyers)
+        matching.create_matching_groups(
+            local_db,
+            session.event_id,
+            session.target_group_size,
+            session.conversation_style,
+            user_profiles,
+            session=session,
+            progress=job_runner.reporter(key)
+        )
+    except Exception as e:
+        local_db.rollback()
+        matching.mark_session_failed(local_db, session_id, str(e))
+        raise
+    finally:
+        wp_db.close()
+        local_db.close()
+
+def _build_session_result(db: Session, session, buyers: List[dict]) -> MatchingResult:
+    """Stored groups of a session, enriched with current buyer data"""
+    groups = matching.get_matching_groups(db, session.id)
     
-    # Map points to social energy (example thresholds)
-    if total_points < 30:
-        profile['social_energy'] = 'introvert'
-    elif total_points < 70:
-        profile['social_energy'] = 'ambivert'
-    else:
-        profile['social_energy'] = 'extrovert'
+    buyer_map = {b['user_id']: b for b in buyers}
     
-    # You can add more sophisticated mapping based on specific questions
-    # For example, if you have questions about conversation preferences:
-    answers = test_result.get('answers', [])
+    formatted_groups = []
+    total_matched = 0
     
-    for answer in answers:
-        question_text = answer.get('question_text', '').lower()
-        answer_text = answer.get('answer_text', '').lower()
-        
-        # Example: Detect conversation style from answers
-        if 'conversation' in question_text or 'discussion' in question_text:
-            if 'deep' in answer_text or 'meaningful' in answer_text:
-                profile['conversation_style'] = 'deep'
-            elif 'casual' in answer_text or 'light' in answer_text:
-                profile['conversation_style'] = 'casual'
-        
-        # Example: Detect social goal
-        if 'goal' in question_text or 'looking for' in question_text:
-            if 'relationship' in answer_text:
-                profile['social_goal'] = 'relationship'
-            elif 'friend' in answer_text:
-                profile['social_goal'] = 'friendship'
-            elif 'network' in answer_text or 'professional' in answer_text:
-                profile['social_goal'] = 'networking'
+    for group in groups:
+        members = []
+        for member_data in group.members_data:
+            buyer = buyer_map.get(member_data['user_id'], {})
+            members.append(GroupMember(
+                user_id=member_data['user_id'],
+                username=member_data.get('username', ''),
+                email=member_data.get('email', ''),
+                display_name=member_data.get('display_name', ''),
+                social_energy=member_data.get('social_energy'),
+                match_score=None,
+                has_personality_test=buyer.get('has_personality_test', False)
+            ))
+            total_matched += 1
         
-        # Example: Detect group size preference
-        if 'group size' in question_text or 'prefer' in question_text:
-            if '4' in answer_text or 'small' in answer_text or 'intimate' in answer_text:
-                profile['group_size_preference'] = 4
-            elif '6' in answer_text or 'larger' in answer_text:
-                profile['group_size_preference'] = 6
+        formatted_groups.append(MatchingGroup(
+            id=group.id,
+            session_id=group.session_id,
+            group_number=group.group_number,
+            group_size=group.group_size,
+            average_match_score=group.average_match_score,
+            members=members,
+            created_at=group.created_at
+        ))
     
-    return profile
\ No newline at end of file
+    avg_score = (
+        sum(g.average_match_score for g in formatted_groups) / len(formatted_groups)
+        if formatted_groups else 0
+    )
+    
+    return MatchingResult(
+        session=session,
+        groups=formatted_groups,
+        total_users=len(buyers),
+        matched_users=total_matched,
+        unmatched_users=len(buyers) - total_matched,
+        average_group_score=avg_score,
+        timings=session.timings
+    )
+
+def _build_job_status(session) -> MatchingJobStatus:
+    """Job status from live progress if this process runs the job, else from the session row"""
+    progress = job_runner.get_progress(("sosy", session.id))
+    if progress is None or session.status in ('completed', 'failed'):
+        progress = session.progress
+    
+    return MatchingJobStatus(
+        session_id=session.id,
+        event_id=session.event_id,
+        status=session.status,
+        progress=progress
+    )
@@ -3,8 +3,9 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.db.base import get_local_db
 from app.crud.user import user
+from app.utils.pagination import InvalidCursor
 from app.schemas.user import User, UserCreate, UserUpdate, UserListResponse
-from app.api.deps import get_current_active_user, get_current_superuser
+from app.api.deps import get_current_active_user, get_current_superuser, get_current_active_db_user
 
 router = APIRouter()
 
@@ -18,10 +19,15 @@ def read_users(
     sort_order: Optional[str] = Query("desc", regex="^(asc|desc)$", description="Sort order"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
     is_superuser: Optional[bool] = Query(None, description="Filter by superuser status"),
+    cursor: Optional[str] = Query(None, description="Cursor pagination: empty for the first page, then next_cursor"),
+    include_total: bool = Query(False, description="Cursor mode: also return the total count"),
     current_user: User = Depends(get_current_superuser)
 ):
     """
     Retrieve users with pagination, search, sorting, and filtering (Admin only)
+    
+    Pass `cursor` (empty for the first page, then `next_cursor`) for keyset
+    pagination; the total is then only returned with `include_total=true`.
     """
     # Calculate skip
     skip = (page - 1) * page_size
@@ -34,6 +40,31 @@ def read_users(
             detail=f"Invalid sort field. Must be one of: {', '.join(valid_sort_fields)}"
         )
     
+    # Cursor mode (opt-in): keyset pagination on (sort_by, id)
+    if cursor is not None:
+        try:
+            users, next_cursor = user.get_multi_keyset(
+                db=db,
+                cursor=cursor or None,
+                limit=page_size,
+                search=search,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                is_active=is_active,
+                is_superuser=is_superuser
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return UserListResponse(
+            data=users,
+            total=user.count(db, search, is_active, is_superuser) if include_total else None,
+            page_size=page_size,
+            has_next=next_cursor is not None,
+            has_prev=bool(cursor),
+            next_cursor=next_cursor
+        )
+    
     users, total_count = user.get_multi(
         db=db,
         skip=skip,
@@ -140,7 +171,7 @@ def delete_user(
     return {"message": "User deleted successfully"}
 
 @router.get("/me/", response_model=User)
-def read_user_me(current_user: User = Depends(get_current_active_user)):
+def read_user_me(current_user: User = Depends(get_current_active_db_user)):
     """
     Get current user profile
     """
@@ -151,7 +182,7 @@ def update_user_me(
     *,
     db: Session = Depends(get_local_db),
     user_in: UserUpdate,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_db_user)
 ):
     """
     Update own user profile
@@ -1,26 +1,38 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.db.base import get_wp_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.base import get_async_wp_db, get_async_local_db
 from app.crud.user import wp_user
+from app.crud.search_index import search_index
+from app.utils.pagination import InvalidCursor
 from app.schemas.user import WordPressUser, WordPressUserListResponse
 from app.api.deps import get_current_active_user
 
 router = APIRouter()
 
 @router.get("/", response_model=WordPressUserListResponse)
-def read_wp_users(
-    db: Session = Depends(get_wp_db),
+async def read_wp_users(
+    db: AsyncSession = Depends(get_async_wp_db),
+    local_db: AsyncSession = Depends(get_async_local_db),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(10, ge=1, le=100, description="Items per page"),
-    search: Optional[str] = Query(None, description="Search by username, email, or display name"),
+    search: Optional[str] = Query(None, description="Search by username, email, or display name; matches the start of words"),
     sort_by: Optional[str] = Query("user_registered", description="Sort by field"),
     sort_order: Optional[str] = Query("desc", regex="^(asc|desc)$", description="Sort order"),
     user_status: Optional[int] = Query(None, description="Filter by user status"),
+    cursor: Optional[str] = Query(None, description="Cursor pagination: empty for the first page, then next_cursor"),
+    include_total: bool = Query(False, description="Cursor mode: also return the total count"),
     current_user = Depends(get_current_active_user)
 ):
     """
     Retrieve WordPress users with pagination, search, and sorting
+    
+    Pass `cursor` (empty for the first page, then `next_cursor`) for keyset
+    pagination; the total is then only returned with `include_total=true`.
+    
+    `search` matches words from their start ("john" finds "Johnson", "ohn"
+    finds nothing), except right after deployment while the search index
+    is first built, when it matches any substring.
     """
     # Calculate skip
     skip = (page - 1) * page_size
@@ -33,14 +45,49 @@ def read_wp_users(
             detail=f"Invalid sort field. Must be one of: {', '.join(valid_sort_fields)}"
         )
     
-    users, total_count = wp_user.get_multi(
-        db=db,
+    # Search the local mirror first; each session runs in its own run_sync
+    search_ids = None
+    if search:
+        search_ids = await local_db.run_sync(search_index.search_wp_user_ids, search)
+    
+    # Cursor mode (opt-in): keyset pagination on (sort_by, ID)
+    if cursor is not None:
+        try:
+            users, next_cursor = await db.run_sync(
+                wp_user.get_multi_keyset,
+                cursor=cursor or None,
+                limit=page_size,
+                search=search,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                user_status=user_status,
+                search_ids=search_ids
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        total = None
+        if include_total:
+            total = await db.run_sync(wp_user.count, search, user_status, search_ids)
+        
+        return WordPressUserListResponse(
+            data=users,
+            total=total,
+            page_size=page_size,
+            has_next=next_cursor is not None,
+            has_prev=bool(cursor),
+            next_cursor=next_cursor
+        )
+    
+    users, total_count = await db.run_sync(
+        wp_user.get_multi,
         skip=skip,
         limit=page_size,
         search=search,
         sort_by=sort_by,
         sort_order=sort_order,
-        user_status=user_status
+        user_status=user_status,
+        search_ids=search_ids
     )
     
     # Calculate pagination info
@@ -59,29 +106,29 @@ def read_wp_users(
     )
 
 @router.get("/{user_id}", response_model=WordPressUser)
-def read_wp_user(
+async def read_wp_user(
     user_id: int,
-    db: Session = Depends(get_wp_db),
+    db: AsyncSession = Depends(get_async_wp_db),
     current_user = Depends(get_current_active_user)
 ):
     """
     Get a specific WordPress user by ID
     """
-    db_user = wp_user.get(db, id=user_id)
+    db_user = await db.run_sync(wp_user.get, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="WordPress user not found")
     return db_user
 
 @router.get("/login/{user_login}", response_model=WordPressUser)
-def read_wp_user_by_login(
+async def read_wp_user_by_login(
     user_login: str,
-    db: Session = Depends(get_wp_db),
+    db: AsyncSession = Depends(get_async_wp_db),
     current_user = Depends(get_current_active_user)
 ):
     """
     Get a WordPress user by login username
     """
-    db_user = wp_user.get_by_login(db, user_login=user_login)
+    db_user = await db.run_sync(wp_user.get_by_login, user_login)
     if not db_user:
         raise HTTPException(status_code=404, detail="WordPress user not found")
     return db_user
\ No newline at end of file
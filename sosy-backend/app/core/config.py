@@ -27,6 +27,109 @@ class Settings(BaseSettings):
     ALGORITHM: str = config("ALGORITHM", default="HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = config("ACCESS_TOKEN_EXPIRE_MINUTES", default=30, cast=int)
     
+    # bcrypt process pool: worker processes and how many more calls may wait
+    # before logins get 503 (0 workers hashes inline)
+    PASSWORD_HASH_WORKERS: int = config("PASSWORD_HASH_WORKERS", default=2, cast=int)
+    PASSWORD_HASH_QUEUE_SIZE: int = config("PASSWORD_HASH_QUEUE_SIZE", default=32, cast=int)
+    PASSWORD_HASH_START_METHOD: str = config("PASSWORD_HASH_START_METHOD", default="spawn")
+    
+    # Authenticated principal cache (skips the user lookup on every request)
+    PRINCIPAL_CACHE_SIZE: int = config("PRINCIPAL_CACHE_SIZE", default=1024, cast=int)
+    PRINCIPAL_CACHE_TTL: int = config("PRINCIPAL_CACHE_TTL", default=60, cast=int)
+    
+    # Background matching jobs
+    MATCHING_JOB_WORKERS: int = config("MATCHING_JOB_WORKERS", default=2, cast=int)
+    # At startup, fail sessions left 'pending' / 'processing' by a previous
+    # process; turn off when several app processes share the database, or one
+    # restarting fails the jobs the others are running
+    MATCHING_JOB_RECOVER_ON_STARTUP: bool = config("MATCHING_JOB_RECOVER_ON_STARTUP", default=True, cast=bool)
+    
+    # Daylight matching: CPU seconds the swap/move refinement of formed tables
+    # may use per session (0 turns it off)
+    DAYLIGHT_REFINE_CPU_SECONDS: float = config("DAYLIGHT_REFINE_CPU_SECONDS", default=1.0, cast=float)
+    
+    # Daylight matching: cohorts up to this size are seated by the exact solver
+    # (highest possible lowest table score); past the time limit (seconds) it
+    # gives up and the greedy tiers run
+    DAYLIGHT_EXACT_MAX_PARTICIPANTS: int = config("DAYLIGHT_EXACT_MAX_PARTICIPANTS", default=24, cast=int)
+    DAYLIGHT_EXACT_TIME_LIMIT: float = config("DAYLIGHT_EXACT_TIME_LIMIT", default=1.0, cast=float)
+    
+    # Daylight matching: cohorts of at least this size skip the all-pairs
+    # score matrix and score only each participant's nearest candidates,
+    # keeping the best DAYLIGHT_CANDIDATE_NEIGHBOURS
+    DAYLIGHT_CANDIDATE_MIN_PARTICIPANTS: int = config("DAYLIGHT_CANDIDATE_MIN_PARTICIPANTS", default=10000, cast=int)
+    DAYLIGHT_CANDIDATE_NEIGHBOURS: int = config("DAYLIGHT_CANDIDATE_NEIGHBOURS", default=32, cast=int)
+    
+    # SOSY matching: worker processes that grow candidate groups from every
+    # seed in parallel, for cohorts of at least SOSY_GROUPING_PARALLEL_MIN
+    # (0 workers runs inline)
+    SOSY_GROUPING_WORKERS: int = config("SOSY_GROUPING_WORKERS", default=4, cast=int)
+    SOSY_GROUPING_PARALLEL_MIN: int = config("SOSY_GROUPING_PARALLEL_MIN", default=300, cast=int)
+    SOSY_GROUPING_START_METHOD: str = config("SOSY_GROUPING_START_METHOD", default="spawn")
+    
+    # Event buyers (local copy of WooCommerce orders, refreshed incrementally)
+    EVENT_BUYERS_SYNC_INTERVAL: int = config("EVENT_BUYERS_SYNC_INTERVAL", default=60, cast=int)
+    
+    # WordPress product catalog cache (product rows, list pages, buyer lists)
+    EVENT_CACHE_SIZE: int = config("EVENT_CACHE_SIZE", default=1024, cast=int)
+    EVENT_CACHE_TTL: int = config("EVENT_CACHE_TTL", default=300, cast=int)
+    EVENT_CACHE_REVALIDATE_SECONDS: int = config("EVENT_CACHE_REVALIDATE_SECONDS", default=10, cast=int)
+    EVENT_BUYERS_CACHE_TTL: int = config("EVENT_BUYERS_CACHE_TTL", default=30, cast=int)
+    
+    # Completed Daylight session results kept in memory per process: entries,
+    # total megabytes and seconds each one is kept
+    SNAPSHOT_CACHE_SIZE: int = config("SNAPSHOT_CACHE_SIZE", default=32, cast=int)
+    SNAPSHOT_CACHE_MB: int = config("SNAPSHOT_CACHE_MB", default=64, cast=int)
+    SNAPSHOT_CACHE_TTL: int = config("SNAPSHOT_CACHE_TTL", default=600, cast=int)
+    
+    # List endpoints: seconds a total count is reused across pages
+    COUNT_CACHE_TTL: int = config("COUNT_CACHE_TTL", default=30, cast=int)
+    
+    # Search mirrors (local full-text copies of products / WordPress users),
+    # synced in the background every SEARCH_INDEX_SYNC_INTERVAL seconds
+    SEARCH_INDEX_SYNC_INTERVAL: int = config("SEARCH_INDEX_SYNC_INTERVAL", default=60, cast=int)
+    SEARCH_INDEX_FULL_REFRESH_HOURS: int = config("SEARCH_INDEX_FULL_REFRESH_HOURS", default=24, cast=int)
+    
+    # Connection pools, per engine (sync engines serve the threadpool endpoints
+    # and matching jobs, async engines the async read endpoints)
+    LOCAL_DB_POOL_SIZE: int = config("LOCAL_DB_POOL_SIZE", default=5, cast=int)
+    LOCAL_DB_MAX_OVERFLOW: int = config("LOCAL_DB_MAX_OVERFLOW", default=10, cast=int)
+    LOCAL_DB_POOL_TIMEOUT: float = config("LOCAL_DB_POOL_TIMEOUT", default=30, cast=float)
+    WP_DB_POOL_SIZE: int = config("WP_DB_POOL_SIZE", default=5, cast=int)
+    WP_DB_MAX_OVERFLOW: int = config("WP_DB_MAX_OVERFLOW", default=10, cast=int)
+    WP_DB_POOL_TIMEOUT: float = config("WP_DB_POOL_TIMEOUT", default=30, cast=float)
+    ASYNC_LOCAL_DB_POOL_SIZE: int = config("ASYNC_LOCAL_DB_POOL_SIZE", default=5, cast=int)
+    ASYNC_LOCAL_DB_MAX_OVERFLOW: int = config("ASYNC_LOCAL_DB_MAX_OVERFLOW", default=10, cast=int)
+    ASYNC_LOCAL_DB_POOL_TIMEOUT: float = config("ASYNC_LOCAL_DB_POOL_TIMEOUT", default=30, cast=float)
+    ASYNC_WP_DB_POOL_SIZE: int = config("ASYNC_WP_DB_POOL_SIZE", default=5, cast=int)
+    ASYNC_WP_DB_MAX_OVERFLOW: int = config("ASYNC_WP_DB_MAX_OVERFLOW", default=10, cast=int)
+    ASYNC_WP_DB_POOL_TIMEOUT: float = config("ASYNC_WP_DB_POOL_TIMEOUT", default=30, cast=float)
+    DB_POOL_RECYCLE: int = config("DB_POOL_RECYCLE", default=300, cast=int)
+    
+    # Open pool_size connections per engine at startup
+    DB_POOL_PREWARM: bool = config("DB_POOL_PREWARM", default=True, cast=bool)
+    
+    # Warn about connections checked out longer than this (seconds); with
+    # DB_POOL_LEAK_TRACEBACK the warning includes where it was checked out
+    DB_CONNECTION_WARN_SECONDS: float = config("DB_CONNECTION_WARN_SECONDS", default=60, cast=float)
+    DB_POOL_LEAK_TRACEBACK: bool = config("DB_POOL_LEAK_TRACEBACK", default=False, cast=bool)
+    
+    # /metrics, /health/db and /health/hashing: client networks allowed
+    # (comma separated, as seen by uvicorn) and an optional bearer token for
+    # scrapers outside them
+    INTERNAL_ALLOWED_NETWORKS: str = config("INTERNAL_ALLOWED_NETWORKS", default="127.0.0.1/32,::1/128")
+    INTERNAL_ACCESS_TOKEN: str = config("INTERNAL_ACCESS_TOKEN", default="")
+    
+    # Statements slower than this (milliseconds) are logged with the route
+    SLOW_QUERY_THRESHOLD_MS: float = config("SLOW_QUERY_THRESHOLD_MS", default=500, cast=float)
+    
+    # Diagnostic mode: EXPLAIN WordPress SELECTs slower than the threshold
+    # (milliseconds) and keep the plans in slow_query_plans
+    WP_EXPLAIN_ENABLED: bool = config("WP_EXPLAIN_ENABLED", default=False, cast=bool)
+    WP_EXPLAIN_THRESHOLD_MS: float = config("WP_EXPLAIN_THRESHOLD_MS", default=200, cast=float)
+    WP_EXPLAIN_REFRESH_MINUTES: int = config("WP_EXPLAIN_REFRESH_MINUTES", default=60, cast=int)
+    WP_EXPLAIN_QUEUE_SIZE: int = config("WP_EXPLAIN_QUEUE_SIZE", default=100, cast=int)
+    
     # Database URLs
     @property
     def LOCAL_DATABASE_URL(self) -> str:
@@ -35,6 +138,18 @@ class Settings(BaseSettings):
     @property
     def WP_DATABASE_URL(self) -> str:
         return f"mysql+pymysql://{self.WP_DB_USER}:{self.WP_DB_PASS}@{self.WP_DB_HOST}:{self.WP_DB_PORT}/{self.WP_DB_NAME}"
+    
+    # Async engines (aiomysql); override with e.g. sqlite+aiosqlite:///./local.db for local testing
+    ASYNC_DB_URL: str = config("ASYNC_DB_URL", default="")
+    ASYNC_WP_DB_URL: str = config("ASYNC_WP_DB_URL", default="")
+    
+    @property
+    def ASYNC_LOCAL_DATABASE_URL(self) -> str:
+        return self.ASYNC_DB_URL or f"mysql+aiomysql://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+    
+    @property
+    def ASYNC_WP_DATABASE_URL(self) -> str:
+        return self.ASYNC_WP_DB_URL or f"mysql+aiomysql://{self.WP_DB_USER}:{self.WP_DB_PASS}@{self.WP_DB_HOST}:{self.WP_DB_PORT}/{self.WP_DB_NAME}"
 
     class Config:
         env_file = ".env"
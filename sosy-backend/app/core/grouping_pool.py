@@ -0,0 +1,96 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.utils.sosy_grouping import SeedGroup, explore_seeds, explore_shared, share_matrices
+
+# search(alive, target_size) -> (best group or None, pairs looked at)
+SeedSearch = Callable[[np.ndarray, int], Tuple[Optional[SeedGroup], int]]
+
+
+class SeedExplorationPool:
+    """
+    Process pool for SOSY group formation.
+
+    Every round tries each ungrouped participant as the seed of a greedy
+    group, which is CPU-bound numpy work over the whole score matrix. The
+    matrix is copied once per session into shared memory; each round sends
+    the workers only the ungrouped mask and a contiguous slice of the seeds,
+    and keeps the best of their answers (lowest seed on ties, as inline).
+    Cohorts smaller than `min_participants`, or max_workers=0, run inline.
+    """
+
+    def __init__(self, max_workers: int, min_participants: int, start_method: str = "spawn"):
+        self.max_workers = max_workers
+        self.min_participants = min_participants
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def session(self, scores: np.ndarray, linked: np.ndarray) -> Iterator[SeedSearch]:
+        """Yield a search function over these matrices; the shared copy is freed on exit"""
+        size = scores.shape[0]
+        if self.max_workers <= 0 or size < self.min_participants:
+            yield lambda alive, target_size: explore_seeds(
+                scores, linked, alive, np.flatnonzero(alive), target_size
+            )
+            return
+
+        block = share_matrices(scores, linked)
+        try:
+            yield lambda alive, target_size: self._search(block.name, size, alive, target_size)
+        finally:
+            block.close()
+            block.unlink()
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _search(
+        self,
+        name: str,
+        size: int,
+        alive: np.ndarray,
+        target_size: int
+    ) -> Tuple[Optional[SeedGroup], int]:
+        seeds = np.flatnonzero(alive)
+        mask = alive.astype(np.bool_).tobytes()
+        executor = self._get_executor()
+        futures = [
+            executor.submit(explore_shared, name, size, mask, chunk.tolist(), target_size)
+            for chunk in np.array_split(seeds, min(self.max_workers, len(seeds)) or 1)
+            if len(chunk)
+        ]
+
+        # Chunks are in seed order: a later chunk only wins with a higher score
+        best = None
+        pairs = 0
+        for future in futures:
+            found, chunk_pairs = future.result()
+            pairs += chunk_pairs
+            if found is not None and (best is None or found.score > best.score):
+                best = found
+        return best, pairs
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method)
+                )
+            return self._executor
+
+
+seed_explorer = SeedExplorationPool(
+    max_workers=settings.SOSY_GROUPING_WORKERS,
+    min_participants=settings.SOSY_GROUPING_PARALLEL_MIN,
+    start_method=settings.SOSY_GROUPING_START_METHOD
+)
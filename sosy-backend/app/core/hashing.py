@@ -0,0 +1,117 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from app.core.config import settings
+
+
+class HashingPoolBusy(RuntimeError):
+    """The password hashing queue is full; the caller should retry later"""
+
+
+class PasswordHashingPool:
+    """
+    Bounded process pool for bcrypt.
+
+    A bcrypt round at cost 12 takes ~250 ms of CPU under the GIL; run inline,
+    a burst of logins stalls every other request on the worker. Here hashes
+    run in `max_workers` separate processes. At most `max_workers +
+    queue_size` calls are in flight; beyond that HashingPoolBusy is raised
+    right away instead of letting the backlog grow. With max_workers=0
+    hashing runs inline (tests, single-user tools).
+    """
+
+    def __init__(self, max_workers: int, queue_size: int, start_method: str = "spawn"):
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max(max_workers, 1) + queue_size)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.seconds_total = 0.0
+        self.seconds_max = 0.0
+
+    def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run `fn(*args)` in the pool and wait for the result"""
+        if self.max_workers <= 0:
+            return fn(*args)
+
+        started = self._acquire()
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._release(started)
+
+    async def run_async(self, fn: Callable[..., Any], *args) -> Any:
+        """run() for async handlers - awaits the worker without holding a thread"""
+        if self.max_workers <= 0:
+            return fn(*args)
+
+        started = self._acquire()
+        try:
+            return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        finally:
+            self._release(started)
+
+    def warm_up(self) -> None:
+        """Start the worker processes now instead of on the first login"""
+        if self.max_workers > 0:
+            self._get_executor().submit(int).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'queue_size': self.queue_size,
+                'in_flight': self.in_flight,
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'seconds_total': round(self.seconds_total, 6),
+                'seconds_max': round(self.seconds_max, 6),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method)
+                )
+            return self._executor
+
+    def _acquire(self) -> float:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingPoolBusy("Too many password hashing requests in progress")
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+        return time.perf_counter()
+
+    def _release(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.in_flight -= 1
+            self.seconds_total += elapsed
+            if elapsed > self.seconds_max:
+                self.seconds_max = elapsed
+        self._slots.release()
+
+
+password_hasher = PasswordHashingPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    start_method=settings.PASSWORD_HASH_START_METHOD
+)
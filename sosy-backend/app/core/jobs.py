@@ -0,0 +1,113 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Errors recorded on sessions whose job will never run to the end
+MATCHING_JOB_CANCELLED = "Server shut down before the matching job started"
+MATCHING_JOB_INTERRUPTED = "Server restarted while the matching job was pending or running"
+
+
+class MatchingJobRunner:
+    """
+    Local worker pool for long-running matching sessions.
+
+    Endpoints save the session as 'pending', submit the work here and return
+    202 right away. Jobs report progress (tier, tables formed, participants
+    remaining) into an in-process registry so status polling is a dict
+    lookup. Progress is per-process and dropped when the job ends, however
+    it ends: from then on (or on another worker) polling reads the status
+    stored on the session row.
+    
+    Jobs still queued at shutdown are cancelled and their `on_cancel`
+    callbacks run, so the sessions don't stay 'pending' with no worker.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._progress: Dict[Hashable, Dict[str, Any]] = {}
+        self._queued: Dict[Hashable, Tuple[Future, Optional[Callable[[], None]]]] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        key: Hashable,
+        fn: Callable[..., Any],
+        *args,
+        on_cancel: Optional[Callable[[], None]] = None,
+        **kwargs
+    ) -> None:
+        """
+        Run `fn(*args, **kwargs)` on the pool; `key` identifies the job for
+        progress. `on_cancel` runs if shutdown cancels the job before it starts.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="matching-job"
+                )
+            self._progress[key] = {'phase': 'queued', 'updated_at': _now()}
+            executor = self._executor
+
+        future = executor.submit(fn, *args, **kwargs)
+        with self._lock:
+            self._queued[key] = (future, on_cancel)
+        future.add_done_callback(lambda f: self._finished(key, f))
+
+    def report(self, key: Hashable, **progress: Any) -> None:
+        """Merge progress fields for a running job"""
+        with self._lock:
+            entry = self._progress.setdefault(key, {})
+            entry.update(progress)
+            entry['updated_at'] = _now()
+
+    def reporter(self, key: Hashable) -> Callable[..., None]:
+        """Progress callback bound to one job"""
+        return lambda **progress: self.report(key, **progress)
+
+    def get_progress(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._progress.get(key)
+            return dict(entry) if entry is not None else None
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the pool; without `wait`, queued jobs are cancelled (running ones finish)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            queued, self._queued = list(self._queued.items()), {}
+        if executor is None:
+            return
+        if not wait:
+            for key, (future, on_cancel) in queued:
+                if future.cancel() and on_cancel is not None:
+                    try:
+                        on_cancel()
+                    except Exception:
+                        logger.exception("Cancelling matching job %s failed", key)
+        executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _finished(self, key: Hashable, future: Future) -> None:
+        # Finished jobs have stored their outcome on the session row, which
+        # status polling reads from then on: drop the progress entry
+        with self._lock:
+            if self._queued.get(key, (None,))[0] is future:
+                del self._queued[key]
+            self._progress.pop(key, None)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error("Matching job %s failed", key, exc_info=error)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+job_runner = MatchingJobRunner(settings.MATCHING_JOB_WORKERS)
@@ -0,0 +1,369 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from starlette.routing import Match
+
+# (name suffix, label pairs, value) as produced by metrics and collectors
+Sample = Tuple[str, Tuple[Tuple[str, str], ...], float]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+MATCHING_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _pairs(self, key: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(zip(self.labelnames, key))
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic total per label set (name it with the _total suffix)"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        return [("", self._pairs(key), value) for key, value in items]
+
+
+class Gauge(_Metric):
+    """Current value per label set"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        return [("", self._pairs(key), value) for key, value in items]
+
+
+class Histogram(_Metric):
+    """Bucketed observations per label set (quantiles via histogram_quantile)"""
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+
+        result = []
+        for key, counts, total in items:
+            pairs = self._pairs(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                result.append(("_bucket", pairs + (("le", _format_value(bound)),), cumulative))
+            result.append(("_sum", pairs, total))
+            result.append(("_count", pairs, cumulative))
+        return result
+
+
+class Registry:
+    """
+    Metrics served at /metrics in the Prometheus text format.
+
+    Besides registered metrics, collectors are called at scrape time for
+    values that live elsewhere (connection pools, the hashing pool); each
+    returns (name, kind, documentation, samples).
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        families = [(m.name, m.kind, m.documentation, m.samples()) for m in self._metrics]
+        for collector in self._collectors:
+            families.extend(collector())
+
+        lines = []
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    pairs = (
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "sosy_http_requests_total", "HTTP requests by route template, method and status",
+    ["method", "route", "status"]
+))
+http_request_duration = registry.register(Histogram(
+    "sosy_http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route"]
+))
+http_requests_in_progress = registry.register(Gauge(
+    "sosy_http_requests_in_progress", "HTTP requests being handled by route template",
+    ["method", "route"]
+))
+matching_runs = registry.register(Counter(
+    "sosy_matching_runs_total", "Matching runs by algorithm and outcome",
+    ["algorithm", "status"]
+))
+matching_run_duration = registry.register(Histogram(
+    "sosy_matching_run_duration_seconds", "Matching run duration by algorithm",
+    ["algorithm"], buckets=MATCHING_BUCKETS
+))
+matching_tier_duration = registry.register(Histogram(
+    "sosy_matching_tier_duration_seconds", "Time spent per matching algorithm tier",
+    ["algorithm", "tier"], buckets=MATCHING_BUCKETS
+))
+matching_tier_tables = registry.register(Counter(
+    "sosy_matching_tier_tables_total", "Tables/groups formed per matching algorithm tier",
+    ["algorithm", "tier"]
+))
+
+
+def _pool_families():
+    from app.db.pool import pool_snapshot
+    snapshot = pool_snapshot()
+    gauges = [
+        ("sosy_db_pool_connections_in_use", "in_use", "Connections checked out, per pool"),
+        ("sosy_db_pool_connections_idle", "idle", "Idle connections in the pool"),
+        ("sosy_db_pool_overflow", "overflow", "Connections open beyond pool_size"),
+    ]
+    counters = [
+        ("sosy_db_pool_checkouts_total", "checkouts", "Connection checkouts"),
+        ("sosy_db_pool_checkout_timeouts_total", "timeouts", "Checkouts that timed out waiting for a connection"),
+        ("sosy_db_pool_checkout_wait_seconds_total", "wait_seconds_total", "Time spent waiting for connections"),
+        ("sosy_db_pool_long_held_total", "long_held", "Connections held past DB_CONNECTION_WARN_SECONDS"),
+    ]
+    for name, field, documentation in gauges:
+        yield name, "gauge", documentation, [
+            ("", (("pool", pool),), stats[field]) for pool, stats in snapshot.items() if field in stats
+        ]
+    for name, field, documentation in counters:
+        yield name, "counter", documentation, [
+            ("", (("pool", pool),), stats[field]) for pool, stats in snapshot.items()
+        ]
+
+
+def _hashing_families():
+    from app.core.hashing import password_hasher
+    stats = password_hasher.stats()
+    yield "sosy_password_hash_in_flight", "gauge", "Password hashing calls running or queued", [("", (), stats['in_flight'])]
+    yield "sosy_password_hash_calls_total", "counter", "Password hashing calls accepted", [("", (), stats['submitted'])]
+    yield "sosy_password_hash_rejected_total", "counter", "Password hashing calls rejected (queue full)", [("", (), stats['rejected'])]
+    yield "sosy_password_hash_seconds_total", "counter", "Time spent in password hashing calls", [("", (), stats['seconds_total'])]
+
+
+registry.register_collector(_pool_families)
+registry.register_collector(_hashing_families)
+
+
+class TierTimer:
+    """
+    Times the consecutive tiers of one matching run.
+
+    start(tier) closes the running tier (recording its duration) and opens
+    the next; pairs(n) / tables(n) credit pairs evaluated and tables formed
+    to the running tier; stop() closes the last one. Every closed tier is
+    also kept in `spans` (phase, seconds, pairs, tables), which the CRUDs
+    store on the session as its timings.
+    """
+
+    def __init__(self, algorithm: str):
+        self.algorithm = algorithm
+        self.tier: Optional[str] = None
+        self.spans: List[Dict[str, Any]] = []
+        self._started = 0.0
+        self._pairs = 0
+        self._tables = 0
+
+    def start(self, tier: str) -> None:
+        self.stop()
+        self.tier = tier
+        self._pairs = 0
+        self._tables = 0
+        self._started = time.perf_counter()
+
+    def pairs(self, count: int) -> None:
+        if self.tier is not None:
+            self._pairs += count
+
+    def tables(self, count: int) -> None:
+        if self.tier is not None and count:
+            self._tables += count
+            matching_tier_tables.inc(count, algorithm=self.algorithm, tier=self.tier)
+
+    def stop(self) -> None:
+        if self.tier is not None:
+            seconds = time.perf_counter() - self._started
+            matching_tier_duration.observe(seconds, algorithm=self.algorithm, tier=self.tier)
+            self.spans.append({
+                'phase': self.tier,
+                'seconds': round(seconds, 6),
+                'pairs': self._pairs,
+                'tables': self._tables,
+            })
+            self.tier = None
+
+
+@contextmanager
+def track_matching_run(algorithm: str) -> Iterator[None]:
+    """Count a matching run and time it; an exception counts as status="error\""""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        matching_runs.inc(algorithm=algorithm, status="error")
+        raise
+    else:
+        matching_runs.inc(algorithm=algorithm, status="completed")
+    finally:
+        matching_run_duration.observe(time.perf_counter() - started, algorithm=algorithm)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count, latency and in-flight requests.
+
+    Requests are labelled with the route template (/api/v1/events/{event_id})
+    rather than the raw path, so IDs don't multiply the series; paths no
+    route matches are grouped under "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc(method=method, route=route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_request_duration.observe(time.perf_counter() - started, method=method, route=route)
+            http_requests.inc(method=method, route=route, status=str(status["code"]))
+            http_requests_in_progress.dec(method=method, route=route)
+
+
+def route_template(scope) -> str:
+    """Path template of the route serving this request ("unmatched" if none); cached on the scope"""
+    template = scope.get("sosy.route")
+    if template is not None:
+        return template
+
+    template = "unmatched"
+    app = scope.get("app")
+    if app is not None:
+        partial: Optional[str] = None
+        for route in app.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                template = route.path
+                break
+            if match == Match.PARTIAL and partial is None:
+                partial = route.path
+        else:
+            template = partial or template
+    scope["sosy.route"] = template
+    return template
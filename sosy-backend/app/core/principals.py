@@ -0,0 +1,35 @@
+from dataclasses import dataclass
+from app.core.config import settings
+from app.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as seen by authorization checks"""
+    id: int
+    username: str
+    is_active: bool
+    is_superuser: bool
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser)
+        )
+
+
+# Principals by token subject (username); bounded LRU with a short TTL
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL
+)
+
+
+def invalidate_principal(*usernames: str) -> None:
+    """Drop cached principals after the user row changed"""
+    for username in usernames:
+        if username:
+            principal_cache.delete(username)
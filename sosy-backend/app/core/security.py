@@ -3,6 +3,7 @@ from typing import Optional
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from app.core.config import settings
+from app.core.hashing import password_hasher
 
 # Update bcrypt config untuk handle compatibility
 pwd_context = CryptContext(
@@ -22,14 +23,25 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+# bcrypt runs in the hashing process pool (app.core.hashing); these two run
+# inside the worker processes
+def _verify(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return password_hasher.run(_verify, plain_password, hashed_password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run_async(_verify, plain_password, hashed_password)
+
 def get_password_hash(password: str) -> str:
     # Truncate password jika lebih dari 72 bytes
     if len(password.encode('utf-8')) > 72:
         password = password[:72]
-    return pwd_context.hash(password)
+    return password_hasher.run(_hash, password)
 
 def verify_token(token: str) -> Optional[str]:
     try:
@@ -1,15 +1,30 @@
-from typing import List, Optional, Dict, Any, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from typing import List, Optional, Dict, Any, Tuple, Callable
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import desc, func, insert
 from app.models.daylight_personality import (
     DaylightPersonalityTest, DaylightMatchingSession, 
     DaylightMatchingParticipant, DaylightMatchingTable, 
     DaylightMatchingScore
 )
 from app.models.user import User
-from app.schemas.daylight_personality import PersonalityTestSubmission
+from app.core.config import settings
+from app.core.metrics import TierTimer, matching_runs, track_matching_run
+from app.schemas.daylight_personality import (
+    PersonalityTestSubmission, MatchingSessionResult, MatchingParticipant,
+    MatchingTableResult, MatchScoreDetail
+)
+from app.utils.daylight_matrix import DaylightMatchMatrix
+from app.utils.daylight_exact import solve_max_min
+from app.utils.daylight_candidates import CandidateGraph, table_chunks
+from app.utils.daylight_grouping import form_groups, form_groups_on_graph, refine_groups
+import hashlib
+import logging
 import math
 import random
+import numpy as np
+import orjson
+
+logger = logging.getLogger(__name__)
 
 class CRUDDaylightPersonality:
     
@@ -354,6 +369,64 @@ class CRUDDaylightPersonality:
         Create a new matching session and run the SMART matching algorithm
         Sistem otomatis menentukan ukuran grup optimal (3-5 orang)
         """
+        session, participants_data = self._create_session_with_participants(
+            db, session_name, created_by, participant_user_ids,
+            min_match_threshold, status='processing'
+        )
+        return self._complete_matching_session(db, session, participants_data)
+    
+    def create_pending_matching_session(
+        self,
+        db: Session,
+        session_name: str,
+        created_by: int,
+        participant_user_ids: List[int],
+        min_match_threshold: float = 70.0
+    ) -> DaylightMatchingSession:
+        """Save a session and its participants as 'pending' for a background job"""
+        session, _ = self._create_session_with_participants(
+            db, session_name, created_by, participant_user_ids,
+            min_match_threshold, status='pending'
+        )
+        db.commit()
+        db.refresh(session)
+        return session
+    
+    def run_matching_session(
+        self,
+        db: Session,
+        session: DaylightMatchingSession,
+        progress: Optional[Callable[..., None]] = None
+    ) -> DaylightMatchingSession:
+        """Run the matching algorithm for a session saved by create_pending_matching_session"""
+        session.status = 'processing'
+        db.commit()
+        
+        # Loaded after the commit: committing expires every loaded instance,
+        # and expired tests would be reloaded one query each during scoring
+        participants = db.query(DaylightMatchingParticipant).options(
+            joinedload(DaylightMatchingParticipant.personality_test)
+        ).filter(
+            DaylightMatchingParticipant.session_id == session.id
+        ).order_by(DaylightMatchingParticipant.id).all()
+        
+        participants_data = [
+            {'user_id': p.user_id, 'test': p.personality_test}
+            for p in participants
+        ]
+        
+        return self._complete_matching_session(db, session, participants_data, progress)
+    
+    def _create_session_with_participants(
+        self,
+        db: Session,
+        session_name: str,
+        created_by: int,
+        participant_user_ids: List[int],
+        min_match_threshold: float,
+        status: str
+    ) -> Tuple[DaylightMatchingSession, List[Dict]]:
+        """Add a session plus one participant row per user with a test (not committed)"""
         
         # Create session
         session = DaylightMatchingSession(
@@ -362,7 +435,7 @@ class CRUDDaylightPersonality:
             min_group_size=3,
             max_group_size=5,
             min_match_threshold=min_match_threshold,
-            status='processing'
+            status=status
         )
         db.add(session)
         db.flush()
@@ -388,38 +461,74 @@ class CRUDDaylightPersonality:
             })
         
         session.total_participants = len(participants_data)
+        return session, participants_data
+    
+    def _complete_matching_session(
+        self,
+        db: Session,
+        session: DaylightMatchingSession,
+        participants_data: List[Dict],
+        progress: Optional[Callable[..., None]] = None
+    ) -> DaylightMatchingSession:
+        """Run the algorithm for a session and store the outcome"""
         
         if len(participants_data) < 3:
+            matching_runs.inc(algorithm='daylight', status='too_few_participants')
             session.status = 'failed'
             db.commit()
             db.refresh(session)
             return session
         
         # Run ENHANCED matching algorithm dengan multi-tier strategy
-        tables = self._run_enhanced_matching_algorithm(
-            db, session, participants_data, min_match_threshold
-        )
+        with track_matching_run('daylight'):
+            tables = self._run_enhanced_matching_algorithm(
+                db, session, participants_data, session.min_match_threshold, progress
+            )
         
         session.total_tables = len(tables)
         session.status = 'completed'
         session.completed_at = func.now()
+        session.progress = {
+            'tier': 'done',
+            'tables_formed': len(tables),
+            'participants_remaining': len(participants_data) - sum(t['table_size'] for t in tables)
+        }
         
         # Calculate average match score
         if tables:
-            avg_score = sum(t.average_match_score for t in tables) / len(tables)
+            avg_score = sum(t['average_match_score'] for t in tables) / len(tables)
             session.average_match_score = avg_score
         
         db.commit()
         db.refresh(session)
+        
+        # Completed sessions never change - keep the serialized result
+        self.store_result_snapshot(db, session)
         return session
     
+    def store_result_snapshot(
+        self,
+        db: Session,
+        session: DaylightMatchingSession
+    ) -> None:
+        """Serialize the session result (orjson) plus its ETag onto the session row"""
+        result = self.build_session_result(db, session)
+        snapshot = orjson.dumps(
+            result.model_dump(mode="json"),
+            option=orjson.OPT_NON_STR_KEYS
+        )
+        session.result_snapshot = snapshot
+        session.result_etag = hashlib.sha256(snapshot).hexdigest()
+        db.commit()
+    
     def _run_enhanced_matching_algorithm(
         self,
         db: Session,
         session: DaylightMatchingSession,
         participants_data: List[Dict],
-        threshold: float
-    ) -> List[DaylightMatchingTable]:
+        threshold: float,
+        progress: Optional[Callable[..., None]] = None
+    ) -> List[Dict]:
         """
         ENHANCED Multi-Tier Matching Algorithm:
         
@@ -427,24 +536,50 @@ class CRUDDaylightPersonality:
         Tier 2: Lower threshold progressively (65%, 60%, 55%, 50%)
         Tier 3: Form groups from remaining users with ANY positive compatibility
         Tier 4: Force group remaining users if >= 3 people left
+        (Cohorts up to DAYLIGHT_EXACT_MAX_PARTICIPANTS are seated by the exact
+        solver instead, falling back to tiers 1-4 if it runs out of time;
+        from DAYLIGHT_CANDIDATE_MIN_PARTICIPANTS tiers 1-3 work on a top-K
+        candidate graph instead of the all-pairs matrix)
+        Refine: swap / move members between tables while that raises the
+        lowest or the mean table score (DAYLIGHT_REFINE_CPU_SECONDS)
+        
+        Tiers only decide seating (participant index groups); all tables and
+        pairwise scores are written afterwards by _persist_tables.
+        
+        `progress`, if given, is called with tier / tables_formed /
+        participants_remaining after each tier (used by background jobs).
+        Each phase (scoring, every tier, persisting) is recorded as a span
+        in `session.timings`. Returns the inserted table rows.
         """
+        report = progress or (lambda **_: None)
+        tiers = TierTimer('daylight')
         
-        print(f"\n🎯 ENHANCED Multi-Tier Matching Algorithm")
-        print(f"Total Participants: {len(participants_data)}")
-        print(f"Target Threshold: {threshold}%")
-        
-        all_tables = []
+        groups = []
         remaining_indices = list(range(len(participants_data)))
-        table_number = 1
         
-        # Calculate match matrix for ALL pairs once
-        match_matrix = {}
-        for i, p1 in enumerate(participants_data):
-            for j, p2 in enumerate(participants_data):
-                if i >= j:
-                    continue
-                score_data = self.calculate_match_score(p1['test'], p2['test'])
-                match_matrix[(i, j)] = score_data
+        # Calculate match matrix for ALL pairs once (vectorized, totals only);
+        # very large cohorts score only each participant's nearest candidates
+        report(tier='scoring', tables_formed=0, participants_remaining=len(remaining_indices))
+        tiers.start('scoring')
+        candidates = None
+        if len(participants_data) >= settings.DAYLIGHT_CANDIDATE_MIN_PARTICIPANTS:
+            match_matrix = DaylightMatchMatrix([p['test'] for p in participants_data], dense=False)
+            candidates = CandidateGraph(match_matrix, settings.DAYLIGHT_CANDIDATE_NEIGHBOURS)
+            tiers.pairs(candidates.scored_pairs)
+        else:
+            match_matrix = DaylightMatchMatrix([p['test'] for p in participants_data])
+            tiers.pairs(match_matrix.size * (match_matrix.size - 1) // 2)
+        
+        # Small cohorts: exact seating (best lowest table score) instead of
+        # the greedy tiers, unless it runs out of time
+        if candidates is None and len(participants_data) <= settings.DAYLIGHT_EXACT_MAX_PARTICIPANTS:
+            tiers.start('exact')
+            exact_groups = self._form_groups_exact(match_matrix, tiers.pairs)
+            if exact_groups is not None:
+                tiers.tables(len(exact_groups))
+                groups = exact_groups
+                remaining_indices = []
+                report(tier='exact', tables_formed=len(groups), participants_remaining=0)
         
         # TIER 1-2: Try multiple thresholds (70% -> 65% -> 60% -> 55% -> 50%)
         thresholds_to_try = [threshold, 65.0, 60.0, 55.0, 50.0]
@@ -453,363 +588,277 @@ class CRUDDaylightPersonality:
             if len(remaining_indices) < 3:
                 break
             
-            print(f"\n🔍 TIER {thresholds_to_try.index(current_threshold) + 1}: Threshold {current_threshold}%")
-            
-            tables_this_tier = self._form_groups_with_threshold(
-                db, session, participants_data, remaining_indices,
-                match_matrix, current_threshold, table_number
+            tiers.start(f"threshold_{current_threshold:g}")
+            candidates = self._refresh_candidates(candidates, match_matrix, remaining_indices, tiers.pairs)
+            groups_this_tier = self._form_groups_with_threshold(
+                remaining_indices, match_matrix, current_threshold, tiers.pairs, candidates
             )
+            tiers.tables(len(groups_this_tier))
             
-            # Update remaining and table number
-            for table in tables_this_tier:
-                all_tables.append(table)
-                table_number += 1
-                
-                # Remove matched users from remaining
-                for member_data in table.members_data:
-                    user_id = member_data['user_id']
-                    idx = next((i for i, p in enumerate(participants_data) if p['user_id'] == user_id), None)
-                    if idx is not None and idx in remaining_indices:
-                        remaining_indices.remove(idx)
-            
-            if tables_this_tier:
-                print(f"✅ Formed {len(tables_this_tier)} group(s) at {current_threshold}%")
+            # Update remaining
+            groups.extend(groups_this_tier)
+            remaining_indices = self._remove_seated(remaining_indices, groups_this_tier)
+            report(
+                tier=f"threshold_{current_threshold:g}",
+                tables_formed=len(groups),
+                participants_remaining=len(remaining_indices)
+            )
         
         # TIER 3: Try to form groups from remaining with ANY positive score
         if len(remaining_indices) >= 3:
-            print(f"\n🔍 TIER 3: Form groups with ANY positive compatibility")
-            print(f"Remaining users: {len(remaining_indices)}")
-            
-            tables_tier3 = self._form_groups_any_positive(
-                db, session, participants_data, remaining_indices,
-                match_matrix, table_number
+            tiers.start('any_positive')
+            candidates = self._refresh_candidates(candidates, match_matrix, remaining_indices, tiers.pairs)
+            groups_tier3 = self._form_groups_any_positive(
+                remaining_indices, match_matrix, tiers.pairs, candidates
             )
+            tiers.tables(len(groups_tier3))
             
-            for table in tables_tier3:
-                all_tables.append(table)
-                table_number += 1
-                
-                # Remove matched users
-                for member_data in table.members_data:
-                    user_id = member_data['user_id']
-                    idx = next((i for i, p in enumerate(participants_data) if p['user_id'] == user_id), None)
-                    if idx is not None and idx in remaining_indices:
-                        remaining_indices.remove(idx)
-            
-            if tables_tier3:
-                print(f"✅ Formed {len(tables_tier3)} group(s) with positive scores")
+            groups.extend(groups_tier3)
+            remaining_indices = self._remove_seated(remaining_indices, groups_tier3)
+            report(
+                tier='any_positive',
+                tables_formed=len(groups),
+                participants_remaining=len(remaining_indices)
+            )
         
         # TIER 4: FORCE group remaining users if still >= 3
         if len(remaining_indices) >= 3:
-            print(f"\n🔍 TIER 4: FORCE grouping remaining {len(remaining_indices)} user(s)")
-            
-            force_table = self._force_group_remaining(
-                db, session, participants_data, remaining_indices,
-                match_matrix, table_number
-            )
+            tiers.start('forced')
+            force_group = self._force_group_remaining(remaining_indices)
             
-            if force_table:
-                all_tables.append(force_table)
-                print(f"✅ Forced 1 group with {force_table.table_size} people")
+            if force_group:
+                tiers.tables(1)
+                groups.append(force_group)
+                remaining_indices = self._remove_seated(remaining_indices, [force_group])
+                report(
+                    tier='forced',
+                    tables_formed=len(groups),
+                    participants_remaining=len(remaining_indices)
+                )
         
-        print(f"\n✨ Final Result: {len(all_tables)} table(s) created")
-        print(f"📊 Matched: {sum(t.table_size for t in all_tables)} / {len(participants_data)} users")
+        # Revisit the seating: swaps / moves between tables within the CPU budget
+        if len(groups) >= 2 and settings.DAYLIGHT_REFINE_CPU_SECONDS > 0:
+            report(tier='refine', tables_formed=len(groups), participants_remaining=len(remaining_indices))
+            tiers.start('refine')
+            groups = self._refine_tables(groups, match_matrix, tiers.pairs)
+        
+        # Persist all tables and pairwise scores in one batch
+        report(tier='persisting', tables_formed=len(groups), participants_remaining=len(remaining_indices))
+        tiers.start('persisting')
+        tables = self._persist_tables(db, session, participants_data, groups)
+        tiers.pairs(sum(len(group) * (len(group) - 1) // 2 for group in groups))
+        tiers.stop()
+        session.timings = tiers.spans
+        
+        logger.info(
+            "Daylight session %s: %d table(s), %d/%d seated; %s",
+            session.id, len(tables), sum(t['table_size'] for t in tables), len(participants_data),
+            ", ".join(f"{span['phase']}={span['seconds']:.3f}s" for span in tiers.spans)
+        )
         
-        return all_tables
+        return tables
+    
+    def _remove_seated(
+        self,
+        remaining_indices: List[int],
+        groups: List[List[int]]
+    ) -> List[int]:
+        """Drop participants seated in `groups` from the remaining list"""
+        seated = {idx for group in groups for idx in group}
+        return [idx for idx in remaining_indices if idx not in seated]
+    
+    def _refresh_candidates(
+        self,
+        candidates: Optional[CandidateGraph],
+        match_matrix: DaylightMatchMatrix,
+        remaining_indices: List[int],
+        count_pairs: Optional[Callable[[int], None]] = None
+    ) -> Optional[CandidateGraph]:
+        """
+        Candidate graph over the participants still unseated - once a tier
+        seats someone's best partners they'd have no candidates left
+        """
+        if candidates is None or len(remaining_indices) == len(candidates.participants):
+            return candidates
+        
+        candidates = CandidateGraph(match_matrix, settings.DAYLIGHT_CANDIDATE_NEIGHBOURS, remaining_indices)
+        if count_pairs is not None:
+            count_pairs(candidates.scored_pairs)
+        return candidates
     
     def _form_groups_with_threshold(
         self,
-        db: Session,
-        session: DaylightMatchingSession,
-        participants_data: List[Dict],
         available_indices: List[int],
-        match_matrix: Dict,
+        match_matrix: DaylightMatchMatrix,
         threshold: float,
-        start_table_number: int
-    ) -> List[DaylightMatchingTable]:
+        count_pairs: Optional[Callable[[int], None]] = None,
+        candidates: Optional[CandidateGraph] = None
+    ) -> List[List[int]]:
         """Form groups with specific threshold"""
-        
-        tables = []
-        used_indices = set()
-        table_number = start_table_number
-        
-        while True:
-            current_available = [i for i in available_indices if i not in used_indices]
-            
-            if len(current_available) < 3:
-                break
-            
-            # Determine possible sizes (prefer 5 > 4 > 3)
-            possible_sizes = []
-            if len(current_available) >= 5:
-                possible_sizes = [5, 4, 3]
-            elif len(current_available) >= 4:
-                possible_sizes = [4, 3]
-            else:
-                possible_sizes = [3]
-            
-            best_group = None
-            best_score = -1
-            
-            # Try each size
-            for target_size in possible_sizes:
-                # Try multiple seed points
-                for seed_idx in current_available[:min(8, len(current_available))]:
-                    group = [seed_idx]
-                    candidates = [i for i in current_available if i != seed_idx]
-                    
-                    # Greedy add
-                    while len(group) < target_size and candidates:
-                        best_next = None
-                        best_next_score = -1
-                        
-                        for candidate in candidates:
-                            # Calculate average with current group
-                            scores = []
-                            for member in group:
-                                pair = tuple(sorted([member, candidate]))
-                                if pair in match_matrix:
-                                    scores.append(match_matrix[pair]['total_match_score'])
-                            
-                            if scores:
-                                avg = sum(scores) / len(scores)
-                                if avg >= threshold and avg > best_next_score:
-                                    best_next_score = avg
-                                    best_next = candidate
-                        
-                        if best_next is not None:
-                            group.append(best_next)
-                            candidates.remove(best_next)
-                        else:
-                            break
-                    
-                    # Validate group
-                    if len(group) >= 3:
-                        group_scores = []
-                        for i in range(len(group)):
-                            for j in range(i + 1, len(group)):
-                                pair = tuple(sorted([group[i], group[j]]))
-                                if pair in match_matrix:
-                                    group_scores.append(match_matrix[pair]['total_match_score'])
-                        
-                        if group_scores:
-                            avg_score = sum(group_scores) / len(group_scores)
-                            
-                            if avg_score >= threshold:
-                                # Prefer size 5, then 4, then 3
-                                size_bonus = (len(group) - 3) * 5
-                                weighted_score = avg_score + size_bonus
-                                
-                                if weighted_score > best_score:
-                                    best_score = avg_score
-                                    best_group = group
-            
-            # Create table if found
-            if best_group:
-                table = self._create_table(
-                    db, session, participants_data, best_group,
-                    match_matrix, table_number
-                )
-                tables.append(table)
-                table_number += 1
-                used_indices.update(best_group)
-            else:
-                break
-        
-        return tables
+        if candidates is not None:
+            return form_groups_on_graph(
+                candidates, available_indices, threshold,
+                inclusive=True, seed_count=8, size_bonus=5, count_pairs=count_pairs
+            )
+        return form_groups(
+            match_matrix.scores, available_indices, threshold,
+            inclusive=True, seed_count=8, size_bonus=5, count_pairs=count_pairs
+        )
     
     def _form_groups_any_positive(
         self,
-        db: Session,
-        session: DaylightMatchingSession,
-        participants_data: List[Dict],
         available_indices: List[int],
-        match_matrix: Dict,
-        start_table_number: int
-    ) -> List[DaylightMatchingTable]:
+        match_matrix: DaylightMatchMatrix,
+        count_pairs: Optional[Callable[[int], None]] = None,
+        candidates: Optional[CandidateGraph] = None
+    ) -> List[List[int]]:
         """Form groups with ANY positive compatibility (no threshold)"""
-        
-        tables = []
-        used_indices = set()
-        table_number = start_table_number
-        
-        while True:
-            current_available = [i for i in available_indices if i not in used_indices]
-            
-            if len(current_available) < 3:
-                break
-            
-            # Determine possible sizes
-            possible_sizes = []
-            if len(current_available) >= 5:
-                possible_sizes = [5, 4, 3]
-            elif len(current_available) >= 4:
-                possible_sizes = [4, 3]
-            else:
-                possible_sizes = [3]
-            
-            best_group = None
-            best_score = -1
-            
-            for target_size in possible_sizes:
-                for seed_idx in current_available[:min(10, len(current_available))]:
-                    group = [seed_idx]
-                    candidates = [i for i in current_available if i != seed_idx]
-                    
-                    while len(group) < target_size and candidates:
-                        best_next = None
-                        best_next_score = -1
-                        
-                        for candidate in candidates:
-                            scores = []
-                            for member in group:
-                                pair = tuple(sorted([member, candidate]))
-                                if pair in match_matrix:
-                                    scores.append(match_matrix[pair]['total_match_score'])
-                            
-                            if scores:
-                                avg = sum(scores) / len(scores)
-                                # Accept ANY positive score
-                                if avg > 0 and avg > best_next_score:
-                                    best_next_score = avg
-                                    best_next = candidate
-                        
-                        if best_next is not None:
-                            group.append(best_next)
-                            candidates.remove(best_next)
-                        else:
-                            break
-                    
-                    if len(group) >= 3:
-                        group_scores = []
-                        for i in range(len(group)):
-                            for j in range(i + 1, len(group)):
-                                pair = tuple(sorted([group[i], group[j]]))
-                                if pair in match_matrix:
-                                    group_scores.append(match_matrix[pair]['total_match_score'])
-                        
-                        if group_scores:
-                            avg_score = sum(group_scores) / len(group_scores)
-                            
-                            if avg_score > 0:  # ANY positive
-                                size_bonus = (len(group) - 3) * 3
-                                weighted_score = avg_score + size_bonus
-                                
-                                if weighted_score > best_score:
-                                    best_score = avg_score
-                                    best_group = group
-            
-            if best_group:
-                table = self._create_table(
-                    db, session, participants_data, best_group,
-                    match_matrix, table_number
-                )
-                tables.append(table)
-                table_number += 1
-                used_indices.update(best_group)
-            else:
-                break
-        
-        return tables
+        if candidates is not None:
+            return form_groups_on_graph(
+                candidates, available_indices, 0.0,
+                inclusive=False, seed_count=10, size_bonus=3, count_pairs=count_pairs
+            )
+        return form_groups(
+            match_matrix.scores, available_indices, 0.0,
+            inclusive=False, seed_count=10, size_bonus=3, count_pairs=count_pairs
+        )
     
     def _force_group_remaining(
         self,
-        db: Session,
-        session: DaylightMatchingSession,
-        participants_data: List[Dict],
-        remaining_indices: List[int],
-        match_matrix: Dict,
-        table_number: int
-    ) -> Optional[DaylightMatchingTable]:
+        remaining_indices: List[int]
+    ) -> Optional[List[int]]:
         """FORCE group remaining users regardless of compatibility"""
         
         if len(remaining_indices) < 3:
             return None
         
         # Take up to 5 remaining users
-        force_group = remaining_indices[:min(5, len(remaining_indices))]
-        
-        # Calculate average (even if low)
-        group_scores = []
-        for i in range(len(force_group)):
-            for j in range(i + 1, len(force_group)):
-                pair = tuple(sorted([force_group[i], force_group[j]]))
-                if pair in match_matrix:
-                    group_scores.append(match_matrix[pair]['total_match_score'])
-        
-        avg_score = sum(group_scores) / len(group_scores) if group_scores else 30.0
-        
-        return self._create_table(
-            db, session, participants_data, force_group,
-            match_matrix, table_number
+        return remaining_indices[:min(5, len(remaining_indices))]
+    
+    def _form_groups_exact(
+        self,
+        match_matrix: DaylightMatchMatrix,
+        count_pairs: Optional[Callable[[int], None]] = None
+    ) -> Optional[List[List[int]]]:
+        """Seat everyone at tables of 3-5 maximising the lowest table score (None if out of time)"""
+        return solve_max_min(
+            match_matrix.scores, settings.DAYLIGHT_EXACT_TIME_LIMIT,
+            count_pairs=count_pairs
         )
     
-    def _create_table(
+    def _refine_tables(
+        self,
+        groups: List[List[int]],
+        match_matrix: DaylightMatchMatrix,
+        count_pairs: Optional[Callable[[int], None]] = None
+    ) -> List[List[int]]:
+        """Improve the seating of all tiers with member swaps / moves between tables"""
+        if match_matrix.scores is not None:
+            return refine_groups(
+                match_matrix.scores, groups, settings.DAYLIGHT_REFINE_CPU_SECONDS,
+                count_pairs=count_pairs
+            )
+        
+        # No dense matrix: refine chunks of tables (weak and strong mixed) over
+        # their own scores, sharing the CPU budget
+        chunks = table_chunks(match_matrix, groups)
+        refined = list(groups)
+        for chunk in chunks:
+            indices = np.asarray([idx for g in chunk for idx in groups[g]], dtype=np.intp)
+            local = {int(idx): position for position, idx in enumerate(indices)}
+            scores = match_matrix.block(indices, indices)
+            np.fill_diagonal(scores, 0.0)
+            chunk_groups = refine_groups(
+                scores, [[local[idx] for idx in groups[g]] for g in chunk],
+                settings.DAYLIGHT_REFINE_CPU_SECONDS / len(chunks),
+                count_pairs=count_pairs
+            )
+            for g, group in zip(chunk, chunk_groups):
+                refined[g] = [int(indices[idx]) for idx in group]
+        return refined
+    
+    def _persist_tables(
         self,
         db: Session,
         session: DaylightMatchingSession,
         participants_data: List[Dict],
-        group_indices: List[int],
-        match_matrix: Dict,
-        table_number: int
-    ) -> DaylightMatchingTable:
-        """Create a matching table and save scores"""
-        
-        # Prepare members data
-        members_data = []
-        for idx in group_indices:
-            p = participants_data[idx]
-            user = db.query(User).filter(User.id == p['user_id']).first()
-            members_data.append({
-                'user_id': p['user_id'],
-                'username': user.username if user else '',
-                'full_name': user.full_name if user else '',
-                'archetype': p['test'].archetype,
-                'archetype_symbol': p['test'].archetype_symbol,
-                'profile_score': p['test'].profile_score
+        groups: List[List[int]]
+    ) -> List[Dict]:
+        """
+        Write all tables and their pairwise scores for a finished run
+        
+        One executemany for tables, one SELECT to read back their IDs by
+        table_number, one executemany for scores - all in the caller's
+        transaction. Returns the table rows that were inserted.
+        """
+        if not groups:
+            return []
+        
+        seated_user_ids = {participants_data[idx]['user_id'] for group in groups for idx in group}
+        users = {
+            u.id: u for u in db.query(User).filter(User.id.in_(seated_user_ids)).all()
+        }
+        
+        table_rows = []
+        score_rows_by_table = {}
+        
+        for table_number, group_indices in enumerate(groups, start=1):
+            # Prepare members data
+            members_data = []
+            for idx in group_indices:
+                p = participants_data[idx]
+                user = users.get(p['user_id'])
+                members_data.append({
+                    'user_id': p['user_id'],
+                    'username': user.username if user else '',
+                    'full_name': user.full_name if user else '',
+                    'archetype': p['test'].archetype,
+                    'archetype_symbol': p['test'].archetype_symbol,
+                    'profile_score': p['test'].profile_score
+                })
+            
+            # Full score breakdown - only built for pairs seated together
+            score_rows = []
+            for i in range(len(group_indices)):
+                for j in range(i + 1, len(group_indices)):
+                    p1 = participants_data[group_indices[i]]
+                    p2 = participants_data[group_indices[j]]
+                    score_rows.append({
+                        'user1_id': p1['user_id'],
+                        'user2_id': p2['user_id'],
+                        **self.calculate_match_score(p1['test'], p2['test'])
+                    })
+            
+            # Calculate average score
+            group_scores = [row['total_match_score'] for row in score_rows]
+            avg_score = sum(group_scores) / len(group_scores) if group_scores else 30.0
+            
+            table_rows.append({
+                'session_id': session.id,
+                'table_number': table_number,
+                'table_size': len(group_indices),
+                'average_match_score': avg_score,
+                'members_data': members_data
             })
+            score_rows_by_table[table_number] = score_rows
+        
+        db.execute(insert(DaylightMatchingTable), table_rows)
         
-        # Calculate average score
-        group_scores = []
-        for i in range(len(group_indices)):
-            for j in range(i + 1, len(group_indices)):
-                pair = tuple(sorted([group_indices[i], group_indices[j]]))
-                if pair in match_matrix:
-                    group_scores.append(match_matrix[pair]['total_match_score'])
-        
-        avg_score = sum(group_scores) / len(group_scores) if group_scores else 30.0
-        
-        # Create table
-        table = DaylightMatchingTable(
-            session_id=session.id,
-            table_number=table_number,
-            table_size=len(group_indices),
-            average_match_score=avg_score,
-            members_data=members_data
+        table_ids = dict(
+            db.query(DaylightMatchingTable.table_number, DaylightMatchingTable.id).filter(
+                DaylightMatchingTable.session_id == session.id
+            ).all()
         )
-        db.add(table)
-        db.flush()
         
-        # Save pairwise scores
-        for i in range(len(group_indices)):
-            for j in range(i + 1, len(group_indices)):
-                idx1, idx2 = group_indices[i], group_indices[j]
-                p1 = participants_data[idx1]
-                p2 = participants_data[idx2]
-                
-                pair = tuple(sorted([idx1, idx2]))
-                if pair in match_matrix:
-                    score_data = match_matrix[pair]
-                    
-                    score = DaylightMatchingScore(
-                        table_id=table.id,
-                        user1_id=p1['user_id'],
-                        user2_id=p2['user_id'],
-                        **score_data
-                    )
-                    db.add(score)
-        
-        return table
+        score_rows = [
+            {'table_id': table_ids[table_number], **row}
+            for table_number, rows in score_rows_by_table.items()
+            for row in rows
+        ]
+        if score_rows:
+            db.execute(insert(DaylightMatchingScore), score_rows)
+        
+        return table_rows
     
     def get_matching_session(
         self, 
@@ -821,6 +870,175 @@ class CRUDDaylightPersonality:
             DaylightMatchingSession.id == session_id
         ).first()
     
+    def mark_session_failed(
+        self,
+        db: Session,
+        session_id: int,
+        error: Optional[str] = None
+    ) -> Optional[DaylightMatchingSession]:
+        """Mark a session as failed and drop any tables a crashed run left behind"""
+        session = self.get_matching_session(db, session_id)
+        if not session:
+            return None
+        
+        db.query(DaylightMatchingTable).filter(
+            DaylightMatchingTable.session_id == session_id
+        ).delete(synchronize_session=False)
+        
+        session.status = 'failed'
+        session.total_tables = 0
+        session.average_match_score = None
+        session.progress = {'tier': 'failed', 'error': error} if error else {'tier': 'failed'}
+        db.commit()
+        db.refresh(session)
+        return session
+    
+    def fail_interrupted_sessions(self, db: Session, error: str) -> List[int]:
+        """Mark every 'pending' / 'processing' session failed (no job will finish them)"""
+        session_ids = [
+            session_id for (session_id,) in db.query(DaylightMatchingSession.id).filter(
+                DaylightMatchingSession.status.in_(('pending', 'processing'))
+            ).all()
+        ]
+        for session_id in session_ids:
+            self.mark_session_failed(db, session_id, error)
+        return session_ids
+    
+    def build_session_result(
+        self,
+        db: Session,
+        session: DaylightMatchingSession
+    ) -> MatchingSessionResult:
+        """
+        Build detailed matching session result
+        
+        Uses a constant number of queries regardless of session size:
+        participants (+ tests), tables, scores, and one IN (...) for users.
+        """
+        participants = db.query(DaylightMatchingParticipant).options(
+            joinedload(DaylightMatchingParticipant.personality_test)
+        ).filter(
+            DaylightMatchingParticipant.session_id == session.id
+        ).order_by(DaylightMatchingParticipant.id).all()
+        
+        tables = db.query(DaylightMatchingTable).filter(
+            DaylightMatchingTable.session_id == session.id
+        ).order_by(DaylightMatchingTable.table_number).all()
+        
+        scores_by_table: Dict[int, List[DaylightMatchingScore]] = {}
+        if tables:
+            scores = db.query(DaylightMatchingScore).filter(
+                DaylightMatchingScore.table_id.in_([t.id for t in tables])
+            ).order_by(DaylightMatchingScore.id).all()
+            for score in scores:
+                scores_by_table.setdefault(score.table_id, []).append(score)
+        
+        user_ids = {session.created_by}
+        user_ids.update(p.user_id for p in participants)
+        for table_scores in scores_by_table.values():
+            for score in table_scores:
+                user_ids.update((score.user1_id, score.user2_id))
+        users = {
+            u.id: u for u in db.query(User).filter(User.id.in_(user_ids)).all()
+        }
+        
+        def display_name(user_id: int) -> str:
+            user = users.get(user_id)
+            return (user.full_name or user.username) if user else f"User {user_id}"
+        
+        # Get all participants
+        all_participants = []
+        for participant in participants:
+            user = users.get(participant.user_id)
+            test = participant.personality_test
+            
+            all_participants.append(MatchingParticipant(
+                user_id=participant.user_id,
+                username=user.username if user else '',
+                full_name=user.full_name if user else None,
+                archetype=test.archetype,
+                archetype_symbol=test.archetype_symbol,
+                profile_score=test.profile_score
+            ))
+        
+        formatted_tables = []
+        size_distribution = {}
+        matched_user_ids = set()
+        
+        for table in tables:
+            # Track size distribution
+            size_distribution[table.table_size] = size_distribution.get(table.table_size, 0) + 1
+            
+            # Get members
+            members = []
+            for member_data in table.members_data:
+                matched_user_ids.add(member_data['user_id'])
+                members.append(MatchingParticipant(
+                    user_id=member_data['user_id'],
+                    username=member_data.get('username', ''),
+                    full_name=member_data.get('full_name', ''),
+                    archetype=member_data['archetype'],
+                    archetype_symbol=member_data['archetype_symbol'],
+                    profile_score=member_data['profile_score']
+                ))
+            
+            pairwise_scores = [
+                MatchScoreDetail(
+                    user1_id=score.user1_id,
+                    user1_name=display_name(score.user1_id),
+                    user2_id=score.user2_id,
+                    user2_name=display_name(score.user2_id),
+                    e_diff=score.e_diff,
+                    o_diff=score.o_diff,
+                    s_diff=score.s_diff,
+                    a_diff=score.a_diff,
+                    trait_similarity=score.trait_similarity,
+                    lifestyle_bonus=score.lifestyle_bonus,
+                    comfort_bonus=score.comfort_bonus,
+                    serendipity_bonus=score.serendipity_bonus,
+                    total_match_score=score.total_match_score,
+                    meets_threshold=score.meets_threshold
+                )
+                for score in scores_by_table.get(table.id, [])
+            ]
+            
+            formatted_tables.append(MatchingTableResult(
+                table_number=table.table_number,
+                table_size=table.table_size,
+                average_match_score=table.average_match_score,
+                members=members,
+                pairwise_scores=pairwise_scores
+            ))
+        
+        # Get unmatched participants
+        unmatched_participants = [
+            p for p in all_participants if p.user_id not in matched_user_ids
+        ]
+        
+        # Determine most used size
+        optimal_size_used = max(size_distribution, key=size_distribution.get) if size_distribution else 5
+        
+        creator = users.get(session.created_by)
+        
+        return MatchingSessionResult(
+            id=session.id,
+            session_name=session.session_name,
+            created_by=session.created_by,
+            creator_name=creator.username if creator else "Unknown",
+            status=session.status,
+            total_participants=session.total_participants,
+            total_tables=session.total_tables,
+            average_match_score=session.average_match_score,
+            min_match_threshold=session.min_match_threshold,
+            tables=formatted_tables,
+            unmatched_participants=unmatched_participants,
+            created_at=session.created_at,
+            completed_at=session.completed_at,
+            optimal_size_used=optimal_size_used,
+            size_distribution=size_distribution,
+            timings=session.timings
+        )
+    
     def get_all_matching_sessions(
         self, 
         db: Session, 
@@ -1,11 +1,35 @@
-from typing import List, Optional, Tuple
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Hashable, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func, select, case
-from app.models.event import WordPressPost, WooCommerceOrderItem, WooCommerceOrder
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from app.core.config import settings
+from app.models.event import WordPressPost, WooCommerceOrderItem, WooCommerceOrderItemMeta, WooCommerceOrder
+from app.models.event_buyer import EventBuyerOrder, EventBuyerSync
 from app.models.user import WordPressUser
 from app.models.personality_test import TQBUser
+from app.crud.search_index import search_index
+from app.utils.cache import SingleFlightCache
+from app.utils.pagination import paginate_keyset, cached_count
+
+logger = logging.getLogger(__name__)
+
+# Order statuses that count as a ticket purchase
+PAID_ORDER_STATUSES = ('wc-processing', 'wc-completed')
+
+# Product rows, product list pages and buyer lists read from WordPress.
+# Emptied whenever the products' (max post_modified, count) changes, which
+# is checked at most every EVENT_CACHE_REVALIDATE_SECONDS.
+catalog_cache = SingleFlightCache(maxsize=settings.EVENT_CACHE_SIZE, ttl=settings.EVENT_CACHE_TTL)
+catalog_version = SingleFlightCache(maxsize=1, ttl=settings.EVENT_CACHE_REVALIDATE_SECONDS)
 
 class CRUDEvent:
+    def __init__(self):
+        # Catalog version the cache contents belong to
+        self._seen_catalog_version = None
+    
     def get_events(
         self,
         db: Session,
@@ -14,11 +38,138 @@ class CRUDEvent:
         search: Optional[str] = None,
         sort_by: str = "post_date",
         sort_order: str = "desc",
-        post_status: Optional[str] = None
+        post_status: Optional[str] = None,
+        local_db: Optional[Session] = None
     ) -> Tuple[List[WordPressPost], int]:
         """
         Get products (events) with pagination and search
         """
+        return self._cached(
+            db, ('events', skip, limit, search, sort_by, sort_order, post_status),
+            lambda: self._load_events(
+                db, skip, limit, search, sort_by, sort_order, post_status,
+                self._search_ids(search, local_db)
+            )
+        )
+    
+    async def get_events_async(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 10,
+        search: Optional[str] = None,
+        sort_by: str = "post_date",
+        sort_order: str = "desc",
+        post_status: Optional[str] = None,
+        local_db: Optional[AsyncSession] = None
+    ) -> Tuple[List[WordPressPost], int]:
+        """get_events() for async handlers"""
+        async def load():
+            search_ids = await self._search_ids_async(search, local_db)
+            return await db.run_sync(
+                self._load_events, skip, limit, search, sort_by, sort_order, post_status, search_ids
+            )
+        
+        return await self._cached_async(
+            db, ('events', skip, limit, search, sort_by, sort_order, post_status), load
+        )
+    
+    def get_events_keyset(
+        self,
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+        search: Optional[str] = None,
+        sort_by: str = "post_date",
+        sort_order: str = "desc",
+        post_status: Optional[str] = None,
+        local_db: Optional[Session] = None
+    ) -> Tuple[List[WordPressPost], Optional[str]]:
+        """
+        Get products (events) with cursor pagination, keyed on (sort_by, ID)
+        Returns tuple of (events, next_cursor)
+        """
+        return self._cached(
+            db, ('events_keyset', cursor, limit, search, sort_by, sort_order, post_status),
+            lambda: self._load_events_keyset(
+                db, cursor, limit, search, sort_by, sort_order, post_status,
+                self._search_ids(search, local_db)
+            )
+        )
+    
+    async def get_events_keyset_async(
+        self,
+        db: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+        search: Optional[str] = None,
+        sort_by: str = "post_date",
+        sort_order: str = "desc",
+        post_status: Optional[str] = None,
+        local_db: Optional[AsyncSession] = None
+    ) -> Tuple[List[WordPressPost], Optional[str]]:
+        """get_events_keyset() for async handlers"""
+        async def load():
+            search_ids = await self._search_ids_async(search, local_db)
+            return await db.run_sync(
+                self._load_events_keyset, cursor, limit, search, sort_by, sort_order, post_status, search_ids
+            )
+        
+        return await self._cached_async(
+            db, ('events_keyset', cursor, limit, search, sort_by, sort_order, post_status), load
+        )
+    
+    def count_events(
+        self,
+        db: Session,
+        search: Optional[str] = None,
+        post_status: Optional[str] = None,
+        local_db: Optional[Session] = None
+    ) -> int:
+        """Total products matching the filters (cached for COUNT_CACHE_TTL seconds)"""
+        return self._count_events(db, search, post_status, self._search_ids(search, local_db))
+    
+    async def count_events_async(
+        self,
+        db: AsyncSession,
+        search: Optional[str] = None,
+        post_status: Optional[str] = None,
+        local_db: Optional[AsyncSession] = None
+    ) -> int:
+        """count_events() for async handlers"""
+        search_ids = await self._search_ids_async(search, local_db)
+        return await db.run_sync(self._count_events, search, post_status, search_ids)
+    
+    def _count_events(
+        self,
+        db: Session,
+        search: Optional[str],
+        post_status: Optional[str],
+        search_ids: Optional[List[int]]
+    ) -> int:
+        return cached_count(
+            ("events", search, post_status),
+            lambda: self._filtered_query(db, search, post_status, search_ids)
+        )
+    
+    def _search_ids(self, search: Optional[str], local_db: Optional[Session]) -> Optional[List[int]]:
+        """Product IDs matching `search` from the local mirror (None: filter WordPress directly)"""
+        if not search or local_db is None:
+            return None
+        return search_index.search_event_ids(local_db, search)
+    
+    async def _search_ids_async(self, search: Optional[str], local_db: Optional[AsyncSession]) -> Optional[List[int]]:
+        if not search or local_db is None:
+            return None
+        return await local_db.run_sync(search_index.search_event_ids, search)
+    
+    def _filtered_query(
+        self,
+        db: Session,
+        search: Optional[str] = None,
+        post_status: Optional[str] = None,
+        search_ids: Optional[List[int]] = None
+    ):
         # Base query - hanya filter post_type = product
         query = db.query(WordPressPost).filter(
             WordPressPost.post_type == 'product'
@@ -34,8 +185,10 @@ class CRUDEvent:
                 else:
                     query = query.filter(WordPressPost.post_status.in_(statuses))
         
-        # Search filter
-        if search:
+        # Search filter - IDs from the local full-text mirror once it is built
+        if search and search_ids is not None:
+            query = query.filter(WordPressPost.ID.in_(search_ids))
+        elif search:
             search_filter = or_(
                 WordPressPost.post_title.ilike(f"%{search}%"),
                 WordPressPost.post_content.ilike(f"%{search}%"),
@@ -43,8 +196,107 @@ class CRUDEvent:
             )
             query = query.filter(search_filter)
         
+        return query
+    
+    def get_event_by_id(self, db: Session, event_id: int) -> Optional[WordPressPost]:
+        """
+        Get single event by ID (served from the catalog cache)
+        """
+        return self._cached(db, ('event', event_id), lambda: self._load_event(db, event_id))
+    
+    async def get_event_by_id_async(self, db: AsyncSession, event_id: int) -> Optional[WordPressPost]:
+        """get_event_by_id() for async handlers"""
+        return await self._cached_async(
+            db, ('event', event_id), lambda: db.run_sync(self._load_event, event_id)
+        )
+    
+    def get_event_buyers(
+        self,
+        db: Session,
+        event_id: int,
+        local_db: Optional[Session] = None,
+        refresh: bool = False
+    ) -> List[dict]:
+        """
+        Get buyers for specific event with personality test status
+        
+        With `local_db`, buyers are read from the local event_buyer_orders copy
+        after an incremental sync (`refresh=True` forces the sync even if it
+        ran recently and bypasses the cache; its errors propagate). A failed
+        sync on a plain read is logged and WordPress is queried instead, as
+        it is without `local_db`. Cached for EVENT_BUYERS_CACHE_TTL seconds.
+        """
+        key = ('buyers', event_id, local_db is not None)
+        if refresh:
+            buyers = self._load_event_buyers(db, event_id, local_db, refresh)
+            catalog_cache.set(key, buyers, ttl=settings.EVENT_BUYERS_CACHE_TTL)
+            return buyers
+        
+        return self._cached(
+            db, key, lambda: self._load_event_buyers(db, event_id, local_db),
+            ttl=settings.EVENT_BUYERS_CACHE_TTL
+        )
+    
+    async def get_event_buyers_async(
+        self,
+        db: AsyncSession,
+        event_id: int,
+        local_db: Optional[AsyncSession] = None
+    ) -> List[dict]:
+        """get_event_buyers() for async handlers"""
+        return await self._cached_async(
+            db, ('buyers', event_id, local_db is not None),
+            lambda: self._load_event_buyers_async(db, event_id, local_db),
+            ttl=settings.EVENT_BUYERS_CACHE_TTL
+        )
+    
+    def _cached(self, db: Session, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Read `key` through the catalog cache after checking the catalog hasn't changed"""
+        self._check_catalog_version(
+            catalog_version.get_or_load('products', lambda: self._catalog_version(db))
+        )
+        return catalog_cache.get_or_load(key, loader, ttl)
+    
+    async def _cached_async(
+        self,
+        db: AsyncSession,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        self._check_catalog_version(
+            await catalog_version.get_or_load_async('products', lambda: db.run_sync(self._catalog_version))
+        )
+        return await catalog_cache.get_or_load_async(key, loader, ttl)
+    
+    def _check_catalog_version(self, version: tuple) -> None:
+        # A product was added, edited, trashed or deleted since the cache filled
+        if version != self._seen_catalog_version:
+            catalog_cache.clear()
+            self._seen_catalog_version = version
+    
+    def _catalog_version(self, db: Session) -> tuple:
+        return tuple(
+            db.query(func.max(WordPressPost.post_modified), func.count(WordPressPost.ID)).filter(
+                WordPressPost.post_type == 'product'
+            ).one()
+        )
+    
+    def _load_events(
+        self,
+        db: Session,
+        skip: int,
+        limit: int,
+        search: Optional[str],
+        sort_by: str,
+        sort_order: str,
+        post_status: Optional[str],
+        search_ids: Optional[List[int]]
+    ) -> Tuple[List[WordPressPost], int]:
+        query = self._filtered_query(db, search, post_status, search_ids)
+        
         # Count total
-        total_count = query.count()
+        total_count = self._count_events(db, search, post_status, search_ids)
         
         # Sorting
         if hasattr(WordPressPost, sort_by):
@@ -57,46 +309,323 @@ class CRUDEvent:
         # Pagination
         events = query.offset(skip).limit(limit).all()
         
-        return events, total_count
+        return self._detach(db, events), total_count
     
-    def get_event_by_id(self, db: Session, event_id: int) -> Optional[WordPressPost]:
-        """
-        Get single event by ID
-        """
-        return db.query(WordPressPost).filter(
+    def _load_events_keyset(
+        self,
+        db: Session,
+        cursor: Optional[str],
+        limit: int,
+        search: Optional[str],
+        sort_by: str,
+        sort_order: str,
+        post_status: Optional[str],
+        search_ids: Optional[List[int]]
+    ) -> Tuple[List[WordPressPost], Optional[str]]:
+        query = self._filtered_query(db, search, post_status, search_ids)
+        if not hasattr(WordPressPost, sort_by):
+            sort_by = "post_date"
+        
+        events, next_cursor = paginate_keyset(
+            query, getattr(WordPressPost, sort_by), WordPressPost.ID,
+            sort_by, sort_order, limit, cursor
+        )
+        return self._detach(db, events), next_cursor
+    
+    def _load_event(self, db: Session, event_id: int) -> Optional[WordPressPost]:
+        db_event = db.query(WordPressPost).filter(
             and_(
                 WordPressPost.ID == event_id,
                 WordPressPost.post_type == 'product'
             )
         ).first()
+        if db_event is not None:
+            self._detach(db, [db_event])
+        return db_event
     
-    def get_event_buyers(
+    def _detach(self, db: Session, posts: List[WordPressPost]) -> List[WordPressPost]:
+        # Cached rows are shared between requests; detached, a later
+        # commit/expire in the loading session can't unload their attributes
+        for post in posts:
+            db.expunge(post)
+        return posts
+    
+    def _load_event_buyers(
         self,
         db: Session,
-        event_id: int
+        event_id: int,
+        local_db: Optional[Session] = None,
+        refresh: bool = False
     ) -> List[dict]:
-        """
-        Get buyers for specific event with personality test status
-        """
         # First, get the event
         event = self.get_event_by_id(db, event_id)
         if not event:
             return []
         
-        # Create subquery to check if user has completed personality test
-        has_test_subquery = (
-            select(TQBUser.id)
-            .where(
-                and_(
-                    TQBUser.wp_user_id == WordPressUser.ID,
-                    TQBUser.completed_quiz == True,
-                    TQBUser.wp_user_id != 0
-                )
+        if local_db is not None and not refresh and not self._sync_for_read(local_db, db, event_id):
+            local_db = None
+        
+        if local_db is not None:
+            if refresh:
+                self.sync_event_buyers(local_db, db, event_id, force=True)
+            buyers = self._stored_buyers(local_db, event_id)
+        else:
+            buyers = self._query_event_orders(db, event_id, statuses=PAID_ORDER_STATUSES)
+        
+        return self._buyer_dicts(db, buyers)
+    
+    async def _load_event_buyers_async(
+        self,
+        db: AsyncSession,
+        event_id: int,
+        local_db: Optional[AsyncSession]
+    ) -> List[dict]:
+        """_load_event_buyers() with each session driven by its own run_sync"""
+        event = await self.get_event_by_id_async(db, event_id)
+        if not event:
+            return []
+        
+        if local_db is not None:
+            try:
+                await self.sync_event_buyers_async(local_db, db, event_id)
+            except SQLAlchemyError:
+                logger.warning("Syncing buyers of event %s failed, reading WordPress", event_id, exc_info=True)
+                await local_db.rollback()
+                local_db = None
+        
+        if local_db is not None:
+            buyers = await local_db.run_sync(self._stored_buyers, event_id)
+        else:
+            buyers = await db.run_sync(self._query_event_orders, event_id, PAID_ORDER_STATUSES)
+        
+        return await db.run_sync(self._buyer_dicts, buyers)
+    
+    def _stored_buyers(self, local_db: Session, event_id: int) -> List[EventBuyerOrder]:
+        return local_db.query(EventBuyerOrder).filter(
+            and_(
+                EventBuyerOrder.event_id == event_id,
+                EventBuyerOrder.order_status.in_(PAID_ORDER_STATUSES)
+            )
+        ).order_by(EventBuyerOrder.order_id, EventBuyerOrder.user_id).all()
+    
+    def _buyer_dicts(self, db: Session, buyers: list) -> List[dict]:
+        # Users who have completed personality test (one query for all buyers)
+        tested_user_ids = self._users_with_completed_test(db, {b.user_id for b in buyers})
+        
+        # Convert to list of dicts
+        result = []
+        for buyer in buyers:
+            result.append({
+                'user_id': buyer.user_id,
+                'user_login': buyer.user_login,
+                'user_email': buyer.user_email,
+                'display_name': buyer.display_name or buyer.user_login,
+                'order_id': buyer.order_id,
+                'order_status': buyer.order_status,
+                'total_amount': float(buyer.total_amount) if buyer.total_amount else None,
+                'payment_method_title': buyer.payment_method_title,
+                'date_created': buyer.date_created_gmt,
+                'has_personality_test': buyer.user_id in tested_user_ids
+            })
+        
+        return result
+    
+    def sync_event_buyers(
+        self,
+        local_db: Session,
+        wp_db: Session,
+        event_id: int,
+        force: bool = False
+    ) -> EventBuyerSync:
+        """
+        Incrementally refresh the local copy of an event's orders
+        
+        Only orders created at/after the stored date_created_gmt watermark are
+        pulled from WordPress; statuses of orders already copied are then
+        revalidated by primary key so payments, cancellations and refunds show
+        up. Skipped if the last sync is younger than EVENT_BUYERS_SYNC_INTERVAL
+        unless `force` is set.
+        
+        When two syncs of an event race (first sync state or the same new
+        orders inserted twice), the loser rolls back and syncs again against
+        the winner's rows.
+        """
+        try:
+            return self._sync_event_buyers(local_db, wp_db, event_id, force)
+        except IntegrityError:
+            local_db.rollback()
+        return self._sync_event_buyers(local_db, wp_db, event_id, force)
+    
+    def _sync_for_read(self, local_db: Session, wp_db: Session, event_id: int) -> bool:
+        """Best-effort sync before a read; False if the local copy can't be used"""
+        try:
+            self.sync_event_buyers(local_db, wp_db, event_id)
+            return True
+        except SQLAlchemyError:
+            logger.warning("Syncing buyers of event %s failed, reading WordPress", event_id, exc_info=True)
+            local_db.rollback()
+            return False
+    
+    async def sync_event_buyers_async(
+        self,
+        local_db: AsyncSession,
+        wp_db: AsyncSession,
+        event_id: int,
+        force: bool = False
+    ) -> None:
+        """sync_event_buyers() for async handlers: local and WordPress steps run on their own sessions"""
+        try:
+            await self._sync_event_buyers_async(local_db, wp_db, event_id, force)
+        except IntegrityError:
+            await local_db.rollback()
+            await self._sync_event_buyers_async(local_db, wp_db, event_id, force)
+    
+    def _sync_event_buyers(
+        self,
+        local_db: Session,
+        wp_db: Session,
+        event_id: int,
+        force: bool
+    ) -> EventBuyerSync:
+        pending = self._pending_buyer_sync(local_db, event_id, force)
+        if pending is None:
+            return local_db.get(EventBuyerSync, event_id)
+        
+        synced_at, since, stored_ids = pending
+        new_orders, statuses = self._fetch_order_changes(wp_db, event_id, since, stored_ids)
+        return self._apply_order_changes(local_db, event_id, new_orders, statuses, synced_at)
+    
+    async def _sync_event_buyers_async(
+        self,
+        local_db: AsyncSession,
+        wp_db: AsyncSession,
+        event_id: int,
+        force: bool
+    ) -> None:
+        pending = await local_db.run_sync(self._pending_buyer_sync, event_id, force)
+        if pending is None:
+            return
+        
+        synced_at, since, stored_ids = pending
+        new_orders, statuses = await wp_db.run_sync(self._fetch_order_changes, event_id, since, stored_ids)
+        await local_db.run_sync(self._apply_order_changes, event_id, new_orders, statuses, synced_at)
+    
+    def _pending_buyer_sync(
+        self,
+        local_db: Session,
+        event_id: int,
+        force: bool
+    ) -> Optional[Tuple[datetime, Optional[datetime], List[int]]]:
+        """(sync time, watermark, copied order IDs), or None if the copy is fresh enough"""
+        now = datetime.utcnow()
+        state = local_db.get(EventBuyerSync, event_id)
+        if (
+            state is not None and not force and state.synced_at is not None
+            and now - state.synced_at < timedelta(seconds=settings.EVENT_BUYERS_SYNC_INTERVAL)
+        ):
+            return None
+        
+        stored_ids = [
+            order_id for (order_id,) in local_db.query(EventBuyerOrder.order_id).filter(
+                EventBuyerOrder.event_id == event_id
+            ).all()
+        ]
+        return now, state.last_order_created_gmt if state is not None else None, stored_ids
+    
+    def _fetch_order_changes(
+        self,
+        wp_db: Session,
+        event_id: int,
+        since: Optional[datetime],
+        stored_ids: List[int]
+    ) -> Tuple[list, dict]:
+        """Orders created since the watermark, and current statuses of the other copied orders"""
+        # >= so orders sharing the watermark second aren't missed
+        new_orders = self._query_event_orders(wp_db, event_id, since=since)
+        
+        fetched_ids = {order.order_id for order in new_orders}
+        stale_ids = [order_id for order_id in stored_ids if order_id not in fetched_ids]
+        statuses = {}
+        if stale_ids:
+            statuses = dict(
+                wp_db.query(WooCommerceOrder.id, WooCommerceOrder.status).filter(
+                    WooCommerceOrder.id.in_(stale_ids)
+                ).all()
+            )
+        # Orders missing from WordPress were deleted
+        return new_orders, {order_id: statuses.get(order_id) for order_id in stale_ids}
+    
+    def _apply_order_changes(
+        self,
+        local_db: Session,
+        event_id: int,
+        new_orders: list,
+        statuses: dict,
+        synced_at: datetime
+    ) -> EventBuyerSync:
+        """Write fetched orders and statuses into the local copy and move the watermark"""
+        state = local_db.get(EventBuyerSync, event_id)
+        if state is None:
+            state = EventBuyerSync(event_id=event_id)
+            local_db.add(state)
+        
+        stored = {
+            row.order_id: row for row in local_db.query(EventBuyerOrder).filter(
+                EventBuyerOrder.event_id == event_id
+            ).all()
+        }
+        
+        watermark = state.last_order_created_gmt
+        for order in new_orders:
+            row = stored.get(order.order_id)
+            if row is None:
+                row = stored[order.order_id] = EventBuyerOrder(event_id=event_id, order_id=order.order_id)
+                local_db.add(row)
+            
+            row.user_id = order.user_id
+            row.user_login = order.user_login
+            row.user_email = order.user_email
+            row.display_name = order.display_name
+            row.order_status = order.order_status
+            row.total_amount = order.total_amount
+            row.payment_method_title = order.payment_method_title
+            row.date_created_gmt = order.date_created_gmt
+            
+            if order.date_created_gmt and (watermark is None or order.date_created_gmt > watermark):
+                watermark = order.date_created_gmt
+        
+        # Revalidated statuses of older orders
+        for order_id, status in statuses.items():
+            row = stored.get(order_id)
+            if row is not None and row.order_status != status:
+                row.order_status = status
+        
+        state.last_order_created_gmt = watermark
+        state.synced_at = synced_at
+        local_db.commit()
+        
+        return state
+    
+    def _query_event_orders(
+        self,
+        db: Session,
+        event_id: int,
+        statuses: Optional[Tuple[str, ...]] = None,
+        since: Optional[datetime] = None
+    ) -> list:
+        """
+        Orders (with their customer) containing the event product
+        
+        Line items are matched through the indexed `_product_id` item meta
+        instead of comparing order_item_name against the post title.
+        """
+        product_items = db.query(WooCommerceOrderItemMeta.order_item_id).filter(
+            and_(
+                WooCommerceOrderItemMeta.meta_key == '_product_id',
+                WooCommerceOrderItemMeta.meta_value == str(event_id)
             )
-            .exists()
         )
         
-        # Query to join all tables and get buyers
         query = db.query(
             WordPressUser.ID.label('user_id'),
             WordPressUser.user_login,
@@ -106,43 +635,40 @@ class CRUDEvent:
             WooCommerceOrder.status.label('order_status'),
             WooCommerceOrder.total_amount,
             WooCommerceOrder.payment_method_title,
-            WooCommerceOrder.date_created_gmt.label('date_created'),
-            # Check if user has completed personality test
-            has_test_subquery.label('has_personality_test')
+            WooCommerceOrder.date_created_gmt
         ).join(
             WooCommerceOrder,
             WordPressUser.ID == WooCommerceOrder.customer_id
-        ).join(
-            WooCommerceOrderItem,
-            WooCommerceOrder.id == WooCommerceOrderItem.order_id
         ).filter(
-            and_(
-                WooCommerceOrderItem.order_item_name == event.post_title,
-                or_(
-                    WooCommerceOrder.status == 'wc-processing',
-                    WooCommerceOrder.status == 'wc-completed'
+            WooCommerceOrder.id.in_(
+                db.query(WooCommerceOrderItem.order_id).filter(
+                    and_(
+                        WooCommerceOrderItem.order_item_type == 'line_item',
+                        WooCommerceOrderItem.order_item_id.in_(product_items)
+                    )
                 )
             )
-        ).distinct()
+        )
         
-        buyers = query.all()
+        if statuses:
+            query = query.filter(WooCommerceOrder.status.in_(statuses))
+        if since is not None:
+            query = query.filter(WooCommerceOrder.date_created_gmt >= since)
         
-        # Convert to list of dicts
-        result = []
-        for buyer in buyers:
-            result.append({
-                'user_id': buyer.user_id,
-                'user_login': buyer.user_login,
-                'user_email': buyer.user_email,
-                'display_name': buyer.display_name or buyer.user_login,
-                'order_id': buyer.order_id,
-                'order_status': buyer.order_status,
-                'total_amount': float(buyer.total_amount) if buyer.total_amount else None,
-                'payment_method_title': buyer.payment_method_title,
-                'date_created': buyer.date_created,
-                'has_personality_test': buyer.has_personality_test
-            })
+        return query.order_by(WooCommerceOrder.id).all()
+    
+    def _users_with_completed_test(self, db: Session, user_ids) -> set:
+        """WordPress user IDs (out of `user_ids`) with a completed personality test"""
+        user_ids = [user_id for user_id in user_ids if user_id]
+        if not user_ids:
+            return set()
         
-        return result
+        rows = db.query(TQBUser.wp_user_id).filter(
+            and_(
+                TQBUser.wp_user_id.in_(user_ids),
+                TQBUser.completed_quiz == True
+            )
+        ).distinct().all()
+        return {user_id for (user_id,) in rows}
 
 event = CRUDEvent()
\ No newline at end of file
@@ -1,6 +1,11 @@
-from typing import List, Optional, Dict, Tuple
+import logging
+from typing import List, Optional, Dict, Tuple, Callable, Iterable
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
+from sqlalchemy import and_, or_, desc, func, insert
+from app.core.grouping_pool import seed_explorer
+from app.core.metrics import TierTimer, track_matching_run
+from app.crud.personality_test import personality_test
 from app.models.matching import (
     UserProfile, MatchingSession, MatchingGroup, 
     UserMatchScore, EnergyFeedback
@@ -11,6 +16,9 @@ from app.schemas.matching import (
 )
 import math
 from collections import defaultdict
+import numpy as np
+
+logger = logging.getLogger(__name__)
 
 class CRUDMatching:
     
@@ -22,6 +30,17 @@ class CRUDMatching:
             UserProfile.wp_user_id == wp_user_id
         ).first()
     
+    def get_user_profiles(self, db: Session, wp_user_ids: Iterable[int]) -> Dict[int, UserProfile]:
+        """Get user profiles for many WordPress user IDs, keyed by wp_user_id"""
+        wp_user_ids = list(set(wp_user_ids))
+        if not wp_user_ids:
+            return {}
+        
+        profiles = db.query(UserProfile).filter(
+            UserProfile.wp_user_id.in_(wp_user_ids)
+        ).all()
+        return {profile.wp_user_id: profile for profile in profiles}
+    
     def create_user_profile(
         self, 
         db: Session, 
@@ -73,6 +92,133 @@ class CRUDMatching:
         db.refresh(db_profile)
         return db_profile
     
+    def build_user_profiles(self, wp_db: Session, local_db: Session, buyers: List[dict]) -> List[dict]:
+        """Merge buyers with their stored matching profile and personality test data"""
+        # Prefetch stored profiles and personality tests for all buyers at once
+        buyer_ids = [buyer['user_id'] for buyer in buyers]
+        profiles = self.get_user_profiles(local_db, buyer_ids)
+        
+        tested_ids = [buyer['user_id'] for buyer in buyers if buyer['has_personality_test']]
+        try:
+            test_results = personality_test.get_user_personality_tests(wp_db, tested_ids)
+        except SQLAlchemyError:
+            # Match on stored profiles alone rather than fail the session
+            logger.exception("Loading personality tests for %d buyer(s) failed", len(tested_ids))
+            wp_db.rollback()
+            test_results = {}
+        
+        # Prepare user profiles for matching
+        user_profiles = []
+        
+        for buyer in buyers:
+            user_id = buyer['user_id']
+            
+            # Try to get existing profile
+            profile = profiles.get(user_id)
+            
+            profile_data = {
+                'user_id': user_id,
+                'username': buyer['user_login'],
+                'email': buyer['user_email'],
+                'display_name': buyer['display_name'],
+                'has_personality_test': buyer['has_personality_test']
+            }
+            
+            # If user has personality test, extract relevant data
+            if buyer['has_personality_test']:
+                test_result = test_results.get(user_id)
+                
+                if test_result:
+                    # Map personality test results to profile attributes
+                    # This is a simplified mapping - adjust based on your actual test structure
+                    profile_data.update(
+                        self._extract_profile_from_test(test_result)
+                    )
+            
+            # If profile exists, merge with existing data
+            if profile:
+                # Keep existing profile data, only update from test if available
+                profile_dict = {
+                    'user_id': user_id,
+                    'username': buyer['user_login'],
+                    'email': buyer['user_email'],
+                    'display_name': buyer['display_name'],
+                    'social_energy': profile.social_energy,
+                    'conversation_style': profile.conversation_style,
+                    'social_goal': profile.social_goal,
+                    'group_size_preference': profile.group_size_preference,
+                    'gender': profile.gender,
+                    'gender_preference': profile.gender_preference,
+                    'activity_types': profile.activity_types,
+                    'discussion_topics': profile.discussion_topics,
+                    'life_stage': profile.life_stage,
+                    'cultural_background': profile.cultural_background,
+                    'price_tier': profile.price_tier,
+                    'reliability_score': profile.reliability_score,
+                    'attendance_rate': profile.attendance_rate
+                }
+                # Update with new data from test if available
+                profile_dict.update({k: v for k, v in profile_data.items() 
+                                   if v is not None and k not in ['user_id', 'username', 'email', 'display_name', 'has_personality_test']})
+            else:
+                profile_dict = profile_data
+            
+            user_profiles.append(profile_dict)
+        
+        return user_profiles
+    
+    def _extract_profile_from_test(self, test_result: dict) -> dict:
+        """
+        Extract matching profile attributes from personality test results
+        This is a simplified version - adjust based on your actual test structure
+        """
+        profile = {}
+        
+        # Example: Extract social energy from test results
+        # You'll need to adjust this based on your actual personality test questions
+        total_points = test_result.get('total_points', 0)
+        
+        # Map points to social energy (example thresholds)
+        if total_points < 30:
+            profile['social_energy'] = 'introvert'
+        elif total_points < 70:
+            profile['social_energy'] = 'ambivert'
+        else:
+            profile['social_energy'] = 'extrovert'
+        
+        # You can add more sophisticated mapping based on specific questions
+        # For example, if you have questions about conversation preferences:
+        answers = test_result.get('answers', [])
+        
+        for answer in answers:
+            question_text = answer.get('question_text', '').lower()
+            answer_text = answer.get('answer_text', '').lower()
+            
+            # Example: Detect conversation style from answers
+            if 'conversation' in question_text or 'discussion' in question_text:
+                if 'deep' in answer_text or 'meaningful' in answer_text:
+                    profile['conversation_style'] = 'deep'
+                elif 'casual' in answer_text or 'light' in answer_text:
+                    profile['conversation_style'] = 'casual'
+            
+            # Example: Detect social goal
+            if 'goal' in question_text or 'looking for' in question_text:
+                if 'relationship' in answer_text:
+                    profile['social_goal'] = 'relationship'
+                elif 'friend' in answer_text:
+                    profile['social_goal'] = 'friendship'
+                elif 'network' in answer_text or 'professional' in answer_text:
+                    profile['social_goal'] = 'networking'
+            
+            # Example: Detect group size preference
+            if 'group size' in question_text or 'prefer' in question_text:
+                if '4' in answer_text or 'small' in answer_text or 'intimate' in answer_text:
+                    profile['group_size_preference'] = 4
+                elif '6' in answer_text or 'larger' in answer_text:
+                    profile['group_size_preference'] = 6
+        
+        return profile
+    
     # ==================== Matching Algorithm ====================
     
     def calculate_match_score(
@@ -309,29 +455,54 @@ class CRUDMatching:
         event_id: int,
         target_group_size: int,
         conversation_style: str,
-        user_profiles: List[Dict]
+        user_profiles: List[Dict],
+        session: Optional[MatchingSession] = None,
+        progress: Optional[Callable[..., None]] = None
     ) -> Tuple[MatchingSession, List[MatchingGroup]]:
         """
         Main matching algorithm
         Creates groups based on compatibility scores
+        
+        Pass `session` to run an existing (pending) session, e.g. from a
+        background job; `progress` is called with phase / groups_formed /
+        participants_remaining as the run advances. The time, pairs and
+        groups of each phase are stored in `session.timings`.
         """
-        # Create matching session
-        from app.crud.event import event as event_crud
-        from app.db.base import get_wp_db
+        with track_matching_run('sosy'):
+            return self._create_matching_groups(
+                db, event_id, target_group_size, conversation_style,
+                user_profiles, session, progress
+            )
+    
+    def _create_matching_groups(
+        self,
+        db: Session,
+        event_id: int,
+        target_group_size: int,
+        conversation_style: str,
+        user_profiles: List[Dict],
+        session: Optional[MatchingSession],
+        progress: Optional[Callable[..., None]]
+    ) -> Tuple[MatchingSession, List[MatchingGroup]]:
+        report = progress or (lambda **_: None)
+        tiers = TierTimer('sosy')
         
-        wp_db = next(get_wp_db())
-        event_obj = event_crud.get_event_by_id(wp_db, event_id)
+        if session is None:
+            # Create matching session
+            from app.crud.event import event as event_crud
+            from app.db.base import WPSessionLocal
+            
+            # Closed right away so the WP connection goes back to the pool
+            with WPSessionLocal() as wp_db:
+                event_obj = event_crud.get_event_by_id(wp_db, event_id)
+            
+            session = self.create_pending_session(
+                db, event_id, target_group_size, conversation_style,
+                event_obj.post_title if event_obj else None
+            )
         
-        session = MatchingSession(
-            event_id=event_id,
-            event_name=event_obj.post_title if event_obj else None,
-            target_group_size=target_group_size,
-            conversation_style=conversation_style,
-            status='pending'
-        )
-        db.add(session)
+        session.status = 'processing'
         db.commit()
-        db.refresh(session)
         
         # Filter users by conversation style (hard filter)
         filtered_users = [
@@ -350,11 +521,21 @@ class CRUDMatching:
         if len(filtered_users) < target_group_size:
             # Not enough users for even one group
             session.status = 'completed'
+            session.progress = {
+                'phase': 'done',
+                'groups_formed': 0,
+                'participants_remaining': len(filtered_users)
+            }
             db.commit()
             return session, []
         
-        # Calculate pairwise match scores
-        match_matrix = {}
+        # Calculate pairwise match scores (dense matrices; `linked` marks the
+        # pairs that count)
+        report(phase='scoring', groups_formed=0, participants_remaining=len(filtered_users))
+        tiers.start('scoring')
+        participant_count = len(filtered_users)
+        match_scores = np.zeros((participant_count, participant_count))
+        linked = np.zeros((participant_count, participant_count), dtype=bool)
         for i, user1 in enumerate(filtered_users):
             for j, user2 in enumerate(filtered_users):
                 if i >= j:
@@ -366,129 +547,183 @@ class CRUDMatching:
                 
                 # Only consider if minimum 3 criteria match
                 if score_data['matching_criteria_count'] >= 3:
-                    match_matrix[(i, j)] = score_data['total_match_score']
-        
-        # Greedy grouping algorithm
-        matched_groups = []
+                    match_scores[i, j] = match_scores[j, i] = score_data['total_match_score']
+                    linked[i, j] = linked[j, i] = True
+        tiers.pairs(participant_count * (participant_count - 1) // 2)
+        
+        # Greedy grouping algorithm: every round grows a group from each
+        # ungrouped participant and keeps the best (see explore_seeds)
+        tiers.start('grouping')
+        group_rows = []
+        score_rows = []
         used_indices = set()
         group_number = 1
+        alive = np.ones(participant_count, dtype=bool)
         
-        while len(used_indices) < len(filtered_users):
-            available_indices = [i for i in range(len(filtered_users)) if i not in used_indices]
-            
-            if len(available_indices) < target_group_size:
-                break  # Not enough people for another group
-            
-            # Find best group starting with highest average compatibility
-            best_group = None
-            best_score = -1
-            
-            # Try different combinations (simplified greedy approach)
-            for seed_idx in available_indices:
-                current_group = [seed_idx]
-                current_available = [i for i in available_indices if i != seed_idx]
+        with seed_explorer.session(match_scores, linked) as search:
+            while len(used_indices) < participant_count:
+                if participant_count - len(used_indices) < target_group_size:
+                    break  # Not enough people for another group
+                
+                found, evaluated = search(alive, target_group_size)
+                tiers.pairs(evaluated)
+                
+                # Only groups of the wrong size fail validation, and seeds
+                # only yield full groups
+                best_group = None
+                best_score = -1
+                if found is not None:
+                    group_profiles = [filtered_users[idx] for idx in found.members]
+                    if self.validate_group_composition(group_profiles, target_group_size):
+                        best_group = found.members
+                        best_score = found.score
                 
-                # Add users one by one based on average score with current group
-                while len(current_group) < target_group_size and current_available:
-                    best_next = None
-                    best_next_score = -1
+                if best_group:
+                    # Create the group
+                    members_data = []
+                    for idx in best_group:
+                        user = filtered_users[idx]
+                        members_data.append({
+                            'user_id': user['user_id'],
+                            'username': user.get('username', ''),
+                            'email': user.get('email', ''),
+                            'display_name': user.get('display_name', ''),
+                            'social_energy': user.get('social_energy')
+                        })
+                        used_indices.add(idx)
+                        alive[idx] = False
                     
-                    for candidate_idx in current_available:
-                        # Calculate average score with all in current group
-                        scores = []
-                        for group_idx in current_group:
-                            pair = tuple(sorted([group_idx, candidate_idx]))
-                            if pair in match_matrix:
-                                scores.append(match_matrix[pair])
-                        
-                        if scores:
-                            avg_score = sum(scores) / len(scores)
-                            if avg_score > best_next_score:
-                                best_next_score = avg_score
-                                best_next = candidate_idx
+                    group_rows.append({
+                        'session_id': session.id,
+                        'group_number': group_number,
+                        'group_size': target_group_size,
+                        'average_match_score': best_score,
+                        'members_data': members_data
+                    })
                     
-                    if best_next is not None:
-                        current_group.append(best_next)
-                        current_available.remove(best_next)
-                    else:
-                        break
-                
-                # Check if this group is complete and better than previous best
-                if len(current_group) == target_group_size:
-                    # Calculate average group score
-                    group_scores = []
-                    for i in range(len(current_group)):
-                        for j in range(i + 1, len(current_group)):
-                            pair = tuple(sorted([current_group[i], current_group[j]]))
-                            if pair in match_matrix:
-                                group_scores.append(match_matrix[pair])
+                    # Individual match scores, saved once all groups are formed
+                    for i in range(len(best_group)):
+                        for j in range(i + 1, len(best_group)):
+                            idx1, idx2 = best_group[i], best_group[j]
+                            user1, user2 = filtered_users[idx1], filtered_users[idx2]
+                            
+                            score_data = self.calculate_match_score(
+                                user1, user2, target_group_size, conversation_style
+                            )
+                            score_rows.append((group_number, {
+                                'user1_id': user1['user_id'],
+                                'user2_id': user2['user_id'],
+                                **score_data
+                            }))
                     
-                    if group_scores:
-                        avg_group_score = sum(group_scores) / len(group_scores)
-                        
-                        # Validate group composition
-                        group_profiles = [filtered_users[idx] for idx in current_group]
-                        if self.validate_group_composition(group_profiles, target_group_size):
-                            if avg_group_score > best_score:
-                                best_score = avg_group_score
-                                best_group = current_group
+                    group_number += 1
+                    report(
+                        phase='grouping',
+                        groups_formed=len(group_rows),
+                        participants_remaining=len(filtered_users) - len(used_indices)
+                    )
+                else:
+                    break
+        
+        tiers.tables(len(group_rows))
+        
+        # Save groups and scores in batches: one executemany per table, with
+        # group IDs read back by (session_id, group_number)
+        tiers.start('persisting')
+        matched_groups = []
+        if group_rows:
+            report(
+                phase='persisting',
+                groups_formed=len(group_rows),
+                participants_remaining=len(filtered_users) - len(used_indices)
+            )
+            db.execute(insert(MatchingGroup), group_rows)
             
-            if best_group:
-                # Create the group
-                members_data = []
-                for idx in best_group:
-                    user = filtered_users[idx]
-                    members_data.append({
-                        'user_id': user['user_id'],
-                        'username': user.get('username', ''),
-                        'email': user.get('email', ''),
-                        'display_name': user.get('display_name', ''),
-                        'social_energy': user.get('social_energy')
-                    })
-                    used_indices.add(idx)
-                
-                group = MatchingGroup(
-                    session_id=session.id,
-                    group_number=group_number,
-                    group_size=target_group_size,
-                    average_match_score=best_score,
-                    members_data=members_data
-                )
-                db.add(group)
-                db.commit()
-                db.refresh(group)
-                
-                # Save individual match scores
-                for i in range(len(best_group)):
-                    for j in range(i + 1, len(best_group)):
-                        idx1, idx2 = best_group[i], best_group[j]
-                        user1, user2 = filtered_users[idx1], filtered_users[idx2]
-                        
-                        score_data = self.calculate_match_score(
-                            user1, user2, target_group_size, conversation_style
-                        )
-                        
-                        match_score = UserMatchScore(
-                            group_id=group.id,
-                            user1_id=user1['user_id'],
-                            user2_id=user2['user_id'],
-                            **score_data
-                        )
-                        db.add(match_score)
-                
-                matched_groups.append(group)
-                group_number += 1
-            else:
-                break
+            matched_groups = db.query(MatchingGroup).filter(
+                MatchingGroup.session_id == session.id
+            ).order_by(MatchingGroup.group_number).all()
+            group_ids = {group.group_number: group.id for group in matched_groups}
+            
+            db.execute(insert(UserMatchScore), [
+                {'group_id': group_ids[number], **row} for number, row in score_rows
+            ])
         
-        db.commit()
+        tiers.stop()
         
         # Update session status
         session.status = 'completed'
+        session.timings = tiers.spans
+        session.progress = {
+            'phase': 'done',
+            'groups_formed': len(matched_groups),
+            'participants_remaining': len(filtered_users) - len(used_indices)
+        }
         db.commit()
         
         return session, matched_groups
     
+    def create_pending_session(
+        self,
+        db: Session,
+        event_id: int,
+        target_group_size: int,
+        conversation_style: str,
+        event_name: Optional[str] = None
+    ) -> MatchingSession:
+        """Save a matching session as 'pending' before the algorithm runs"""
+        session = MatchingSession(
+            event_id=event_id,
+            event_name=event_name,
+            target_group_size=target_group_size,
+            conversation_style=conversation_style,
+            status='pending'
+        )
+        db.add(session)
+        db.commit()
+        db.refresh(session)
+        return session
+    
+    def mark_session_failed(
+        self,
+        db: Session,
+        session_id: int,
+        error: Optional[str] = None
+    ) -> Optional[MatchingSession]:
+        """Mark a session as failed and drop any groups a crashed run left behind"""
+        session = self.get_matching_session(db, session_id)
+        if not session:
+            return None
+        
+        group_ids = [
+            group_id for (group_id,) in db.query(MatchingGroup.id).filter(
+                MatchingGroup.session_id == session_id
+            ).all()
+        ]
+        if group_ids:
+            db.query(UserMatchScore).filter(
+                UserMatchScore.group_id.in_(group_ids)
+            ).delete(synchronize_session=False)
+            db.query(MatchingGroup).filter(
+                MatchingGroup.id.in_(group_ids)
+            ).delete(synchronize_session=False)
+        
+        session.status = 'failed'
+        session.progress = {'phase': 'failed', 'error': error}
+        db.commit()
+        db.refresh(session)
+        return session
+    
+    def fail_interrupted_sessions(self, db: Session, error: str) -> List[int]:
+        """Mark every 'pending' / 'processing' session failed (no job will finish them)"""
+        session_ids = [
+            session_id for (session_id,) in db.query(MatchingSession.id).filter(
+                MatchingSession.status.in_(('pending', 'processing'))
+            ).all()
+        ]
+        for session_id in session_ids:
+            self.mark_session_failed(db, session_id, error)
+        return session_ids
+    
     # ==================== Query Methods ====================
     
     def get_matching_session(
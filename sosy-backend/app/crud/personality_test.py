@@ -1,6 +1,6 @@
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterable
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, func
 from app.models.personality_test import TQBUser, TQBUserAnswer, TGEAnswer, TGEQuestion
 
 class CRUDPersonalityTest:
@@ -103,6 +103,95 @@ class CRUDPersonalityTest:
             'answers': formatted_answers
         }
     
+    def get_user_personality_tests(
+        self,
+        db: Session,
+        wp_user_ids: Iterable[int]
+    ) -> Dict[int, Dict]:
+        """
+        Bulk version of get_user_personality_test
+        
+        Picks the latest completed test per wp_user_id with a window function,
+        then loads the answers of just those tests in a second query. Returns
+        {wp_user_id: result}; users without a completed test are left out.
+        """
+        wp_user_ids = list(set(wp_user_ids))
+        if not wp_user_ids:
+            return {}
+        
+        ranked = db.query(
+            TQBUser.id,
+            TQBUser.wp_user_id,
+            TQBUser.quiz_id,
+            TQBUser.date_started,
+            TQBUser.date_finished,
+            TQBUser.points,
+            func.row_number().over(
+                partition_by=TQBUser.wp_user_id,
+                order_by=(desc(TQBUser.date_finished), desc(TQBUser.id))
+            ).label('rn')
+        ).filter(
+            and_(
+                TQBUser.wp_user_id.in_(wp_user_ids),
+                TQBUser.completed_quiz == True,
+                TQBUser.wp_user_id != 0
+            )
+        ).subquery()
+        
+        latest_tests = db.query(ranked).filter(ranked.c.rn == 1).all()
+        if not latest_tests:
+            return {}
+        
+        results = {}
+        tests = {}
+        for test in latest_tests:
+            tests[test.id] = results[test.wp_user_id] = {
+                'quiz_id': test.quiz_id,
+                'date_started': test.date_started,
+                'date_finished': test.date_finished,
+                'total_points': 0,
+                'personality_type': test.points,
+                'answers': []
+            }
+        
+        # Answers of those tests only; a completed test without answers
+        # keeps its empty list
+        answers = db.query(
+            TQBUserAnswer.user_id,
+            TQBUserAnswer.question_id,
+            TQBUserAnswer.answer_id,
+            TQBUserAnswer.answer_text.label('custom_answer_text'),
+            TGEQuestion.text.label('question_text'),
+            TGEQuestion.description.label('question_description'),
+            TGEAnswer.text.label('answer_text'),
+            TGEAnswer.points.label('answer_points'),
+            TGEAnswer.feedback.label('answer_feedback')
+        ).join(
+            TGEQuestion,
+            TQBUserAnswer.question_id == TGEQuestion.id
+        ).join(
+            TGEAnswer,
+            TQBUserAnswer.answer_id == TGEAnswer.id
+        ).filter(
+            TQBUserAnswer.user_id.in_(list(tests))
+        ).order_by(TQBUserAnswer.user_id, TQBUserAnswer.question_id).all()
+        
+        for row in answers:
+            result = tests[row.user_id]
+            result['total_points'] += row.answer_points or 0
+            result['answers'].append({
+                'question_id': row.question_id,
+                'question_text': row.question_text,
+                'question_description': row.question_description,
+                'answer_id': row.answer_id,
+                'answer_text': row.answer_text,
+                'answer_points': row.answer_points,
+                'answer_feedback': row.answer_feedback,
+                'custom_answer_text': row.custom_answer_text
+            })
+        
+        return results
+    
     def get_test_by_tqb_user_id(
         self, 
         db: Session, 
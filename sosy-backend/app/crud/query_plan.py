@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.db.explain import normalize_statement, statement_fingerprint
+from app.models.query_plan import SlowQueryPlan
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CRUDSlowQueryPlan:
+    def record(
+        self,
+        local_db: Session,
+        explain_engine,
+        statement: str,
+        parameters: Any,
+        elapsed_ms: float,
+        route: Optional[str] = None
+    ) -> SlowQueryPlan:
+        """
+        Add one slow execution to its fingerprint's row
+        
+        The plan is (re)captured with EXPLAIN on `explain_engine` the first
+        time a fingerprint is seen and then every WP_EXPLAIN_REFRESH_MINUTES,
+        using this execution's parameters.
+        """
+        normalized = normalize_statement(statement)
+        fingerprint = statement_fingerprint(normalized)
+        now = datetime.utcnow()
+        
+        try:
+            row = self._get_or_add(local_db, fingerprint, normalized, now)
+            local_db.flush()
+        except IntegrityError:
+            # Another worker process added the fingerprint first
+            local_db.rollback()
+            row = self._get_or_add(local_db, fingerprint, normalized, now)
+        
+        row.calls += 1
+        row.total_ms += elapsed_ms
+        row.max_ms = max(row.max_ms, elapsed_ms)
+        row.last_ms = elapsed_ms
+        row.last_seen = now
+        if route:
+            row.last_route = route
+        
+        if row.explained_at is None or now - row.explained_at >= timedelta(minutes=settings.WP_EXPLAIN_REFRESH_MINUTES):
+            row.plan = self._explain(explain_engine, statement, parameters)
+            row.full_scan_tables = ",".join(self._full_scan_tables(row.plan))[:500] or None
+            row.explained_at = now
+        
+        local_db.commit()
+        return row
+    
+    def get_worst(self, db: Session, sort_by: str = "total_ms", limit: int = 20) -> List[SlowQueryPlan]:
+        """Fingerprints ordered by total_ms, max_ms or calls (highest first)"""
+        column = getattr(SlowQueryPlan, sort_by)
+        return db.query(SlowQueryPlan).order_by(column.desc(), SlowQueryPlan.id).limit(limit).all()
+    
+    def clear(self, db: Session) -> int:
+        """Forget all captured fingerprints (e.g. after adding an index)"""
+        deleted = db.query(SlowQueryPlan).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    
+    def _get_or_add(self, local_db: Session, fingerprint: str, normalized: str, now: datetime) -> SlowQueryPlan:
+        row = local_db.query(SlowQueryPlan).filter(SlowQueryPlan.fingerprint == fingerprint).first()
+        if row is None:
+            row = SlowQueryPlan(
+                fingerprint=fingerprint,
+                statement=normalized,
+                calls=0,
+                total_ms=0.0,
+                max_ms=0.0,
+                first_seen=now
+            )
+            local_db.add(row)
+        return row
+    
+    def _explain(self, engine, statement: str, parameters: Any) -> Optional[List[dict]]:
+        try:
+            with engine.connect() as conn:
+                prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == 'sqlite' else "EXPLAIN "
+                result = conn.exec_driver_sql(prefix + statement, parameters)
+                return [
+                    {key: self._plain(value) for key, value in row.items()}
+                    for row in result.mappings()
+                ]
+        except Exception as e:
+            logger.warning("EXPLAIN failed: %s", e)
+            return None
+    
+    def _full_scan_tables(self, plan: Optional[List[dict]]) -> List[str]:
+        tables = []
+        for step in plan or []:
+            if step.get('type') == 'ALL' and step.get('table'):
+                tables.append(step['table'])  # MySQL: full table scan
+            detail = step.get('detail') or ''
+            if detail.startswith('SCAN ') and 'INDEX' not in detail:
+                tables.append(detail.split()[1])  # SQLite
+        return tables
+    
+    def _plain(self, value: Any) -> Any:
+        # EXPLAIN rows can hold Decimal / bytes; the plan column is JSON
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, bytes):
+            return value.decode('utf-8', 'replace')
+        return value
+
+slow_query_plan = CRUDSlowQueryPlan()
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.mysql import match
+from app.core.config import settings
+from app.models.event import WordPressPost
+from app.models.user import WordPressUser
+from app.models.search_index import EventSearchDocument, WPUserSearchDocument, SearchIndexSync
+
+logger = logging.getLogger(__name__)
+
+# Rows copied per batch when syncing a mirror
+SYNC_BATCH_SIZE = 1000
+
+# innodb_ft_min_token_size - shorter words are not in the FULLTEXT index
+FULLTEXT_MIN_WORD = 3
+
+class CRUDSearchIndex:
+    """
+    Local full-text mirrors of WordPress products and users.
+    
+    Searching wprq_posts / wprq_users with ilike('%term%') scans the whole
+    table (post_content is LONGTEXT). The mirrors carry only the searchable
+    columns with a FULLTEXT index; a search returns matching IDs, which the
+    WordPress query then filters on by primary key.
+    
+    Searches read the mirrors as they are; keep_mirrors_synced() refreshes
+    them in the background. Until a mirror's first full copy exists, search
+    returns None and callers fall back to filtering WordPress directly.
+    
+    On MySQL every word of 3+ characters in the term must start a word in
+    one of the columns (FULLTEXT prefix match), so a query from the middle
+    of a word ("ohn" for "john") no longer matches. Elsewhere, and on the
+    WordPress fallback, the term matches any substring.
+    """
+    
+    def search_event_ids(self, local_db: Session, search: str) -> Optional[List[int]]:
+        """IDs of products whose title, content or excerpt match `search` (None: mirror not built yet)"""
+        return self._search(local_db, 'events', EventSearchDocument, [
+            EventSearchDocument.post_title,
+            EventSearchDocument.post_content,
+            EventSearchDocument.post_excerpt
+        ], search)
+    
+    def search_wp_user_ids(self, local_db: Session, search: str) -> Optional[List[int]]:
+        """IDs of WordPress users whose login, email, display name or nicename match `search` (None: mirror not built yet)"""
+        return self._search(local_db, 'wp_users', WPUserSearchDocument, [
+            WPUserSearchDocument.user_login,
+            WPUserSearchDocument.user_email,
+            WPUserSearchDocument.display_name,
+            WPUserSearchDocument.user_nicename
+        ], search)
+    
+    def sync_mirrors(self, local_db: Session, wp_db: Session) -> None:
+        """Sync both mirrors; one that fails (e.g. racing another process) is retried next time"""
+        for sync in (self.sync_events, self.sync_wp_users):
+            try:
+                sync(local_db, wp_db)
+            except SQLAlchemyError:
+                logger.warning("Search mirror sync failed", exc_info=True)
+                local_db.rollback()
+    
+    def sync_events(self, local_db: Session, wp_db: Session, force: bool = False) -> None:
+        """Copy products modified since the last sync into the mirror"""
+        self._sync(
+            local_db, wp_db, 'events', EventSearchDocument,
+            WordPressPost, WordPressPost.post_modified,
+            [WordPressPost.post_type == 'product'],
+            force
+        )
+    
+    def sync_wp_users(self, local_db: Session, wp_db: Session, force: bool = False) -> None:
+        """Copy users registered since the last sync into the mirror"""
+        self._sync(
+            local_db, wp_db, 'wp_users', WPUserSearchDocument,
+            WordPressUser, WordPressUser.user_registered,
+            [],
+            force
+        )
+    
+    def _search(self, local_db: Session, name: str, document, columns, search: str) -> Optional[List[int]]:
+        state = local_db.get(SearchIndexSync, name)
+        if state is None or state.full_synced_at is None:
+            return None
+        
+        query = local_db.query(document.ID).filter(
+            or_(*[column.ilike(f"%{search}%") for column in columns])
+        )
+        
+        # FULLTEXT narrows the candidates first (MySQL only): every indexable
+        # word of the term must start a word in one of the columns
+        words = [w for w in re.findall(r"\w+", search) if len(w) >= FULLTEXT_MIN_WORD]
+        if words and local_db.get_bind().dialect.name == 'mysql':
+            query = query.filter(
+                match(*columns, against=" ".join(f"+{w}*" for w in words)).in_boolean_mode()
+            )
+        
+        return [doc_id for (doc_id,) in query.all()]
+    
+    def _sync(
+        self,
+        local_db: Session,
+        wp_db: Session,
+        name: str,
+        document,
+        source,
+        watermark_column,
+        source_filters: list,
+        force: bool
+    ) -> None:
+        """
+        Incremental sync of one mirror
+        
+        Rows with watermark_column >= the stored watermark are copied over
+        (delete + insert per batch, so it works on any dialect). Every
+        SEARCH_INDEX_FULL_REFRESH_HOURS the whole source is copied instead
+        and mirror rows that no longer exist are dropped - that is what picks
+        up edits the watermark can't see (e.g. a changed user email) and
+        deleted rows.
+        """
+        now = datetime.utcnow()
+        state = local_db.get(SearchIndexSync, name)
+        if (
+            state is not None and not force and state.synced_at is not None
+            and now - state.synced_at < timedelta(seconds=settings.SEARCH_INDEX_SYNC_INTERVAL)
+        ):
+            return
+        
+        if state is None:
+            state = SearchIndexSync(name=name)
+            local_db.add(state)
+        
+        full = (
+            state.full_synced_at is None
+            or now - state.full_synced_at >= timedelta(hours=settings.SEARCH_INDEX_FULL_REFRESH_HOURS)
+        )
+        
+        columns = [getattr(source, column.key) for column in document.__table__.columns]
+        query = wp_db.query(*columns)
+        if source_filters:
+            query = query.filter(and_(*source_filters))
+        if not full and state.watermark is not None:
+            query = query.filter(watermark_column >= state.watermark)
+        
+        watermark = state.watermark
+        seen_ids = set()
+        last_id = None
+        
+        # Walk the source by primary key in batches
+        while True:
+            batch_query = query
+            if last_id is not None:
+                batch_query = batch_query.filter(source.ID > last_id)
+            batch = batch_query.order_by(source.ID).limit(SYNC_BATCH_SIZE).all()
+            if not batch:
+                break
+            
+            rows = [dict(row._mapping) for row in batch]
+            ids = [row['ID'] for row in rows]
+            local_db.query(document).filter(document.ID.in_(ids)).delete(synchronize_session=False)
+            local_db.execute(insert(document), rows)
+            
+            for row in rows:
+                changed_at = row[watermark_column.key]
+                if changed_at is not None and (watermark is None or changed_at > watermark):
+                    watermark = changed_at
+            seen_ids.update(ids)
+            last_id = ids[-1]
+        
+        if full:
+            stale_ids = [
+                doc_id for (doc_id,) in local_db.query(document.ID).all()
+                if doc_id not in seen_ids
+            ]
+            for start in range(0, len(stale_ids), SYNC_BATCH_SIZE):
+                local_db.query(document).filter(
+                    document.ID.in_(stale_ids[start:start + SYNC_BATCH_SIZE])
+                ).delete(synchronize_session=False)
+            state.full_synced_at = now
+        
+        state.watermark = watermark
+        state.synced_at = now
+        local_db.commit()
+
+search_index = CRUDSearchIndex()
+
+async def keep_mirrors_synced(interval: float) -> None:
+    """Sync the search mirrors every `interval` seconds, off the request path"""
+    from app.db.base import LocalSessionLocal, WPSessionLocal
+    
+    def sync() -> None:
+        with LocalSessionLocal() as local_db, WPSessionLocal() as wp_db:
+            search_index.sync_mirrors(local_db, wp_db)
+    
+    while True:
+        try:
+            await asyncio.to_thread(sync)
+        except Exception:
+            logger.warning("Search mirror sync failed", exc_info=True)
+        await asyncio.sleep(interval)
@@ -1,8 +1,11 @@
 from typing import List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, asc, desc, func
 from app.models.user import User, WordPressUser
 from app.schemas.user import UserCreate, UserUpdate
+from app.core.principals import invalidate_principal
+from app.utils.pagination import paginate_keyset, cached_count, count_cache
 
 class CRUDUser:
     def get(self, db: Session, id: int) -> Optional[User]:
@@ -29,6 +32,70 @@ class CRUDUser:
         Get multiple users with advanced filtering, searching, sorting, and pagination
         Returns tuple of (users, total_count)
         """
+        query = self._filtered_query(db, search, is_active, is_superuser)
+        
+        # Get total count before pagination
+        total_count = self.count(db, search, is_active, is_superuser)
+        
+        # Apply sorting
+        if sort_by:
+            column = getattr(User, sort_by, None)
+            if column:
+                if sort_order.lower() == "desc":
+                    query = query.order_by(desc(column))
+                else:
+                    query = query.order_by(asc(column))
+        else:
+            # Default sort by created_at desc
+            query = query.order_by(desc(User.created_at))
+        
+        # Apply pagination
+        users = query.offset(skip).limit(limit).all()
+        
+        return users, total_count
+    
+    def get_multi_keyset(
+        self,
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        search: Optional[str] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        is_active: Optional[bool] = None,
+        is_superuser: Optional[bool] = None
+    ) -> Tuple[List[User], Optional[str]]:
+        """
+        Cursor-paginated variant of get_multi, keyed on (sort_by, id)
+        Returns tuple of (users, next_cursor)
+        """
+        query = self._filtered_query(db, search, is_active, is_superuser)
+        column = getattr(User, sort_by, None)
+        if column is None:
+            sort_by, column = "created_at", User.created_at
+        
+        return paginate_keyset(query, column, User.id, sort_by, sort_order, limit, cursor)
+    
+    def count(
+        self,
+        db: Session,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        is_superuser: Optional[bool] = None
+    ) -> int:
+        """Total users matching the filters (cached for COUNT_CACHE_TTL seconds)"""
+        return cached_count(
+            ("users", search, is_active, is_superuser),
+            lambda: self._filtered_query(db, search, is_active, is_superuser)
+        )
+    
+    def _filtered_query(
+        self,
+        db: Session,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        is_superuser: Optional[bool] = None
+    ):
         query = db.query(User)
         
         # Apply filters
@@ -49,25 +116,7 @@ class CRUDUser:
                 )
             )
         
-        # Get total count before pagination
-        total_count = query.count()
-        
-        # Apply sorting
-        if sort_by:
-            column = getattr(User, sort_by, None)
-            if column:
-                if sort_order.lower() == "desc":
-                    query = query.order_by(desc(column))
-                else:
-                    query = query.order_by(asc(column))
-        else:
-            # Default sort by created_at desc
-            query = query.order_by(desc(User.created_at))
-        
-        # Apply pagination
-        users = query.offset(skip).limit(limit).all()
-        
-        return users, total_count
+        return query
     
     def create(self, db: Session, obj_in: UserCreate) -> User:
         from app.core.security import get_password_hash
@@ -81,14 +130,18 @@ class CRUDUser:
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        count_cache.clear()
         return db_obj
     
     def update(self, db: Session, db_obj: User, obj_in: UserUpdate) -> User:
+        old_username = db_obj.username
         update_data = obj_in.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_obj, field, value)
         db.commit()
         db.refresh(db_obj)
+        count_cache.clear()
+        invalidate_principal(old_username, db_obj.username)
         return db_obj
     
     def delete(self, db: Session, id: int) -> Optional[User]:
@@ -96,6 +149,8 @@ class CRUDUser:
         if obj:
             db.delete(obj)
             db.commit()
+            count_cache.clear()
+            invalidate_principal(obj.username)
         return obj
     
     def authenticate(self, db: Session, username: str, password: str) -> Optional[User]:
@@ -106,6 +161,16 @@ class CRUDUser:
         if not verify_password(password, user.hashed_password):
             return None
         return user
+    
+    async def authenticate_async(self, db: AsyncSession, username: str, password: str) -> Optional[User]:
+        """authenticate() for async handlers; the bcrypt check is awaited, not run on a thread"""
+        from app.core.security import verify_password_async
+        user = await db.run_sync(self.get_by_username, username)
+        if not user:
+            return None
+        if not await verify_password_async(password, user.hashed_password):
+            return None
+        return user
 
 class CRUDWordPressUser:
     def get(self, db: Session, id: int) -> Optional[WordPressUser]:
@@ -125,32 +190,21 @@ class CRUDWordPressUser:
         search: Optional[str] = None,
         sort_by: Optional[str] = None,
         sort_order: Optional[str] = "asc",
-        user_status: Optional[int] = None
+        user_status: Optional[int] = None,
+        search_ids: Optional[List[int]] = None
     ) -> Tuple[List[WordPressUser], int]:
         """
         Get multiple WordPress users with advanced filtering, searching, sorting, and pagination
         Returns tuple of (users, total_count)
-        """
-        query = db.query(WordPressUser).order_by(WordPressUser.ID)
-        
-        # Apply status filter
-        if user_status is not None:
-            query = query.filter(WordPressUser.user_status == user_status)
         
-        # Apply search
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    WordPressUser.user_login.ilike(search_term),
-                    WordPressUser.user_email.ilike(search_term),
-                    WordPressUser.display_name.ilike(search_term),
-                    WordPressUser.user_nicename.ilike(search_term)
-                )
-            )
+        `search_ids` are the IDs the local search mirror matched for `search`
+        (search_index.search_wp_user_ids); without them `search` is an ilike
+        filter on wprq_users.
+        """
+        query = self._filtered_query(db, search, user_status, search_ids).order_by(WordPressUser.ID)
         
         # Get total count before pagination
-        total_count = query.count()
+        total_count = self.count(db, search, user_status, search_ids)
         
         # Apply sorting
         if sort_by:
@@ -169,6 +223,70 @@ class CRUDWordPressUser:
         
         return users, total_count
     
+    def get_multi_keyset(
+        self,
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        search: Optional[str] = None,
+        sort_by: str = "user_registered",
+        sort_order: str = "desc",
+        user_status: Optional[int] = None,
+        search_ids: Optional[List[int]] = None
+    ) -> Tuple[List[WordPressUser], Optional[str]]:
+        """
+        Cursor-paginated variant of get_multi, keyed on (sort_by, ID)
+        Returns tuple of (users, next_cursor)
+        """
+        query = self._filtered_query(db, search, user_status, search_ids)
+        column = getattr(WordPressUser, sort_by, None)
+        if column is None:
+            sort_by, column = "user_registered", WordPressUser.user_registered
+        
+        return paginate_keyset(query, column, WordPressUser.ID, sort_by, sort_order, limit, cursor)
+    
+    def count(
+        self,
+        db: Session,
+        search: Optional[str] = None,
+        user_status: Optional[int] = None,
+        search_ids: Optional[List[int]] = None
+    ) -> int:
+        """Total WordPress users matching the filters (cached for COUNT_CACHE_TTL seconds)"""
+        return cached_count(
+            ("wp_users", search, user_status),
+            lambda: self._filtered_query(db, search, user_status, search_ids)
+        )
+    
+    def _filtered_query(
+        self,
+        db: Session,
+        search: Optional[str] = None,
+        user_status: Optional[int] = None,
+        search_ids: Optional[List[int]] = None
+    ):
+        query = db.query(WordPressUser)
+        
+        # Apply status filter
+        if user_status is not None:
+            query = query.filter(WordPressUser.user_status == user_status)
+        
+        # Apply search - IDs from the local full-text mirror once it is built
+        if search and search_ids is not None:
+            query = query.filter(WordPressUser.ID.in_(search_ids))
+        elif search:
+            search_term = f"%{search}%"
+            query = query.filter(
+                or_(
+                    WordPressUser.user_login.ilike(search_term),
+                    WordPressUser.user_email.ilike(search_term),
+                    WordPressUser.display_name.ilike(search_term),
+                    WordPressUser.user_nicename.ilike(search_term)
+                )
+            )
+        
+        return query
+    
     def search(self, db: Session, search_term: str, skip: int = 0, limit: int = 100) -> List[WordPressUser]:
         users, _ = self.get_multi(db, skip=skip, limit=limit, search=search_term)
         return users
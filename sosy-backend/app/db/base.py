@@ -1,14 +1,34 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.db.explain import SlowPlanCapture
+from app.db.pool import monitor_engine, pool_options, prewarm, prewarm_async
+from app.db.query_stats import track_queries
+
+# Pool sizing comes from <PREFIX>_DB_POOL_SIZE / _MAX_OVERFLOW / _POOL_TIMEOUT;
+# the pool is instrumented for checkout waits and long-held connections
+def _pool(prefix: str, base):
+    return pool_options(
+        prefix.lower(), base,
+        pool_size=getattr(settings, f"{prefix}_DB_POOL_SIZE"),
+        max_overflow=getattr(settings, f"{prefix}_DB_MAX_OVERFLOW"),
+        pool_timeout=getattr(settings, f"{prefix}_DB_POOL_TIMEOUT"),
+        warn_after=settings.DB_CONNECTION_WARN_SECONDS,
+        capture_stack=settings.DB_POOL_LEAK_TRACEBACK
+    )
 
 # Local Database Engine (Read/Write)
 local_engine = create_engine(
     settings.LOCAL_DATABASE_URL,
     pool_pre_ping=True,
-    pool_recycle=300
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    **_pool("LOCAL", QueuePool)
 )
+monitor_engine("local", local_engine)
+track_queries(local_engine)
 
 LocalSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=local_engine)
 
@@ -16,11 +36,49 @@ LocalSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=local_e
 wp_engine = create_engine(
     settings.WP_DATABASE_URL,
     pool_pre_ping=True,
-    pool_recycle=300
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    **_pool("WP", QueuePool)
 )
+monitor_engine("wp", wp_engine)
+track_queries(wp_engine)
 
 WPSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=wp_engine)
 
+# Diagnostic mode: slow WordPress SELECTs get EXPLAINed in the background
+slow_plan_capture = SlowPlanCapture(settings.WP_EXPLAIN_THRESHOLD_MS, settings.WP_EXPLAIN_QUEUE_SIZE)
+if settings.WP_EXPLAIN_ENABLED:
+    slow_plan_capture.attach(wp_engine)
+
+# Async engines for the read endpoints (async def handlers): a request waiting
+# on MySQL does not hold a threadpool slot
+async_local_engine = create_async_engine(
+    settings.ASYNC_LOCAL_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    **_pool("ASYNC_LOCAL", AsyncAdaptedQueuePool)
+)
+monitor_engine("async_local", async_local_engine)
+track_queries(async_local_engine)
+
+AsyncLocalSessionLocal = async_sessionmaker(
+    bind=async_local_engine, autoflush=False, expire_on_commit=False
+)
+
+async_wp_engine = create_async_engine(
+    settings.ASYNC_WP_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    **_pool("ASYNC_WP", AsyncAdaptedQueuePool)
+)
+monitor_engine("async_wp", async_wp_engine)
+track_queries(async_wp_engine)
+if settings.WP_EXPLAIN_ENABLED:
+    slow_plan_capture.attach(async_wp_engine)
+
+AsyncWPSessionLocal = async_sessionmaker(
+    bind=async_wp_engine, autoflush=False, expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -38,4 +96,24 @@ def get_wp_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Async dependencies - the existing sync CRUD functions run on these via
+# `await db.run_sync(...)`, so query code is shared with the sync endpoints
+async def get_async_local_db():
+    async with AsyncLocalSessionLocal() as db:
+        yield db
+
+async def get_async_wp_db():
+    async with AsyncWPSessionLocal() as db:
+        yield db
+
+def prewarm_pools() -> None:
+    """Fill the sync pools up to pool_size (called from the app lifespan)"""
+    prewarm(local_engine, settings.LOCAL_DB_POOL_SIZE)
+    prewarm(wp_engine, settings.WP_DB_POOL_SIZE)
+
+async def prewarm_async_pools() -> None:
+    """Fill the async pools up to pool_size (called from the app lifespan)"""
+    await prewarm_async(async_local_engine, settings.ASYNC_LOCAL_DB_POOL_SIZE)
+    await prewarm_async(async_wp_engine, settings.ASYNC_WP_DB_POOL_SIZE)
\ No newline at end of file
@@ -0,0 +1,107 @@
+import hashlib
+import logging
+import queue
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from app.db.query_stats import current_route
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+# Expanded IN lists: IN (%s, %s, ...) / IN (?, ?) / IN (__[POSTCOMPILE_x])
+_IN_LIST = re.compile(r"\bIN \((?:\s*(?:%s|\?|%\(\w+\)s|__\[POSTCOMPILE_\w+\])\s*,?)+\)", re.IGNORECASE)
+
+
+def normalize_statement(statement: str) -> str:
+    """Statement text with whitespace collapsed and IN lists of any length as IN (?)"""
+    return _IN_LIST.sub("IN (?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def statement_fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class SlowPlanCapture:
+    """
+    Diagnostic mode for the WordPress engines (WP_EXPLAIN_ENABLED).
+
+    SELECTs slower than `threshold_ms` are queued with their parameters; a
+    background thread runs EXPLAIN for them on the sync WP engine and stores
+    plan, fingerprint and timings in slow_query_plans, so the request that
+    hit the slow query doesn't pay for the EXPLAIN. When the queue is full
+    the sample is dropped.
+    """
+
+    def __init__(self, threshold_ms: float, queue_size: int):
+        self.threshold_ms = threshold_ms
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def attach(self, engine) -> None:
+        """Time SELECTs on `engine` (sync or async) and queue the slow ones"""
+        sync_engine = getattr(engine, 'sync_engine', engine)
+
+        @event.listens_for(sync_engine, 'before_cursor_execute')
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('explain_started', []).append(time.perf_counter())
+
+        @event.listens_for(sync_engine, 'after_cursor_execute')
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            elapsed_ms = (time.perf_counter() - conn.info['explain_started'].pop()) * 1000
+            if (
+                elapsed_ms >= self.threshold_ms and not executemany
+                and statement.lstrip()[:6].upper() == 'SELECT'
+            ):
+                self.submit(statement, parameters, elapsed_ms, current_route())
+
+        @event.listens_for(sync_engine, 'handle_error')
+        def _error(exception_context):
+            connection = exception_context.connection
+            if connection is not None and connection.info.get('explain_started'):
+                connection.info['explain_started'].pop()
+
+    def submit(self, statement: str, parameters: Any, elapsed_ms: float, route: Optional[str]) -> None:
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait({
+                'statement': statement,
+                'parameters': parameters,
+                'elapsed_ms': elapsed_ms,
+                'route': route,
+            })
+        except queue.Full:
+            self.dropped += 1
+
+    def shutdown(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name="wp-explain", daemon=True)
+                self._thread.start()
+
+    def _work(self) -> None:
+        from app.crud.query_plan import slow_query_plan
+        from app.db.base import LocalSessionLocal, wp_engine
+
+        while True:
+            sample = self._queue.get()
+            if sample is None:
+                return
+            try:
+                with LocalSessionLocal() as local_db:
+                    slow_query_plan.record(local_db, wp_engine, **sample)
+            except Exception:
+                logger.exception("Could not record slow query plan")
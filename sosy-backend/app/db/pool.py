@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import event, exc
+from sqlalchemy.pool import Pool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """
+    Checkout metrics and leak tracking for one engine's connection pool.
+
+    Counts checkouts and how long they waited for a connection (including
+    the time spent opening a new one), and remembers when each connection
+    was checked out. A connection held longer than `warn_after` seconds is
+    logged once by check_leaks() and again when it is finally returned.
+    """
+
+    def __init__(self, name: str, warn_after: float, capture_stack: bool = False):
+        self.name = name
+        self.warn_after = warn_after
+        self.capture_stack = capture_stack
+        self.pool: Optional[Pool] = None
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.long_held = 0
+        self._held: Dict[int, Tuple[float, str, Optional[str]]] = {}
+        self._warned: set = set()
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            if seconds > self.wait_seconds_max:
+                self.wait_seconds_max = seconds
+
+    def on_checkout(self, record: Any) -> None:
+        stack = "".join(traceback.format_stack(limit=12)[:-3]) if self.capture_stack else None
+        with self._lock:
+            self._held[id(record)] = (time.monotonic(), threading.current_thread().name, stack)
+
+    def on_checkin(self, record: Any) -> None:
+        with self._lock:
+            held = self._held.pop(id(record), None)
+            warned = id(record) in self._warned
+            self._warned.discard(id(record))
+        if held is None:
+            return
+        seconds = time.monotonic() - held[0]
+        if seconds > self.warn_after and not warned:
+            self.long_held += 1
+            logger.warning(
+                "%s pool: connection held for %.1fs by thread %s",
+                self.name, seconds, held[1]
+            )
+
+    def check_leaks(self) -> int:
+        """Warn about connections checked out longer than warn_after; returns how many are"""
+        now = time.monotonic()
+        with self._lock:
+            overdue = [
+                (key, now - started, thread, stack)
+                for key, (started, thread, stack) in self._held.items()
+                if now - started > self.warn_after
+            ]
+            new = [item for item in overdue if item[0] not in self._warned]
+            self._warned.update(key for key, *_ in new)
+            self.long_held += len(new)
+
+        for _, seconds, thread, stack in new:
+            logger.warning(
+                "%s pool: connection checked out for %.1fs by thread %s, possible leak%s",
+                self.name, seconds, thread, f"\n{stack}" if stack else ""
+            )
+        return len(overdue)
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = self.pool
+        with self._lock:
+            data = {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+                'long_held': self.long_held,
+            }
+        if pool is not None and hasattr(pool, 'checkedout'):
+            data.update({
+                'size': pool.size(),
+                'in_use': pool.checkedout(),
+                'idle': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0),
+            })
+        return data
+
+
+# One entry per monitored engine, keyed by name ('local', 'wp', ...)
+pool_stats: Dict[str, PoolStats] = {}
+
+
+def monitored_pool_class(base: type, stats: PoolStats) -> type:
+    """
+    Subclass of `base` that times Pool.connect() into `stats`.
+
+    The subclass carries the stats object, so it survives pool.recreate()
+    (which instantiates self.__class__) after a dispose or invalidation.
+    """
+    def connect(self):
+        stats.pool = self
+        started = time.perf_counter()
+        try:
+            connection = base.connect(self)
+        except exc.TimeoutError:
+            stats.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        stats.record_wait(time.perf_counter() - started)
+        return connection
+
+    return type(f"Monitored{base.__name__}", (base,), {'connect': connect})
+
+
+def pool_options(
+    name: str,
+    base: type,
+    pool_size: int,
+    max_overflow: int,
+    pool_timeout: float,
+    warn_after: float,
+    capture_stack: bool = False
+) -> Dict[str, Any]:
+    """create_engine() keyword arguments for a monitored pool; pair with monitor_engine()"""
+    stats = pool_stats.setdefault(name, PoolStats(name, warn_after, capture_stack))
+    return {
+        'poolclass': monitored_pool_class(base, stats),
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+    }
+
+
+def monitor_engine(name: str, engine) -> None:
+    """Hook checkout/checkin tracking onto an engine created with pool_options(name, ...)"""
+    stats = pool_stats[name]
+    sync_engine = getattr(engine, 'sync_engine', engine)
+    stats.pool = sync_engine.pool
+
+    @event.listens_for(sync_engine, 'checkout')
+    def _checkout(dbapi_connection, record, proxy):
+        stats.on_checkout(record)
+
+    @event.listens_for(sync_engine, 'checkin')
+    def _checkin(dbapi_connection, record):
+        stats.on_checkin(record)
+
+    @event.listens_for(sync_engine, 'detach')
+    def _detach(dbapi_connection, record):
+        stats.on_checkin(record)
+
+
+def pool_snapshot() -> Dict[str, Dict[str, Any]]:
+    """Current metrics for every monitored pool"""
+    return {name: stats.snapshot() for name, stats in pool_stats.items()}
+
+
+def prewarm(engine, count: int) -> int:
+    """Open `count` connections on a sync engine and return them to the pool"""
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(engine.pool.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+async def prewarm_async(engine, count: int) -> int:
+    """Open `count` connections on an async engine and return them to the pool"""
+    connections: List[Any] = []
+    try:
+        for _ in range(count):
+            connections.append(await engine.connect())
+    finally:
+        for connection in connections:
+            await connection.close()
+    return len(connections)
+
+
+async def watch_for_leaks(interval: float) -> None:
+    """Run check_leaks() on every monitored pool every `interval` seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        for stats in list(pool_stats.values()):
+            stats.check_leaks()
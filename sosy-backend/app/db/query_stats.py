@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.metrics import Histogram, registry, route_template
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    """Statements executed and time spent in the database"""
+    count: int = 0
+    seconds: float = 0.0
+    route: Optional[str] = None
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+
+
+# Stats of the request being handled. Threadpool endpoints and run_sync
+# greenlets see the request's context; matching jobs don't (they have none).
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Stats collected by count_queries(), which see every statement in the process
+_captures: List[QueryStats] = []
+_captures_lock = threading.Lock()
+
+http_request_db_queries = registry.register(Histogram(
+    "sosy_http_request_db_queries", "SQL statements per request by route template",
+    ["method", "route"], buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+))
+
+
+def track_queries(engine) -> None:
+    """Count statements and DB time on `engine` (sync or async) and log slow ones"""
+    sync_engine = getattr(engine, 'sync_engine', engine)
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        elapsed = time.perf_counter() - started
+
+        stats = _current.get()
+        if stats is not None:
+            stats.add(elapsed)
+        if _captures:
+            with _captures_lock:
+                for capture in _captures:
+                    capture.add(elapsed)
+
+        if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            logger.warning(
+                "Slow query (%.0f ms) on %s during %s: %s",
+                elapsed * 1000, sync_engine.url.database,
+                stats.route if stats is not None else "background job",
+                statement[:1000]
+            )
+
+    @event.listens_for(sync_engine, 'handle_error')
+    def _error(exception_context):
+        # after_cursor_execute doesn't run for a failed statement
+        started = exception_context.connection.info.get('query_started') if exception_context.connection else None
+        if started:
+            started.pop()
+
+
+def current_route() -> Optional[str]:
+    """Route template of the request being handled, if any"""
+    stats = _current.get()
+    return stats.route if stats is not None else None
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """
+    Count every statement run while the block executes, e.g. to hold an
+    endpoint to a query budget in tests:
+
+        with count_queries() as stats:
+            client.get("/api/v1/events/3")
+        assert stats.count <= 4
+    """
+    stats = QueryStats()
+    with _captures_lock:
+        _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        with _captures_lock:
+            _captures.remove(stats)
+
+
+class QueryStatsMiddleware:
+    """
+    Collects QueryStats per request.
+
+    Every request's statement count goes to the sosy_http_request_db_queries
+    histogram. With DEBUG on, responses carry X-DB-Query-Count and X-DB-Time
+    (milliseconds) - an N+1 shows up as a count that grows with the data.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(route=route_template(scope))
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(stats.count).encode()))
+                headers.append((b"x-db-time", f"{stats.seconds * 1000:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            http_request_db_queries.observe(stats.count, method=scope["method"], route=stats.route)
@@ -1,12 +1,70 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from app.api.deps import require_internal_access
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.grouping_pool import seed_explorer
+from app.core.hashing import HashingPoolBusy, password_hasher
+from app.core.jobs import MATCHING_JOB_INTERRUPTED, job_runner
+from app.core.metrics import MetricsMiddleware, registry
+from app.crud.daylight_personality import daylight_personality
+from app.crud.matching import matching
+from app.crud.search_index import keep_mirrors_synced
+from app.db.base import LocalSessionLocal, prewarm_pools, prewarm_async_pools, slow_plan_capture
+from app.db.pool import pool_snapshot, watch_for_leaks
+from app.db.query_stats import QueryStatsMiddleware
+
+logger = logging.getLogger(__name__)
+
+def fail_interrupted_jobs() -> None:
+    """Fail sessions whose job died with the previous process, so polling ends"""
+    with LocalSessionLocal() as db:
+        for crud in (daylight_personality, matching):
+            session_ids = crud.fail_interrupted_sessions(db, MATCHING_JOB_INTERRUPTED)
+            if session_ids:
+                logger.warning("Marked interrupted matching sessions failed: %s", session_ids)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.DB_POOL_PREWARM:
+        # Open connections before the first requests instead of during them;
+        # a database that is down at boot should not stop the app starting
+        try:
+            await asyncio.to_thread(prewarm_pools)
+        except Exception:
+            logger.warning("Connection pool prewarm failed", exc_info=True)
+        try:
+            await prewarm_async_pools()
+        except Exception:
+            logger.warning("Async connection pool prewarm failed", exc_info=True)
+    if settings.MATCHING_JOB_RECOVER_ON_STARTUP:
+        try:
+            await asyncio.to_thread(fail_interrupted_jobs)
+        except Exception:
+            logger.warning("Failing interrupted matching sessions failed", exc_info=True)
+    leak_watcher = asyncio.create_task(watch_for_leaks(settings.DB_CONNECTION_WARN_SECONDS))
+    mirror_sync = asyncio.create_task(keep_mirrors_synced(settings.SEARCH_INDEX_SYNC_INTERVAL))
+    # Spawn the bcrypt workers before the first login
+    await asyncio.to_thread(password_hasher.warm_up)
+    yield
+    leak_watcher.cancel()
+    mirror_sync.cancel()
+    # Don't block shutdown on running matching jobs; queued ones are cancelled
+    # and their sessions marked failed
+    job_runner.shutdown(wait=False)
+    password_hasher.shutdown(wait=False)
+    seed_explorer.shutdown(wait=False)
+    slow_plan_capture.shutdown()
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
-    openapi_url="/api/v1/openapi.json"
+    openapi_url="/api/v1/openapi.json",
+    lifespan=lifespan
 )
 
 origins = [
@@ -24,12 +82,41 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+app.add_middleware(QueryStatsMiddleware)
+
+# Outermost, so the timings include every other middleware
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router, prefix="/api/v1")
 
+@app.exception_handler(HashingPoolBusy)
+async def hashing_pool_busy_handler(request: Request, exc: HashingPoolBusy):
+    # Login burst beyond the hashing queue: shed load instead of queueing
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"}
+    )
+
 @app.get("/")
 def root():
     return {"message": f"Welcome to {settings.APP_NAME}"}
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "version": settings.VERSION}
\ No newline at end of file
+    return {"status": "healthy", "version": settings.VERSION}
+
+@app.get("/health/db", dependencies=[Depends(require_internal_access)])
+def db_pool_health():
+    """Connection pool gauges (in use, idle, overflow) and checkout wait totals per engine"""
+    return pool_snapshot()
+
+@app.get("/health/hashing", dependencies=[Depends(require_internal_access)])
+def hashing_pool_health():
+    """Password hashing pool: calls in flight, rejected calls and time spent"""
+    return password_hasher.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_internal_access)])
+def metrics():
+    """Prometheus scrape endpoint: per-route latency/throughput, in-flight requests, matching runs, pools"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
\ No newline at end of file
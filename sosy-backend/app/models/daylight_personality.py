@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, Boolean, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, Boolean, ForeignKey, UniqueConstraint, LargeBinary
+from sqlalchemy.dialects import mysql
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.db.base import Base
 
 class DaylightPersonalityTest(Base):
@@ -67,6 +68,15 @@ class DaylightMatchingSession(Base):
     total_participants = Column(Integer, nullable=False, server_default='0')
     total_tables = Column(Integer, nullable=False, server_default='0')
     average_match_score = Column(Float, nullable=True)
+    progress = Column(JSON, nullable=True, comment='Last job progress: tier, tables formed, participants remaining')
+    timings = Column(JSON, nullable=True, comment='Per-phase spans of the run: phase, seconds, pairs, tables')
+    
+    # Serialized MatchingSessionResult, written once the session completes
+    result_snapshot = deferred(Column(
+        LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql'),
+        nullable=True, comment='orjson-encoded MatchingSessionResult'
+    ))
+    result_etag = Column(String(64), nullable=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
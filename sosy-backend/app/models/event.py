@@ -27,6 +27,17 @@ class WooCommerceOrderItem(Base):
     
     __table_args__ = {'extend_existing': True}
 
+class WooCommerceOrderItemMeta(Base):
+    """WooCommerce Order Item Meta Model - _product_id links a line item to its product"""
+    __tablename__ = "wprq_woocommerce_order_itemmeta"
+    
+    meta_id = Column(BigInteger, primary_key=True)
+    order_item_id = Column(BigInteger, nullable=False, index=True)
+    meta_key = Column(String(255), index=True)
+    meta_value = Column(Text)
+    
+    __table_args__ = {'extend_existing': True}
+
 class WooCommerceOrder(Base):
     """WooCommerce Orders Model"""
     __tablename__ = "wprq_wc_orders"
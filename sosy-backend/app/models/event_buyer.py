@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Numeric, BigInteger, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class EventBuyerOrder(Base):
+    """Local copy of the WooCommerce orders for an event (materialized from WordPress)"""
+    __tablename__ = "event_buyer_orders"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(BigInteger, nullable=False, index=True)  # wprq_posts.ID (product)
+    order_id = Column(BigInteger, nullable=False)
+    
+    # Buyer (wprq_users)
+    user_id = Column(BigInteger, nullable=False)
+    user_login = Column(String(60))
+    user_email = Column(String(100))
+    display_name = Column(String(250))
+    
+    # Order (wprq_wc_orders) - status is revalidated on every sync
+    order_status = Column(String(20))
+    total_amount = Column(Numeric(10, 2))
+    payment_method_title = Column(Text)
+    date_created_gmt = Column(DateTime)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('event_id', 'order_id', name='uq_event_buyer_orders_event_order'),
+    )
+
+class EventBuyerSync(Base):
+    """Incremental sync state per event: orders created before the watermark are already copied"""
+    __tablename__ = "event_buyer_syncs"
+    
+    event_id = Column(BigInteger, primary_key=True)
+    last_order_created_gmt = Column(DateTime)  # Watermark on wprq_wc_orders.date_created_gmt
+    synced_at = Column(DateTime)  # UTC
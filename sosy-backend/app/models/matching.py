@@ -56,7 +56,9 @@ class MatchingSession(Base):
     
     # Session info
     session_date = Column(DateTime(timezone=True))
-    status = Column(String(20), default='pending')  # pending, completed, cancelled
+    status = Column(String(20), default='pending')  # pending, processing, completed, failed, cancelled
+    progress = Column(JSON)  # Last job progress: phase, groups formed, participants remaining
+    timings = Column(JSON)  # Per-phase spans of the run: phase, seconds, pairs, tables
     
     # Matching parameters
     target_group_size = Column(Integer)  # 4 or 6
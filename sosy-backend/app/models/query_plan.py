@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, JSON, UniqueConstraint
+from app.db.base import Base
+
+class SlowQueryPlan(Base):
+    """EXPLAIN output and timings of a slow WordPress statement, one row per query fingerprint"""
+    __tablename__ = "slow_query_plans"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    fingerprint = Column(String(40), nullable=False)  # sha1 of the normalized statement
+    statement = Column(Text, nullable=False)  # normalized: whitespace collapsed, IN lists as IN (?)
+    last_route = Column(String(255))
+    
+    # Timings of the slow executions (only those over WP_EXPLAIN_THRESHOLD_MS)
+    calls = Column(Integer, nullable=False, default=0)
+    total_ms = Column(Float, nullable=False, default=0.0)
+    max_ms = Column(Float, nullable=False, default=0.0)
+    last_ms = Column(Float)
+    
+    # Latest EXPLAIN, refreshed every WP_EXPLAIN_REFRESH_MINUTES
+    plan = Column(JSON)
+    full_scan_tables = Column(String(500))  # comma separated; tables read with type=ALL
+    explained_at = Column(DateTime)
+    
+    first_seen = Column(DateTime)
+    last_seen = Column(DateTime)
+    
+    __table_args__ = (
+        UniqueConstraint('fingerprint', name='uq_slow_query_plans_fingerprint'),
+    )
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, BigInteger, Index
+from sqlalchemy.dialects import mysql
+from app.db.base import Base
+
+# post_content is LONGTEXT in WordPress
+LongText = Text().with_variant(mysql.LONGTEXT(), 'mysql')
+
+class EventSearchDocument(Base):
+    """Local mirror of product posts for full-text search (same columns as wprq_posts)"""
+    __tablename__ = "event_search_documents"
+    
+    ID = Column(BigInteger, primary_key=True, autoincrement=False)
+    post_title = Column(LongText)
+    post_content = Column(LongText)
+    post_excerpt = Column(LongText)
+    post_modified = Column(DateTime)
+    
+    __table_args__ = (
+        Index('ft_event_search_documents', 'post_title', 'post_content', 'post_excerpt', mysql_prefix='FULLTEXT'),
+    )
+
+class WPUserSearchDocument(Base):
+    """Local mirror of WordPress users for full-text search (same columns as wprq_users)"""
+    __tablename__ = "wp_user_search_documents"
+    
+    ID = Column(BigInteger, primary_key=True, autoincrement=False)
+    user_login = Column(String(60))
+    user_email = Column(String(100))
+    display_name = Column(String(250))
+    user_nicename = Column(String(50))
+    user_registered = Column(DateTime)
+    
+    __table_args__ = (
+        Index('ft_wp_user_search_documents', 'user_login', 'user_email', 'display_name', 'user_nicename', mysql_prefix='FULLTEXT'),
+    )
+
+class SearchIndexSync(Base):
+    """Incremental sync state per search mirror"""
+    __tablename__ = "search_index_syncs"
+    
+    name = Column(String(50), primary_key=True)  # events, wp_users
+    watermark = Column(DateTime)  # post_modified / user_registered of the newest copied row
+    synced_at = Column(DateTime)  # UTC
+    full_synced_at = Column(DateTime)  # UTC, last full rebuild (picks up edits and deletes)
@@ -1,6 +1,7 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from pydantic import BaseModel, Field
+from app.schemas.matching import MatchingPhaseTiming
 
 # ==================== Personality Test Schemas ====================
 
@@ -124,6 +125,7 @@ class MatchingSessionResult(BaseModel):
     # NEW: Algorithm insights
     optimal_size_used: int = Field(description="Size yang paling banyak digunakan (3/4/5)")
     size_distribution: Dict[int, int] = Field(description="Distribusi ukuran grup {3: 2, 5: 1}")
+    timings: Optional[List[MatchingPhaseTiming]] = Field(None, description="Per-phase spans of the run (sessions matched before timings were recorded have none)")
     
     class Config:
         from_attributes = True
@@ -141,4 +143,13 @@ class MatchingSessionSummary(BaseModel):
     completed_at: Optional[datetime]
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class MatchingJobStatus(BaseModel):
+    """Status of a matching session run as a background job"""
+    session_id: int
+    status: str = Field(description="pending, processing, completed, failed")
+    progress: Optional[Dict[str, Any]] = Field(None, description="tier, tables_formed, participants_remaining")
+    total_participants: int
+    total_tables: int
+    completed_at: Optional[datetime] = None
\ No newline at end of file
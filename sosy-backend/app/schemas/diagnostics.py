@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import Any, List, Optional
+from datetime import datetime
+
+class SlowQueryPlan(BaseModel):
+    fingerprint: str
+    statement: str
+    last_route: Optional[str] = None
+    calls: int
+    total_ms: float
+    max_ms: float
+    avg_ms: float
+    last_ms: Optional[float] = None
+    plan: Optional[List[Any]] = None
+    full_scan_tables: List[str] = []
+    explained_at: Optional[datetime] = None
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+
+class SlowQueryPlanList(BaseModel):
+    enabled: bool
+    threshold_ms: float
+    dropped: int
+    data: List[SlowQueryPlan]
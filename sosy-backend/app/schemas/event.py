@@ -20,12 +20,13 @@ class Event(EventBase):
 
 class EventListResponse(BaseModel):
     data: List[Event]
-    total: int
-    page: int
+    total: Optional[int] = None  # Cursor mode: only with include_total
+    page: Optional[int] = None  # Offset mode only
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None  # Cursor mode: pass as ?cursor= for the next page
 
 # Event Buyer Schemas
 class EventBuyerBase(BaseModel):
@@ -64,6 +64,13 @@ class MatchingSession(BaseModel):
     class Config:
         from_attributes = True
 
+class MatchingJobStatus(BaseModel):
+    """Status of a matching session run as a background job"""
+    session_id: int
+    event_id: int
+    status: str = Field(..., description="pending, processing, completed, failed")
+    progress: Optional[Dict[str, Any]] = Field(None, description="phase, groups_formed, participants_remaining")
+
 # Matching Group Schemas
 class GroupMember(BaseModel):
     user_id: int
@@ -106,6 +113,13 @@ class MatchScoreDetail(BaseModel):
     matching_criteria_count: int
 
 # Matching Result
+class MatchingPhaseTiming(BaseModel):
+    """One phase of a matching run (scoring, a grouping tier, persisting)"""
+    phase: str
+    seconds: float
+    pairs: int = Field(0, description="Pair scores / candidate averages evaluated")
+    tables: int = Field(0, description="Tables (groups) formed")
+
 class MatchingResult(BaseModel):
     session: MatchingSession
     groups: List[MatchingGroup]
@@ -113,6 +127,7 @@ class MatchingResult(BaseModel):
     matched_users: int
     unmatched_users: int
     average_group_score: float
+    timings: Optional[List[MatchingPhaseTiming]] = Field(None, description="Per-phase spans of the run (sessions matched before timings were recorded have none)")
 
 # Energy Feedback
 class EnergyFeedbackCreate(BaseModel):
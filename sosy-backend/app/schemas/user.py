@@ -33,12 +33,13 @@ class User(UserInDB):
 
 class UserListResponse(BaseModel):
     data: List[User]
-    total: int
-    page: int
+    total: Optional[int] = None  # Cursor mode: only with include_total
+    page: Optional[int] = None  # Offset mode only
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None  # Cursor mode: pass as ?cursor= for the next page
 
 # WordPress User Schemas
 class WordPressUserBase(BaseModel):
@@ -58,12 +59,13 @@ class WordPressUser(WordPressUserBase):
 
 class WordPressUserListResponse(BaseModel):
     data: List[WordPressUser]
-    total: int
-    page: int
+    total: Optional[int] = None  # Cursor mode: only with include_total
+    page: Optional[int] = None  # Offset mode only
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None  # Cursor mode: pass as ?cursor= for the next page
 
 # Auth Schemas
 class Token(BaseModel):
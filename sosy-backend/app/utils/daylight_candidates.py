@@ -0,0 +1,148 @@
+from typing import List, Optional, Sequence
+import numpy as np
+
+from app.utils.daylight_matrix import DaylightMatchMatrix
+
+# Rows scored per block() call while building the graph
+_ROW_BLOCK = 256
+
+# People scored per participant, as a multiple of k
+_CANDIDATE_FACTOR = 8
+
+
+class CandidateGraph:
+    """
+    Top-K partners per participant, for cohorts too large for the dense
+    score matrix.
+
+    70% of the Daylight score is the cosine of the E/O/S/A vectors, and the
+    lifestyle / comfort bonuses add at most 6 points, so someone's best
+    partners are their nearest neighbours on the unit sphere. Unit vectors
+    are bucketed into a 4-D grid (cell width picked so a cell holds about
+    K/4 people); each participant is scored exactly, with
+    DaylightMatchMatrix.block, against the people in the nearest cells
+    (about 8K of them) and keeps the best `k`. Building it costs O(n * K)
+    scores instead of O(n^2).
+
+    With `participants` the graph covers only them (e.g. those left
+    unseated, whose best partners may be gone). `neighbours` / `scores` are
+    (n, k) arrays indexed by participant, best score first (lowest index on
+    ties); `scored_pairs` counts the scores computed.
+    """
+
+    def __init__(
+        self,
+        matrix: DaylightMatchMatrix,
+        k: int,
+        participants: Optional[Sequence[int]] = None
+    ):
+        self.matrix = matrix
+        if participants is None:
+            self.participants = np.arange(matrix.size)
+        else:
+            self.participants = np.asarray(participants, dtype=np.intp)
+        size = len(self.participants)
+        self.k = max(min(k, size - 1), 0)
+        self.neighbours = np.zeros((matrix.size, self.k), dtype=np.int32)
+        self.scores = np.zeros((matrix.size, self.k), dtype=np.float32)
+        self.scored_pairs = 0
+        if self.k == 0:
+            return
+
+        unit_traits = matrix.unit_traits[self.participants]
+        width = _cell_width(unit_traits, self.k)
+        cells = np.floor((unit_traits + 1.0) / width).astype(np.int64)
+        keys, cell_of, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+        cell_of = cell_of.reshape(-1)
+        order = np.argsort(cell_of, kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+
+        wanted = min(_CANDIDATE_FACTOR * self.k, size - 1)
+        for cell in range(len(keys)):
+            rows = order[bounds[cell]:bounds[cell + 1]]
+            candidates = self._candidates(keys, counts, cell_of, cell, wanted)
+            for start in range(0, len(rows), _ROW_BLOCK):
+                self._keep_best(
+                    self.participants[rows[start:start + _ROW_BLOCK]],
+                    self.participants[candidates]
+                )
+
+    def block(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Exact match scores between `rows` and `cols` (see DaylightMatchMatrix.block)"""
+        return self.matrix.block(rows, cols)
+
+    def above(self, participant: int, threshold: float, inclusive: bool = True) -> np.ndarray:
+        """Candidates scoring >= threshold (> with inclusive=False), best first"""
+        row = self.scores[participant].astype(np.float64)
+        passing = row >= threshold if inclusive else row > threshold
+        # Rows are sorted, so the passing candidates are a prefix
+        return self.neighbours[participant, :int(np.count_nonzero(passing))]
+
+    def _candidates(
+        self,
+        keys: np.ndarray,
+        counts: np.ndarray,
+        cell_of: np.ndarray,
+        cell: int,
+        wanted: int
+    ) -> np.ndarray:
+        """Everyone in the cells nearest `cell` (Chebyshev rings), more than `wanted` people (positions in participants)"""
+        distance = np.abs(keys - keys[cell]).max(axis=1)
+        ring = np.argsort(distance, kind='stable')
+        reached = np.cumsum(counts[ring])
+        enough = int(np.searchsorted(reached, wanted, side='right'))
+        if enough >= len(ring):
+            return np.arange(len(cell_of))
+        # Whole rings only, so the result doesn't depend on the cell order
+        nearby = distance <= distance[ring[enough]]
+        return np.flatnonzero(nearby[cell_of])
+
+    def _keep_best(self, rows: np.ndarray, candidates: np.ndarray) -> None:
+        scores = self.matrix.block(rows, candidates)
+        scores[rows[:, None] == candidates[None, :]] = -np.inf
+        self.scored_pairs += scores.size
+
+        top = np.argpartition(-scores, self.k - 1, axis=1)[:, :self.k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        top_indices = candidates[top]
+        # Best first, lowest index on ties
+        order = np.lexsort((top_indices, -top_scores), axis=1)
+        self.neighbours[rows] = np.take_along_axis(top_indices, order, axis=1)
+        self.scores[rows] = np.take_along_axis(top_scores, order, axis=1)
+
+
+def table_chunks(
+    matrix: DaylightMatchMatrix,
+    groups: List[List[int]],
+    max_participants: int = 2000
+) -> List[List[int]]:
+    """
+    Split tables into chunks of at most `max_participants` seated people,
+    dealt by table score so every chunk mixes weak and strong tables (the
+    weak ones need someone to swap with). Returns lists of indices into
+    `groups`.
+    """
+    if not groups:
+        return []
+    seated = sum(len(group) for group in groups)
+    count = -(-seated // max_participants)
+    averages = np.array([matrix.group_average(group) for group in groups])
+    order = np.argsort(averages, kind='stable')
+    return [order[c::count].tolist() for c in range(count)]
+
+
+def _cell_width(unit_traits: np.ndarray, k: int) -> float:
+    """
+    Grid cell width giving about k / 4 people per occupied cell (identical
+    vectors always share a cell, so fewer cells when there are duplicates)
+    """
+    wanted_cells = max(len(unit_traits) * 4 // k, 1)
+    low, high = 1e-3, 2.0
+    for _ in range(12):
+        width = (low * high) ** 0.5
+        occupied = len(np.unique(np.floor((unit_traits + 1.0) / width).astype(np.int64), axis=0))
+        if occupied > wanted_cells:
+            low = width
+        else:
+            high = width
+    return high
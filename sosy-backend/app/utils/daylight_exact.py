@@ -0,0 +1,152 @@
+import bisect
+import time
+from itertools import combinations
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+
+class _Timeout(Exception):
+    pass
+
+
+def solve_max_min(
+    scores: np.ndarray,
+    time_limit: float,
+    min_size: int = 3,
+    max_size: int = 5,
+    count_pairs: Optional[Callable[[int], None]] = None
+) -> Optional[List[List[int]]]:
+    """
+    Exact seating for small cohorts: split every participant into groups of
+    min_size..max_size so that the lowest group average is as high as
+    possible.
+
+    All groups are scored up front (55k of them for 24 people). The best
+    reachable minimum is found by binary search over those averages; each
+    step is an exact-cover search that always seats the lowest unseated
+    participant next (participants are relabelled hardest-to-seat first),
+    tries their groups best first and remembers seated sets that cannot be
+    completed. A seating found jumps the search past its own minimum. For
+    24 people this takes well under a second.
+
+    Returns groups as lists of participant indices, or None when the cohort
+    is too small or `time_limit` seconds run out before any seating is
+    found (the caller falls back to the greedy tiers then). If time runs
+    out later, the best seating found so far is returned.
+    """
+    n = scores.shape[0]
+    # Groups are int64 bitmasks of their members
+    if n < min_size or n > 62:
+        return None
+
+    deadline = time.perf_counter() + time_limit
+    groups, pair_count = _score_groups(scores, min_size, max_size)
+    if count_pairs is not None:
+        count_pairs(pair_count)
+
+    # Nobody can sit at a table better than their own best group
+    best_for = np.full(n, -np.inf)
+    for averages, members in groups:
+        for column in members.T:
+            np.maximum.at(best_for, column, averages)
+    ceiling = float(best_for.min())
+
+    # The search seats the lowest index first: relabel so that participants
+    # with the weakest best group (the hardest to seat) come first
+    order = np.argsort(best_for, kind='stable')
+    if not np.array_equal(order, np.arange(n)):
+        groups, _ = _score_groups(scores[np.ix_(order, order)], min_size, max_size)
+
+    # Per participant, the groups in which they are the lowest index, best first
+    by_lowest: List[List[Tuple[float, int]]] = [[] for _ in range(n)]
+    for averages, members in groups:
+        masks = (np.int64(1) << members.astype(np.int64)).sum(axis=1)
+        for average, mask, lowest in zip(averages.tolist(), masks.tolist(), members[:, 0].tolist()):
+            by_lowest[lowest].append((average, mask))
+    for candidates in by_lowest:
+        candidates.sort(key=lambda candidate: -candidate[0])
+    negated = [[-average for average, _ in candidates] for candidates in by_lowest]
+
+    levels = np.unique(np.concatenate([averages for averages, _ in groups]))
+    levels = levels[levels <= ceiling]
+
+    best = None
+    low, high = 0, len(levels) - 1
+    try:
+        while low <= high:
+            middle = (low + high) // 2
+            cover = _exact_cover(n, by_lowest, negated, float(levels[middle]), min_size, deadline)
+            if cover is not None:
+                best = cover
+                # The seating found may beat the level asked for; skip past it
+                low = int(np.searchsorted(levels, min(average for average, _ in cover), side='right'))
+            else:
+                high = middle - 1
+    except _Timeout:
+        pass
+
+    if best is None:
+        return None
+    return [[int(order[i]) for i in range(n) if mask >> i & 1] for _, mask in best]
+
+
+def _score_groups(
+    scores: np.ndarray,
+    min_size: int,
+    max_size: int
+) -> Tuple[List[Tuple[np.ndarray, np.ndarray]], int]:
+    """(averages, members) per group size for every group, and the pair scores summed"""
+    n = scores.shape[0]
+    scores = scores.astype(np.float64)
+    groups = []
+    pair_count = 0
+    for size in range(min_size, min(max_size, n) + 1):
+        members = np.array(list(combinations(range(n), size)), dtype=np.intp)
+        total = np.zeros(len(members))
+        for a, b in combinations(range(size), 2):
+            total += scores[members[:, a], members[:, b]]
+        pairs = size * (size - 1) // 2
+        groups.append((total / pairs, members))
+        pair_count += len(members) * pairs
+    return groups, pair_count
+
+
+def _exact_cover(
+    n: int,
+    by_lowest: List[List[Tuple[float, int]]],
+    negated: List[List[float]],
+    threshold: float,
+    min_size: int,
+    deadline: float
+) -> Optional[List[Tuple[float, int]]]:
+    """(average, mask) of groups seating everyone with every average >= threshold, or None"""
+    full = (1 << n) - 1
+    limits = [bisect.bisect_right(values, -threshold) for values in negated]
+    failed = set()
+    calls = 0
+
+    def search(seated: int) -> Optional[List[Tuple[float, int]]]:
+        nonlocal calls
+        if seated == full:
+            return []
+        if seated in failed:
+            return None
+        calls += 1
+        if calls % 1024 == 0 and time.perf_counter() > deadline:
+            raise _Timeout()
+
+        lowest = (~seated & (seated + 1)).bit_length() - 1
+        for average, mask in by_lowest[lowest][:limits[lowest]]:
+            if mask & seated:
+                continue
+            # Fewer than min_size people left over could never be seated
+            if 0 < n - (seated | mask).bit_count() < min_size:
+                continue
+            rest = search(seated | mask)
+            if rest is not None:
+                return [(average, mask)] + rest
+
+        failed.add(seated)
+        return None
+
+    return search(0)
@@ -0,0 +1,389 @@
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from app.utils.daylight_candidates import CandidateGraph
+
+# Smallest change in a group average that counts as an improvement
+_EPSILON = 1e-9
+
+
+def form_groups(
+    scores: np.ndarray,
+    available_indices: Sequence[int],
+    threshold: float,
+    inclusive: bool = True,
+    seed_count: int = 8,
+    size_bonus: float = 5.0,
+    min_size: int = 3,
+    max_size: int = 5,
+    count_pairs: Optional[Callable[[int], None]] = None
+) -> List[List[int]]:
+    """
+    Seed-and-grow grouping over a dense score matrix.
+
+    Same decisions as the original greedy seed search: the first
+    `seed_count` available participants are tried as seeds, each group grows
+    by the candidate with the best average score to the current members, and
+    the best group over sizes 5 > 4 > 3 (with `size_bonus` per extra seat) is
+    taken. Instead of re-averaging every candidate against the whole group,
+    each seed keeps a running "sum of scores to current group" vector that is
+    updated in O(n) per added member, and the next member is an argmax.
+
+    A candidate / group qualifies when its average is >= threshold
+    (`inclusive=True`) or > threshold (`inclusive=False`).
+
+    `count_pairs`, if given, is called once with the number of
+    candidate-to-group averages evaluated.
+
+    Returns groups as lists of participant indices, in the order formed.
+    """
+    return _seed_and_grow(
+        lambda seed, alive, target_size: _grow_group(scores, seed, alive, target_size, threshold, inclusive),
+        scores.shape[0], available_indices, threshold, inclusive,
+        seed_count, size_bonus, min_size, max_size, count_pairs
+    )
+
+
+def form_groups_on_graph(
+    graph: CandidateGraph,
+    available_indices: Sequence[int],
+    threshold: float,
+    inclusive: bool = True,
+    seed_count: int = 8,
+    size_bonus: float = 5.0,
+    min_size: int = 3,
+    max_size: int = 5,
+    count_pairs: Optional[Callable[[int], None]] = None
+) -> List[List[int]]:
+    """
+    form_groups() without the dense matrix: a growing group only considers
+    its members' graph candidates that pass the threshold on their own (a
+    candidate can't average above the threshold without such a pair), and
+    scores them against all members with graph.block(). Each step costs
+    O(group size * K) instead of O(n).
+    """
+    n = graph.neighbours.shape[0]
+    in_pool = np.zeros(n, dtype=bool)
+    return _seed_and_grow(
+        lambda seed, alive, target_size: _grow_group_on_graph(
+            graph, seed, alive, in_pool, target_size, threshold, inclusive
+        ),
+        n, available_indices, threshold, inclusive,
+        seed_count, size_bonus, min_size, max_size, count_pairs
+    )
+
+
+def _seed_and_grow(
+    grow: Callable[[int, np.ndarray, int], Tuple[List[int], Dict[int, float], int]],
+    n: int,
+    available_indices: Sequence[int],
+    threshold: float,
+    inclusive: bool,
+    seed_count: int,
+    size_bonus: float,
+    min_size: int,
+    max_size: int,
+    count_pairs: Optional[Callable[[int], None]]
+) -> List[List[int]]:
+    """The seed / size selection of form_groups(); `grow(seed, alive, target_size)` builds one group"""
+    alive = np.zeros(n, dtype=bool)
+    alive[np.asarray(list(available_indices), dtype=np.intp)] = True
+
+    groups = []
+    builds: Dict[int, Tuple[List[int], Dict[int, float], int]] = {}
+    evaluated = 0
+    while True:
+        current_available = np.flatnonzero(alive)
+        if len(current_available) < min_size:
+            break
+
+        # Determine possible sizes (prefer 5 > 4 > 3)
+        possible_sizes = [
+            size for size in range(max_size, min_size - 1, -1)
+            if size <= len(current_available)
+        ]
+
+        # A greedy build is deterministic, so the group grown for size 3 or 4
+        # is a prefix of the one grown for the largest size - grow once per seed.
+        # Seating others never changes a build (its picks stay the best
+        # left), so builds are kept until one of their members is seated
+        seeds = [int(seed) for seed in current_available[:seed_count]]
+        for seed in seeds:
+            if seed not in builds:
+                builds[seed] = grow(seed, alive, possible_sizes[0])
+                evaluated += builds[seed][2]
+
+        best_group = None
+        best_score = -1
+        for target_size in possible_sizes:
+            for members, prefix_averages, _ in (builds[seed] for seed in seeds):
+                length = min(target_size, len(members))
+                if length < min_size:
+                    continue
+
+                avg_score = prefix_averages[length]
+                if not _passes(avg_score, threshold, inclusive):
+                    continue
+
+                weighted_score = avg_score + (length - min_size) * size_bonus
+                if weighted_score > best_score:
+                    best_score = avg_score
+                    best_group = members[:length]
+
+        if best_group is None:
+            break
+
+        groups.append(best_group)
+        alive[best_group] = False
+        builds = {
+            seed: build for seed, build in builds.items()
+            if alive[build[0]].all()
+        }
+
+    if count_pairs is not None:
+        count_pairs(evaluated)
+    return groups
+
+
+def _grow_group(
+    scores: np.ndarray,
+    seed: int,
+    alive: np.ndarray,
+    target_size: int,
+    threshold: float,
+    inclusive: bool
+) -> Tuple[List[int], Dict[int, float], int]:
+    """
+    Grow one group from `seed`; returns members, the group average at each
+    length and how many candidate averages were evaluated
+    """
+    members = [seed]
+    candidates = alive.copy()
+    candidates[seed] = False
+    remaining = int(np.count_nonzero(candidates))
+    evaluated = 0
+
+    # Sum of scores from every participant to the current members
+    affinity = scores[seed].astype(np.float64)
+    pair_sum = 0.0
+    prefix_averages = {1: 0.0}
+
+    while len(members) < target_size:
+        evaluated += remaining
+        averages = affinity / len(members)
+        eligible = candidates & (averages >= threshold if inclusive else averages > threshold)
+        if not eligible.any():
+            break
+
+        # argmax returns the lowest index on ties, matching the old scan order
+        best_next = int(np.argmax(np.where(eligible, averages, -np.inf)))
+
+        pair_sum += affinity[best_next]
+        members.append(best_next)
+        candidates[best_next] = False
+        remaining -= 1
+        affinity += scores[best_next]
+
+        size = len(members)
+        prefix_averages[size] = pair_sum / (size * (size - 1) / 2)
+
+    return members, prefix_averages, evaluated
+
+
+def _grow_group_on_graph(
+    graph: CandidateGraph,
+    seed: int,
+    alive: np.ndarray,
+    in_pool: np.ndarray,
+    target_size: int,
+    threshold: float,
+    inclusive: bool
+) -> Tuple[List[int], Dict[int, float], int]:
+    """
+    _grow_group() over the members' graph candidates. Members are
+    tombstoned in `alive` while the group grows; `alive` and the all-False
+    scratch bitmap `in_pool` are restored on return.
+    """
+    members = [seed]
+    pool = graph.above(seed, threshold, inclusive)
+    in_pool[pool] = True
+    alive[seed] = False
+    evaluated = 0
+    pair_sum = 0.0
+    prefix_averages = {1: 0.0}
+
+    while len(members) < target_size:
+        candidates = pool[alive[pool]]
+        evaluated += len(candidates)
+        if not len(candidates):
+            break
+
+        affinity = graph.block(np.asarray(members), candidates).sum(axis=0, dtype=np.float64)
+        averages = affinity / len(members)
+        eligible = averages >= threshold if inclusive else averages > threshold
+        if not eligible.any():
+            break
+
+        # Lowest index on ties, as in _grow_group
+        best = np.flatnonzero(eligible & (averages == averages[eligible].max()))
+        best = best[np.argmin(candidates[best])]
+        best_next = int(candidates[best])
+
+        pair_sum += affinity[best]
+        members.append(best_next)
+        alive[best_next] = False
+        added = graph.above(best_next, threshold, inclusive)
+        added = added[~in_pool[added]]
+        in_pool[added] = True
+        pool = np.concatenate([pool, added])
+
+        size = len(members)
+        prefix_averages[size] = pair_sum / (size * (size - 1) / 2)
+
+    alive[members] = True
+    in_pool[pool] = False
+    return members, prefix_averages, evaluated
+
+
+def _passes(score: float, threshold: float, inclusive: bool) -> bool:
+    return score >= threshold if inclusive else score > threshold
+
+
+def refine_groups(
+    scores: np.ndarray,
+    groups: List[List[int]],
+    cpu_budget: float,
+    min_size: int = 3,
+    max_size: int = 5,
+    count_pairs: Optional[Callable[[int], None]] = None
+) -> List[List[int]]:
+    """
+    Local search over formed groups: member swaps and single moves between
+    two groups.
+
+    A change is kept when it raises the lowest group average, or leaves the
+    lowest average where it is and raises the mean - a strict improvement
+    of (minimum, mean), so the search cannot cycle. The averages after a
+    change come from the two groups' members' affinities, O(group size)
+    per candidate, not from re-scoring the groups.
+
+    Groups are visited weakest first, each against every other group. The
+    search stops after a pass without improvement or once `cpu_budget`
+    seconds of this thread's CPU time are used. Returns the refined groups
+    in the same order, sizes kept within min_size..max_size.
+    """
+    groups = [list(group) for group in groups]
+    if cpu_budget <= 0 or len(groups) < 2:
+        return groups
+
+    deadline = time.thread_time() + cpu_budget
+    sums = [_pair_sum(scores, group) for group in groups]
+    averages = np.array([total / _pairs(len(group)) for total, group in zip(sums, groups)])
+    lowest = _lowest(averages)
+    evaluated = 0
+
+    improved = True
+    while improved:
+        improved = False
+        for g in np.argsort(averages, kind='stable'):
+            for h in range(len(groups)):
+                if h == g:
+                    continue
+                if time.thread_time() >= deadline:
+                    improved = False
+                    break
+
+                others_min = next((averages[t] for t in lowest if t != g and t != h), np.inf)
+                change, count = _best_change(
+                    scores, groups[g], groups[h], sums[g], sums[h],
+                    averages[g] + averages[h], averages[lowest[0]], others_min,
+                    min_size, max_size
+                )
+                evaluated += count
+                if change is None:
+                    continue
+
+                groups[g], groups[h] = change
+                for t in (g, h):
+                    sums[t] = _pair_sum(scores, groups[t])
+                    averages[t] = sums[t] / _pairs(len(groups[t]))
+                lowest = _lowest(averages)
+                improved = True
+            else:
+                continue
+            break
+
+    if count_pairs is not None:
+        count_pairs(evaluated)
+    return groups
+
+
+def _best_change(
+    scores: np.ndarray,
+    group_g: List[int],
+    group_h: List[int],
+    sum_g: float,
+    sum_h: float,
+    old_total: float,
+    current_min: float,
+    others_min: float,
+    min_size: int,
+    max_size: int
+) -> Tuple[Optional[Tuple[List[int], List[int]]], int]:
+    """Best improving swap or move between two groups (None if there is none) and candidates evaluated"""
+    k, m = len(group_g), len(group_h)
+    block = scores[np.ix_(group_g + group_h, group_g + group_h)].astype(np.float64)
+    affinity_g = block[:, :k].sum(axis=1)
+    affinity_h = block[:, k:].sum(axis=1)
+
+    # Swap a (row a < k) with b (row k + b): each leaves its group, joins the other
+    new_g = [((sum_g - affinity_g[:k, None] + affinity_g[None, k:] - block[:k, k:]) / _pairs(k)).ravel()]
+    new_h = [((sum_h - affinity_h[None, k:] + affinity_h[:k, None] - block[:k, k:]) / _pairs(m)).ravel()]
+    moves_g = k > min_size and m < max_size
+    moves_h = m > min_size and k < max_size
+    if moves_g:
+        new_g.append((sum_g - affinity_g[:k]) / _pairs(k - 1))
+        new_h.append((sum_h + affinity_h[:k]) / _pairs(m + 1))
+    if moves_h:
+        new_g.append((sum_g + affinity_g[k:]) / _pairs(k + 1))
+        new_h.append((sum_h - affinity_h[k:]) / _pairs(m - 1))
+    new_g = np.concatenate(new_g)
+    new_h = np.concatenate(new_h)
+
+    new_min = np.minimum(np.minimum(new_g, new_h), others_min)
+    gain = new_g + new_h - old_total
+    raises_min = new_min > current_min + _EPSILON
+    if raises_min.any():
+        index = int(np.argmax(np.where(raises_min, new_min, -np.inf)))
+    else:
+        raises_mean = (new_min >= current_min) & (gain > _EPSILON)
+        if not raises_mean.any():
+            return None, len(new_g)
+        index = int(np.argmax(np.where(raises_mean, gain, -np.inf)))
+
+    group_g, group_h = list(group_g), list(group_h)
+    if index < k * m:
+        a, b = divmod(index, m)
+        group_g[a], group_h[b] = group_h[b], group_g[a]
+    else:
+        index -= k * m
+        if moves_g and index < k:
+            group_h.append(group_g.pop(index))
+        else:
+            index -= k if moves_g else 0
+            group_g.append(group_h.pop(index))
+    return (group_g, group_h), len(new_g)
+
+
+def _pair_sum(scores: np.ndarray, group: List[int]) -> float:
+    idx = np.asarray(group, dtype=np.intp)
+    return float(np.triu(scores[np.ix_(idx, idx)], k=1).sum(dtype=np.float64))
+
+
+def _pairs(size: int) -> float:
+    return size * (size - 1) / 2
+
+
+def _lowest(averages: np.ndarray) -> List[int]:
+    """Indices of the three lowest averages, lowest first"""
+    return [int(t) for t in np.argsort(averages, kind='stable')[:3]]
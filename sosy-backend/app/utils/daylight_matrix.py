@@ -0,0 +1,73 @@
+from typing import List, Sequence
+import numpy as np
+
+from app.models.daylight_personality import DaylightPersonalityTest
+
+
+class DaylightMatchMatrix:
+    """
+    Dense pairwise Daylight match scores for a cohort.
+
+    Loads the E/O/S/A raw vectors plus l_normalized / c_normalized into
+    arrays and evaluates the Daylight formula for all pairs at once:
+
+        0.70 * cos_normalized + 0.15 * L_bonus + 0.15 * C_bonus
+
+    Only the total score is kept (float32). The full per-pair breakdown is
+    still produced by CRUDDaylightPersonality.calculate_match_score, but
+    only for pairs that are actually seated together.
+
+    With dense=False the all-pairs matrix isn't built (`scores` is None);
+    scores come from block() on demand (see CandidateGraph).
+    """
+
+    def __init__(self, tests: Sequence[DaylightPersonalityTest], dense: bool = True):
+        self.size = len(tests)
+
+        self.traits = np.array(
+            [[t.e_raw, t.o_raw, t.s_raw, t.a_raw] for t in tests],
+            dtype=np.float32
+        ).reshape(self.size, 4)
+        self.l_normalized = np.array([t.l_normalized for t in tests], dtype=np.float32)
+        self.c_normalized = np.array([t.c_normalized for t in tests], dtype=np.float32)
+
+        # Unit vectors - zero vectors stay zero so their cosine is 0 (same as calculate_match_score)
+        norms = np.linalg.norm(self.traits, axis=1, keepdims=True)
+        self.unit_traits = np.divide(
+            self.traits, norms,
+            out=np.zeros_like(self.traits),
+            where=norms > 0
+        )
+
+        self.scores = None
+        if dense:
+            self.scores = self.block(np.arange(self.size), np.arange(self.size))
+            np.fill_diagonal(self.scores, 0.0)
+
+    def block(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Match scores between participants `rows` and `cols` as a float32 matrix"""
+        rows = np.asarray(rows, dtype=np.intp)
+        cols = np.asarray(cols, dtype=np.intp)
+
+        # Cosine similarity mapped -1..+1 -> 0..100
+        cos_similarity = self.unit_traits[rows] @ self.unit_traits[cols].T
+        cos_normalized = (cos_similarity + 1.0) * 50.0
+
+        # Lifestyle bonus (L_bonus)
+        l_gap = np.abs(self.l_normalized[rows][:, None] - self.l_normalized[cols][None, :])
+        l_bonus = np.maximum(0.0, 20.0 - l_gap)
+
+        # Comfort bonus (C_bonus)
+        c_bonus = 0.2 * np.minimum(self.c_normalized[rows][:, None], self.c_normalized[cols][None, :])
+
+        match_score = 0.70 * cos_normalized + 0.15 * l_bonus + 0.15 * c_bonus
+        return np.clip(match_score, 0.0, 100.0).astype(np.float32, copy=False)
+
+    def group_average(self, group: List[int]) -> float:
+        """Average pairwise score of a group (0.0 for groups smaller than 2)"""
+        if len(group) < 2:
+            return 0.0
+        idx = np.asarray(group, dtype=np.intp)
+        sub = self.scores[np.ix_(idx, idx)] if self.scores is not None else self.block(idx, idx)
+        pair_count = len(group) * (len(group) - 1) / 2
+        return float(np.triu(sub, k=1).sum(dtype=np.float64) / pair_count)
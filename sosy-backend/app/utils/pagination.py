@@ -0,0 +1,123 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+from sqlalchemy import and_, literal, or_
+from sqlalchemy.orm import Query
+from app.core.config import settings
+from app.utils.cache import TTLCache
+
+# Short-lived cache for list totals, keyed by (resource, filters...)
+count_cache = TTLCache(maxsize=512, ttl=settings.COUNT_CACHE_TTL)
+
+
+class InvalidCursor(ValueError):
+    """Cursor is malformed or was issued for a different sort"""
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, pk: Any) -> str:
+    """Opaque cursor for the row (value, pk) under the given sort"""
+    if isinstance(value, datetime):
+        value = {'dt': value.isoformat()}
+    elif isinstance(value, Decimal):
+        value = {'dec': str(value)}
+    payload = json.dumps([sort_by, sort_order, value, pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, Any]:
+    """Return (value, pk) from a cursor, checking it belongs to this sort"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort_by, cursor_sort_order, value, pk = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+    if (cursor_sort_by, cursor_sort_order) != (sort_by, sort_order):
+        raise InvalidCursor("Cursor does not match the requested sort")
+
+    if isinstance(value, dict):
+        if 'dt' in value:
+            value = datetime.fromisoformat(value['dt'])
+        elif 'dec' in value:
+            value = Decimal(value['dec'])
+    return value, pk
+
+
+def paginate_keyset(
+    query: Query,
+    sort_column,
+    pk_column,
+    sort_by: str,
+    sort_order: str,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Keyset pagination on (sort_column, pk_column).
+
+    Rows come back ordered by the sort column with the primary key as tie
+    breaker, starting after `cursor`. NULL sort values follow MySQL ordering
+    (first in ASC, last in DESC). Returns (rows, next_cursor); next_cursor is
+    None on the last page.
+    """
+    descending = sort_order.lower() == "desc"
+
+    if cursor:
+        value, pk = decode_cursor(cursor, sort_by, sort_order)
+        query = query.filter(_after(sort_column, pk_column, value, pk, descending))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), pk_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), pk_column.asc())
+
+    # One extra row tells us whether there is a next page
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    next_cursor = encode_cursor(
+        sort_by, sort_order,
+        getattr(last, sort_column.key), getattr(last, pk_column.key)
+    )
+    return rows, next_cursor
+
+
+def cached_count(key: Hashable, build_query: Callable[[], Query]) -> int:
+    """build_query().count(), served from count_cache for COUNT_CACHE_TTL seconds"""
+    total = count_cache.get(key)
+    if total is None:
+        total = build_query().count()
+        count_cache.set(key, total)
+    return total
+
+
+def _after(sort_column, pk_column, value, pk, descending: bool):
+    """Rows strictly after (value, pk) in the keyset order"""
+    if value is not None:
+        # Bound as a typed literal so booleans compare with < / > too
+        value = literal(value, type_=sort_column.type)
+    if descending:
+        if value is None:
+            # Inside the trailing NULL block
+            return and_(sort_column.is_(None), pk_column < pk)
+        return or_(
+            sort_column < value,
+            and_(sort_column == value, pk_column < pk),
+            sort_column.is_(None)
+        )
+
+    if value is None:
+        # Inside the leading NULL block
+        return or_(
+            and_(sort_column.is_(None), pk_column > pk),
+            sort_column.isnot(None)
+        )
+    return or_(
+        sort_column > value,
+        and_(sort_column == value, pk_column > pk)
+    )
@@ -0,0 +1,176 @@
+from itertools import combinations
+from multiprocessing import shared_memory
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+
+# Seeds grown together as one (seeds x participants) block
+_BLOCK = 256
+
+# Averages this close to the best are re-checked with the exact Python
+# expression (sum() of a list), so ties resolve like the original loop
+_TIE_TOLERANCE = 1e-9
+
+
+class SeedGroup(NamedTuple):
+    """Best group found from a set of seeds"""
+    score: float
+    members: List[int]
+
+
+def explore_seeds(
+    scores: np.ndarray,
+    linked: np.ndarray,
+    alive: np.ndarray,
+    seeds: Sequence[int],
+    target_size: int
+) -> Tuple[Optional[SeedGroup], int]:
+    """
+    Grow one group per seed and return the best, with the candidate-member
+    pairs looked at.
+
+    `scores` holds the pair scores (0 where there is none), `linked` marks
+    the pairs that count (at least 3 criteria matched) and `alive` the
+    participants not yet grouped. From each seed the group takes, one at a
+    time, the participant with the best average score with the members it
+    has a pair with (ties: lowest index). Groups that can't reach
+    `target_size` are dropped; the best is the one with the highest average
+    over its pairs, the lowest seed on ties. This is the order the original
+    per-seed loop used, so results are the same for any split of the seeds.
+    """
+    best = None
+    pairs = 0
+    seeds = np.asarray(seeds, dtype=np.intp)
+    for start in range(0, len(seeds), _BLOCK):
+        found, block_pairs = _grow_block(scores, linked, alive, seeds[start:start + _BLOCK], target_size)
+        pairs += block_pairs
+        if found is not None and (best is None or found.score > best.score):
+            best = found
+    return best, pairs
+
+
+def explore_shared(
+    name: str,
+    size: int,
+    alive: bytes,
+    seeds: Sequence[int],
+    target_size: int
+) -> Tuple[Optional[SeedGroup], int]:
+    """explore_seeds() over matrices in the shared memory block `name` (see share_matrices)"""
+    # Workers report to the parent's resource tracker, which forgets the
+    # block when the parent unlinks it
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        scores, linked = _views(block, size)
+        alive_mask = np.frombuffer(alive, dtype=np.bool_)
+        result = explore_seeds(scores, linked, alive_mask, seeds, target_size)
+        del scores, linked
+        return result
+    finally:
+        block.close()
+
+
+def share_matrices(scores: np.ndarray, linked: np.ndarray) -> shared_memory.SharedMemory:
+    """Copy the score and link matrices into a new shared memory block; the caller unlinks it"""
+    size = scores.shape[0]
+    block = shared_memory.SharedMemory(create=True, size=max(size * size * 9, 1))
+    shared_scores, shared_linked = _views(block, size)
+    shared_scores[:] = scores
+    shared_linked[:] = linked
+    del shared_scores, shared_linked
+    return block
+
+
+def _views(block: shared_memory.SharedMemory, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """float64 scores followed by bool links, both size x size"""
+    scores = np.ndarray((size, size), dtype=np.float64, buffer=block.buf)
+    linked = np.ndarray((size, size), dtype=np.bool_, buffer=block.buf, offset=size * size * 8)
+    return scores, linked
+
+
+def _grow_block(
+    scores: np.ndarray,
+    linked: np.ndarray,
+    alive: np.ndarray,
+    seeds: np.ndarray,
+    target_size: int
+) -> Tuple[Optional[SeedGroup], int]:
+    count = len(seeds)
+    rows = np.arange(count)
+    members = np.empty((count, target_size), dtype=np.intp)
+    members[:, 0] = seeds
+
+    # Per seed and candidate: score sum (in member order) and pairs with the group
+    totals = scores[seeds].copy()
+    links = linked[seeds].astype(np.int64)
+    open_ = np.repeat(alive[np.newaxis, :], count, axis=0)
+    open_[rows, seeds] = False
+    growing = np.ones(count, dtype=bool)
+    available = int(alive.sum())
+    pairs = 0
+
+    for size in range(1, target_size):
+        pairs += int(growing.sum()) * (available - size) * size
+        with np.errstate(divide='ignore', invalid='ignore'):
+            averages = totals / links
+        averages[~(open_ & (links > 0)) | (averages <= -1)] = -np.inf
+
+        picks = averages.argmax(axis=1)
+        tops = averages[rows, picks]
+        growing &= tops > -np.inf
+        near = averages >= (tops - _TIE_TOLERANCE * np.maximum(np.abs(tops), 1))[:, np.newaxis]
+        for row in np.flatnonzero(growing & (near.sum(axis=1) > 1)):
+            picks[row] = _exact_pick(scores, linked, members[row, :size], np.flatnonzero(near[row]))
+
+        members[:, size] = picks
+        open_[rows, picks] = False
+        totals += scores[picks]
+        links += linked[picks]
+
+    if not growing.any():
+        return None, pairs
+
+    # Group averages, screened the same way before the exact check
+    members = members[growing]
+    sums = np.zeros(len(members))
+    links = np.zeros(len(members), dtype=np.int64)
+    for a, b in combinations(range(target_size), 2):
+        sums += scores[members[:, a], members[:, b]]
+        links += linked[members[:, a], members[:, b]]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        averages = sums / links
+    averages[(links == 0) | (averages <= -1)] = -np.inf
+    top = averages.max()
+    if top == -np.inf:
+        return None, pairs
+
+    best = None
+    for row in np.flatnonzero(averages >= top - _TIE_TOLERANCE * max(abs(top), 1)):
+        group = members[row].tolist()
+        score = _group_score(scores, linked, group)
+        if best is None or score > best.score:
+            best = SeedGroup(score, group)
+    return best, pairs
+
+
+def _exact_pick(
+    scores: np.ndarray,
+    linked: np.ndarray,
+    group: np.ndarray,
+    candidates: np.ndarray
+) -> int:
+    best, best_average = None, -1
+    for candidate in candidates.tolist():
+        values = [scores.item(member, candidate) for member in group.tolist() if linked[member, candidate]]
+        average = sum(values) / len(values)
+        if average > best_average:
+            best, best_average = candidate, average
+    return best
+
+
+def _group_score(scores: np.ndarray, linked: np.ndarray, group: List[int]) -> float:
+    values = [
+        scores.item(group[i], group[j])
+        for i in range(len(group)) for j in range(i + 1, len(group))
+        if linked[group[i], group[j]]
+    ]
+    return sum(values) / len(values)
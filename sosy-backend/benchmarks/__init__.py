@@ -0,0 +1,24 @@
+"""
+Benchmarks for the two matching engines (Daylight and SOSY).
+
+Synthetic cohorts are written to an in-memory SQLite database and each
+engine is run end to end on them, timing every phase. Run from sosy-backend:
+
+    python -m benchmarks                          # default sizes, compare with baselines.json
+    python -m benchmarks --engine daylight --sizes 100,1000,20000
+    python -m benchmarks --save-baseline          # record the current numbers
+    python -m benchmarks --check                  # exit 1 on a regression (CI)
+
+No MySQL is needed; the database settings only have to be importable.
+Runtime and memory baselines are machine specific: record them with
+--save-baseline on the machine that later runs --check.
+"""
+import os
+
+# The app settings require the MySQL connection values; engines connect
+# lazily, so placeholders are enough for a SQLite-only run
+for _name in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASS", "WP_DB_HOST", "WP_DB_NAME", "WP_DB_USER", "WP_DB_PASS"):
+    os.environ.setdefault(_name, "benchmark")
+os.environ.setdefault("DB_PORT", "3306")
+os.environ.setdefault("WP_DB_PORT", "3306")
+os.environ.setdefault("SECRET_KEY", "benchmark")
@@ -0,0 +1,56 @@
+import argparse
+import sys
+from benchmarks.runner import ENGINES, benchmark, load_baselines, regressions, save_baselines
+
+# SOSY grouping is quadratic-plus in Python (~90 s at 1000 users), so its
+# default sizes stay small; pass --sizes for larger cohorts
+DEFAULT_SIZES = {
+    "daylight": [24, 100, 1000, 5000],
+    "sosy": [100, 300],
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the matching engines")
+    parser.add_argument("--engine", choices=sorted(ENGINES), action="append", help="Engine to run (repeatable; default both)")
+    parser.add_argument("--sizes", help="Comma separated cohort sizes, e.g. 100,1000,20000")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (the median is kept)")
+    parser.add_argument("--seed", type=int, default=1, help="Cohort generator seed")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results in baselines.json")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if any case regressed")
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines()
+    results = []
+    failed = False
+
+    print(f"{'case':<16} {'seconds':>9} {'baseline':>9} {'peak MB':>8} {'tables':>7} {'score':>7} {'min':>7} {'seated':>7}  phases")
+    for engine in args.engine or sorted(ENGINES):
+        sizes = [int(size) for size in args.sizes.split(",")] if args.sizes else DEFAULT_SIZES[engine]
+        for size in sizes:
+            result = benchmark(engine, size, repeat=args.repeat, memory=not args.no_memory, seed=args.seed)
+            results.append(result)
+
+            baseline = baselines.get(result.key)
+            phases = " ".join(f"{tier}={seconds:.3f}" for tier, seconds in result.phases.items())
+            print(
+                f"{result.key:<16} {result.seconds:>9.3f} "
+                f"{baseline['seconds'] if baseline else float('nan'):>9.3f} "
+                f"{result.peak_memory_mb if result.peak_memory_mb is not None else float('nan'):>8.1f} "
+                f"{result.tables:>7} {result.mean_table_score:>7.2f} {result.min_table_score:>7.2f} "
+                f"{result.seated_percent:>6.1f}%  {phases}"
+            )
+            for problem in regressions(result, baseline):
+                failed = True
+                print(f"  REGRESSION {result.key}: {problem}")
+
+    if args.save_baseline:
+        save_baselines(results)
+        print(f"Saved {len(results)} baseline(s)")
+
+    return 1 if failed and args.check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
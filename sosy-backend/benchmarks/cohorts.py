@@ -0,0 +1,118 @@
+import random
+from typing import Dict, List
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.crud.daylight_personality import daylight_personality
+from app.db.base import Base
+from app.models.daylight_personality import (
+    DaylightPersonalityTest, DaylightMatchingSession, DaylightMatchingParticipant,
+    DaylightMatchingTable, DaylightMatchingScore
+)
+from app.models.matching import UserProfile, MatchingSession, MatchingGroup, UserMatchScore
+from app.models.user import User
+
+# Tables the matching engines read and write
+TABLES = [
+    User.__table__,
+    DaylightPersonalityTest.__table__,
+    DaylightMatchingSession.__table__,
+    DaylightMatchingParticipant.__table__,
+    DaylightMatchingTable.__table__,
+    DaylightMatchingScore.__table__,
+    UserProfile.__table__,
+    MatchingSession.__table__,
+    MatchingGroup.__table__,
+    UserMatchScore.__table__,
+]
+
+# Questions q1-q15 of the Daylight test and the options each one has
+DAYLIGHT_OPTIONS = {f"q{n}": "AB" for n in range(1, 16)}
+DAYLIGHT_OPTIONS.update({"q8": "ABC", "q9": "ABC", "q13": "ABC", "q14": "ABC"})
+DAYLIGHT_OPTIONS.update({"q10": "ABCD", "q11": "ABCD", "q12": "ABCD", "q15": "ABCD"})
+
+ACTIVITY_TYPES = ["coffee_talk", "hiking", "gaming", "board_games", "cooking", "art", "music", "sports"]
+DISCUSSION_TOPICS = ["wellness", "travel", "tech", "business", "culture", "books", "film", "food"]
+CULTURES = ["javanese", "sundanese", "batak", "chinese_indonesian", "minang", "balinese", "expat"]
+
+
+def create_database() -> sessionmaker:
+    """Fresh in-memory SQLite stand-in for the local database"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=TABLES)
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+def seed_daylight_cohort(db: Session, size: int, seed: int = 1) -> List[int]:
+    """Add `size` users with a Daylight test each; returns their user IDs"""
+    rng = random.Random(seed)
+    users = [
+        User(
+            username=f"daylight_{seed}_{i}",
+            email=f"daylight_{seed}_{i}@example.com",
+            hashed_password="x",
+            full_name=f"Daylight User {i}",
+            is_active=True
+        )
+        for i in range(size)
+    ]
+    db.add_all(users)
+    db.flush()
+
+    tests = []
+    for user in users:
+        answers = {question: rng.choice(options) for question, options in DAYLIGHT_OPTIONS.items()}
+        tests.append(DaylightPersonalityTest(
+            user_id=user.id,
+            answers=answers,
+            **daylight_personality.calculate_personality_scores(answers)
+        ))
+    db.add_all(tests)
+    db.commit()
+    return [user.id for user in users]
+
+
+def seed_sosy_cohort(db: Session, size: int, seed: int = 1) -> List[Dict]:
+    """
+    Add `size` SOSY matching profiles; returns them as event buyers (the
+    input of the matching endpoint's profile builder).
+
+    Most users prefer deep conversations and tables of 4, so the hard
+    filters keep a realistic share of the cohort.
+    """
+    rng = random.Random(seed)
+    profiles = []
+    for i in range(size):
+        profiles.append(UserProfile(
+            wp_user_id=100000 * seed + i,
+            social_energy=rng.choice(["introvert", "ambivert", "extrovert"]),
+            conversation_style=rng.choices(["deep", "casual", None], weights=[6, 3, 1])[0],
+            social_goal=rng.choice(["friendship", "networking", "relationship"]),
+            group_size_preference=rng.choices([4, 6, None], weights=[6, 2, 2])[0],
+            gender=rng.choice(["male", "female"]),
+            gender_preference=rng.choice(["same", "mixed", "open"]),
+            activity_types=rng.sample(ACTIVITY_TYPES, rng.randint(1, 4)),
+            discussion_topics=rng.sample(DISCUSSION_TOPICS, rng.randint(1, 4)),
+            life_stage=rng.choice(["student", "professional", "parent", "retired"]),
+            cultural_background=rng.choice(CULTURES),
+            price_tier=rng.choice(["on_budget", "medium", "exclusive"]),
+            reliability_score=round(rng.uniform(60.0, 100.0), 1),
+            attendance_rate=round(rng.uniform(70.0, 100.0), 1)
+        ))
+    db.add_all(profiles)
+    db.commit()
+
+    return [
+        {
+            'user_id': profile.wp_user_id,
+            'user_login': f"sosy_{profile.wp_user_id}",
+            'user_email': f"sosy_{profile.wp_user_id}@example.com",
+            'display_name': f"SOSY User {profile.wp_user_id}",
+            'has_personality_test': False
+        }
+        for profile in profiles
+    ]
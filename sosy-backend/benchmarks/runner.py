@@ -0,0 +1,178 @@
+import json
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from app.crud.daylight_personality import daylight_personality
+from app.crud.matching import matching
+from app.models.daylight_personality import DaylightMatchingTable
+from benchmarks.cohorts import create_database, seed_daylight_cohort, seed_sosy_cohort
+
+BASELINE_PATH = Path(__file__).with_name("baselines.json")
+
+# A result is a regression when it is this much worse than its baseline
+RUNTIME_TOLERANCE = 0.25
+# ...and slower by at least this many seconds, so scheduler noise on
+# sub-second cases does not count as a regression
+RUNTIME_FLOOR = 0.25
+MEMORY_TOLERANCE = 0.25
+SCORE_TOLERANCE = 1.0  # points of mean / min table score
+SEATED_TOLERANCE = 1.0  # percentage points
+
+
+@dataclass
+class BenchmarkResult:
+    engine: str
+    size: int
+    seconds: float
+    phases: Dict[str, float] = field(default_factory=dict)
+    peak_memory_mb: Optional[float] = None
+    tables: int = 0
+    mean_table_score: float = 0.0
+    min_table_score: float = 0.0
+    seated_percent: float = 0.0
+
+    @property
+    def key(self) -> str:
+        return f"{self.engine}:{self.size}"
+
+
+def _phases(loaded_seconds: float, timings: Optional[List[Dict]]) -> Dict[str, float]:
+    """Load time plus the phase spans the engine stored on its session"""
+    phases = {"load": loaded_seconds}
+    for span in timings or []:
+        phases[span["phase"]] = phases.get(span["phase"], 0.0) + span["seconds"]
+    return phases
+
+
+def run_daylight(SessionLocal, user_ids: List[int]) -> BenchmarkResult:
+    """One Daylight run the way a background job does it: save participants, then match"""
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        session = daylight_personality.create_pending_matching_session(db, "benchmark", 1, user_ids)
+        loaded = time.perf_counter()
+        session = daylight_personality.run_matching_session(db, session)
+        finished = time.perf_counter()
+
+        phases = _phases(loaded - started, session.timings)
+        tables = db.query(DaylightMatchingTable).filter(
+            DaylightMatchingTable.session_id == session.id
+        ).all()
+        seated = sum(table.table_size for table in tables)
+
+        return BenchmarkResult(
+            engine="daylight",
+            size=len(user_ids),
+            seconds=finished - started,
+            phases=phases,
+            tables=len(tables),
+            mean_table_score=sum(t.average_match_score for t in tables) / len(tables) if tables else 0.0,
+            min_table_score=min((t.average_match_score for t in tables), default=0.0),
+            seated_percent=100.0 * seated / len(user_ids) if user_ids else 0.0
+        )
+
+
+def run_sosy(SessionLocal, buyers: List[Dict]) -> BenchmarkResult:
+    """One SOSY run: build profiles like the matching endpoint, then group them"""
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        user_profiles = matching.build_user_profiles(None, db, buyers)
+        loaded = time.perf_counter()
+        session = matching.create_pending_session(db, 1, 4, "deep", "benchmark")
+        session, groups = matching.create_matching_groups(
+            db, 1, 4, "deep", user_profiles, session=session
+        )
+        finished = time.perf_counter()
+
+        phases = _phases(loaded - started, session.timings)
+        seated = sum(group.group_size for group in groups)
+
+        return BenchmarkResult(
+            engine="sosy",
+            size=len(buyers),
+            seconds=finished - started,
+            phases=phases,
+            tables=len(groups),
+            mean_table_score=sum(g.average_match_score for g in groups) / len(groups) if groups else 0.0,
+            min_table_score=min((g.average_match_score for g in groups), default=0.0),
+            seated_percent=100.0 * seated / len(buyers) if buyers else 0.0
+        )
+
+
+ENGINES: Dict[str, Tuple[Callable, Callable]] = {
+    "daylight": (seed_daylight_cohort, run_daylight),
+    "sosy": (seed_sosy_cohort, run_sosy),
+}
+
+
+def benchmark(engine: str, size: int, repeat: int = 3, memory: bool = True, seed: int = 1) -> BenchmarkResult:
+    """
+    Median of `repeat` timed runs on a fresh cohort of `size` users.
+
+    Peak memory comes from one extra run under tracemalloc, which slows
+    Python code down too much to time it in the same run.
+    """
+    seed_cohort, run = ENGINES[engine]
+    SessionLocal = create_database()
+    with SessionLocal() as db:
+        cohort = seed_cohort(db, size, seed)
+
+    runs = sorted((run(SessionLocal, cohort) for _ in range(max(repeat, 1))), key=lambda result: result.seconds)
+    median = runs[len(runs) // 2]
+
+    if memory:
+        tracemalloc.start()
+        try:
+            run(SessionLocal, cohort)
+            median.peak_memory_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+    return median
+
+
+def load_baselines(path: Path = BASELINE_PATH) -> Dict[str, Dict]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baselines(results: List[BenchmarkResult], path: Path = BASELINE_PATH) -> None:
+    """Record `results` as baselines, keeping entries for other engines/sizes"""
+    baselines = load_baselines(path)
+    for result in results:
+        data = asdict(result)
+        data["seconds"] = round(data["seconds"], 4)
+        data["phases"] = {tier: round(seconds, 4) for tier, seconds in data["phases"].items()}
+        if data["peak_memory_mb"] is not None:
+            data["peak_memory_mb"] = round(data["peak_memory_mb"], 2)
+        data["mean_table_score"] = round(data["mean_table_score"], 3)
+        data["min_table_score"] = round(data["min_table_score"], 3)
+        data["seated_percent"] = round(data["seated_percent"], 2)
+        baselines[result.key] = data
+    path.write_text(json.dumps(dict(sorted(baselines.items())), indent=2) + "\n")
+
+
+def regressions(result: BenchmarkResult, baseline: Optional[Dict]) -> List[str]:
+    """What got worse than the baseline beyond the tolerances (empty if nothing)"""
+    if not baseline:
+        return []
+
+    problems = []
+    if (
+        result.seconds > baseline["seconds"] * (1 + RUNTIME_TOLERANCE)
+        and result.seconds - baseline["seconds"] > RUNTIME_FLOOR
+    ):
+        problems.append(f"runtime {result.seconds:.3f}s vs {baseline['seconds']:.3f}s")
+    if (
+        result.peak_memory_mb is not None and baseline.get("peak_memory_mb")
+        and result.peak_memory_mb > baseline["peak_memory_mb"] * (1 + MEMORY_TOLERANCE)
+    ):
+        problems.append(f"peak memory {result.peak_memory_mb:.1f} MB vs {baseline['peak_memory_mb']:.1f} MB")
+    if result.mean_table_score < baseline["mean_table_score"] - SCORE_TOLERANCE:
+        problems.append(f"mean table score {result.mean_table_score:.2f} vs {baseline['mean_table_score']:.2f}")
+    if result.min_table_score < baseline.get("min_table_score", 0.0) - SCORE_TOLERANCE:
+        problems.append(f"min table score {result.min_table_score:.2f} vs {baseline['min_table_score']:.2f}")
+    if result.seated_percent < baseline["seated_percent"] - SEATED_TOLERANCE:
+        problems.append(f"seated {result.seated_percent:.1f}% vs {baseline['seated_percent']:.1f}%")
+    return problems
@@ -0,0 +1,14 @@
+import os
+import sys
+from pathlib import Path
+
+# Settings require the database credentials at import; the tests only use
+# in-memory SQLite, so any values do
+for name, value in {
+    "DB_HOST": "localhost", "DB_PORT": "3306", "DB_NAME": "sosy", "DB_USER": "test", "DB_PASS": "test",
+    "WP_DB_HOST": "localhost", "WP_DB_PORT": "3306", "WP_DB_NAME": "wordpress", "WP_DB_USER": "test", "WP_DB_PASS": "test",
+    "SECRET_KEY": "test",
+}.items():
+    os.environ.setdefault(name, value)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
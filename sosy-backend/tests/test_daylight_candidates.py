@@ -0,0 +1,61 @@
+"""
+The top-K candidate graph against the dense score matrix it stands in
+for: recall of each participant's true top-K partners, and exact scores.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from app.crud.daylight_personality import daylight_personality
+from app.models.daylight_personality import DaylightPersonalityTest
+from app.utils.daylight_candidates import CandidateGraph
+from app.utils.daylight_matrix import DaylightMatchMatrix
+from benchmarks.cohorts import DAYLIGHT_OPTIONS
+
+
+def _tests(size: int, seed: int):
+    """Unsaved Daylight tests with answers drawn like the benchmark cohorts"""
+    rng = random.Random(seed)
+    tests = []
+    for _ in range(size):
+        answers = {question: rng.choice(options) for question, options in DAYLIGHT_OPTIONS.items()}
+        tests.append(DaylightPersonalityTest(**daylight_personality.calculate_personality_scores(answers)))
+    return tests
+
+
+@pytest.mark.parametrize("size, k", [(500, 16), (2000, 32)])
+@pytest.mark.parametrize("seed", [1, 2])
+def test_candidate_graph_recalls_dense_top_k(size, k, seed):
+    tests = _tests(size, seed)
+    dense = DaylightMatchMatrix(tests).scores
+    graph = CandidateGraph(DaylightMatchMatrix(tests, dense=False), k)
+
+    # Partners scoring at least the true K-th best count as recalled (ties are interchangeable)
+    others = dense.copy()
+    np.fill_diagonal(others, -np.inf)
+    kth_best = -np.sort(-others, axis=1)[:, k - 1]
+    found = np.take_along_axis(dense, graph.neighbours.astype(np.intp), axis=1)
+
+    assert (found >= kth_best[:, None] - 1e-3).mean() >= 0.99
+
+
+def test_candidate_graph_rows_are_exact_and_sorted():
+    tests = _tests(800, 3)
+    dense = DaylightMatchMatrix(tests).scores
+    graph = CandidateGraph(DaylightMatchMatrix(tests, dense=False), 24)
+
+    neighbours = graph.neighbours.astype(np.intp)
+    assert np.allclose(graph.scores, np.take_along_axis(dense, neighbours, axis=1), atol=1e-3)
+    assert (np.diff(graph.scores, axis=1) <= 0).all()
+    assert not (neighbours == np.arange(800)[:, None]).any()
+    assert all(len(set(row)) == 24 for row in neighbours.tolist())
+    assert graph.scored_pairs < 800 * 799
+
+
+def test_candidate_graph_over_participants_stays_within_them():
+    tests = _tests(600, 4)
+    participants = list(range(0, 600, 3))
+    graph = CandidateGraph(DaylightMatchMatrix(tests, dense=False), 16, participants)
+
+    assert set(graph.neighbours[participants].ravel().tolist()) <= set(participants)
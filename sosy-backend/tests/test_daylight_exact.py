@@ -0,0 +1,61 @@
+"""
+The exact small-cohort solver against brute force: over every way to seat
+a small cohort at tables of 3-5, none has a higher lowest table average.
+"""
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from app.utils.daylight_exact import solve_max_min
+
+
+def _scores(n: int, seed: int, ties: bool = False) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    values = rng.integers(40, 50, size=(n, n)) * 2.0 if ties else rng.uniform(20, 100, size=(n, n))
+    values = np.triu(values, 1)
+    values = values + values.T
+    np.fill_diagonal(values, 0.0)
+    return values.astype(np.float32)
+
+
+def _average(scores: np.ndarray, group) -> float:
+    return float(np.mean([scores[a, b] for a, b in combinations(group, 2)], dtype=np.float64))
+
+
+def _brute_force_max_min(scores: np.ndarray) -> float:
+    """Best lowest table average over every seating at tables of 3-5"""
+    def best(remaining: tuple) -> float:
+        if not remaining:
+            return np.inf
+        first, rest = remaining[0], remaining[1:]
+        result = -np.inf
+        for size in (2, 3, 4):
+            for others in combinations(rest, size):
+                left = tuple(idx for idx in rest if idx not in others)
+                if 0 < len(left) < 3:
+                    continue
+                table = _average(scores, (first,) + others)
+                if table <= result:
+                    continue
+                result = max(result, min(table, best(left)))
+        return result
+
+    return best(tuple(range(scores.shape[0])))
+
+
+@pytest.mark.parametrize("n", [3, 5, 6, 7, 8, 9, 10, 11])
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("ties", [False, True])
+def test_solve_max_min_matches_brute_force(n, seed, ties):
+    scores = _scores(n, seed, ties)
+
+    groups = solve_max_min(scores, time_limit=10.0)
+
+    assert sorted(idx for group in groups for idx in group) == list(range(n))
+    assert all(3 <= len(group) <= 5 for group in groups)
+    assert min(_average(scores, group) for group in groups) == pytest.approx(_brute_force_max_min(scores))
+
+
+def test_solve_max_min_declines_cohorts_too_small_to_seat():
+    assert solve_max_min(_scores(2, 0), time_limit=1.0) is None
@@ -0,0 +1,213 @@
+"""
+Daylight grouping against the greedy seed search it replaced (the same
+groups in the same order on seeded cohorts, ties included) and against
+itself without build reuse, and the refinement pass's guarantees.
+"""
+import numpy as np
+import pytest
+
+from app.utils.daylight_grouping import _grow_group, form_groups, refine_groups
+
+
+def _scores(n: int, seed: int, ties: bool = False) -> np.ndarray:
+    """Symmetric match scores with a zero diagonal, in half points so every sum is exact"""
+    rng = np.random.default_rng(seed)
+    if ties:
+        values = rng.integers(60, 75, size=(n, n)).astype(np.float64)
+    else:
+        traits = rng.normal(size=(n, 4))
+        traits /= np.linalg.norm(traits, axis=1, keepdims=True)
+        values = np.round((traits @ traits.T + 1) * 35 + rng.uniform(0, 6, size=(n, n)), 0) / 2 + 40
+    values = np.triu(values, 1)
+    values = values + values.T
+    np.fill_diagonal(values, 0.0)
+    return values.astype(np.float32)
+
+
+def _available(n: int, seed: int) -> list:
+    rng = np.random.default_rng(seed + 1000)
+    dropped = int(rng.integers(0, n // 3 + 1))
+    return sorted(rng.permutation(n)[dropped:].tolist())
+
+
+def _greedy_baseline(scores, available_indices, threshold, inclusive, seed_count, size_bonus):
+    """The original per-size, per-seed greedy search, on a dense matrix"""
+    def passes(score):
+        return score >= threshold if inclusive else score > threshold
+
+    groups = []
+    used = set()
+    while True:
+        current_available = [i for i in available_indices if i not in used]
+        if len(current_available) < 3:
+            break
+
+        possible_sizes = [size for size in (5, 4, 3) if size <= len(current_available)]
+        best_group = None
+        best_score = -1
+        for target_size in possible_sizes:
+            for seed in current_available[:seed_count]:
+                group = [seed]
+                candidates = [i for i in current_available if i != seed]
+                while len(group) < target_size and candidates:
+                    best_next = None
+                    best_next_score = -1
+                    for candidate in candidates:
+                        avg = sum(float(scores[member, candidate]) for member in group) / len(group)
+                        if passes(avg) and avg > best_next_score:
+                            best_next_score = avg
+                            best_next = candidate
+                    if best_next is None:
+                        break
+                    group.append(best_next)
+                    candidates.remove(best_next)
+
+                if len(group) < 3:
+                    continue
+                pair_scores = [
+                    float(scores[group[i], group[j]])
+                    for i in range(len(group)) for j in range(i + 1, len(group))
+                ]
+                avg_score = sum(pair_scores) / len(pair_scores)
+                if passes(avg_score) and avg_score + (len(group) - 3) * size_bonus > best_score:
+                    best_score = avg_score
+                    best_group = group
+
+        if best_group is None:
+            break
+        groups.append(best_group)
+        used.update(best_group)
+    return groups
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("ties", [False, True])
+@pytest.mark.parametrize("threshold", [70.0, 65.0, 55.0])
+def test_form_groups_matches_greedy_baseline(seed, ties, threshold):
+    n = 12 + 7 * seed
+    scores = _scores(n, seed, ties)
+    available = _available(n, seed)
+
+    groups = form_groups(scores, available, threshold, inclusive=True, seed_count=8, size_bonus=5)
+
+    assert groups == _greedy_baseline(scores, available, threshold, True, 8, 5)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_form_groups_any_positive_matches_greedy_baseline(seed):
+    n = 15 + 6 * seed
+    scores = _scores(n, seed)
+    available = _available(n, seed)
+
+    groups = form_groups(scores, available, 0.0, inclusive=False, seed_count=10, size_bonus=3)
+
+    assert groups == _greedy_baseline(scores, available, 0.0, False, 10, 3)
+
+
+def _form_groups_without_reuse(scores, available_indices, threshold, inclusive, seed_count, size_bonus):
+    """form_groups() growing every seed afresh each round; returns the groups and pairs evaluated"""
+    alive = np.zeros(scores.shape[0], dtype=bool)
+    alive[available_indices] = True
+    groups = []
+    evaluated = 0
+    while np.count_nonzero(alive) >= 3:
+        current_available = np.flatnonzero(alive)
+        possible_sizes = [size for size in (5, 4, 3) if size <= len(current_available)]
+        builds = [
+            _grow_group(scores, int(seed), alive, possible_sizes[0], threshold, inclusive)
+            for seed in current_available[:seed_count]
+        ]
+        evaluated += sum(build[2] for build in builds)
+
+        best_group = None
+        best_score = -1
+        for target_size in possible_sizes:
+            for members, prefix_averages, _ in builds:
+                length = min(target_size, len(members))
+                if length < 3:
+                    continue
+                avg_score = prefix_averages[length]
+                passes = avg_score >= threshold if inclusive else avg_score > threshold
+                if passes and avg_score + (length - 3) * size_bonus > best_score:
+                    best_score = avg_score
+                    best_group = members[:length]
+
+        if best_group is None:
+            break
+        groups.append(best_group)
+        alive[best_group] = False
+    return groups, evaluated
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("ties", [False, True])
+@pytest.mark.parametrize("threshold, inclusive", [(70.0, True), (60.0, True), (0.0, False)])
+def test_form_groups_matches_itself_without_build_reuse(seed, ties, threshold, inclusive):
+    n = 60 + 25 * seed
+    scores = _scores(n, seed, ties)
+    available = _available(n, seed)
+    counted = []
+
+    groups = form_groups(scores, available, threshold, inclusive=inclusive, count_pairs=counted.append)
+
+    expected, evaluated = _form_groups_without_reuse(scores, available, threshold, inclusive, 8, 5.0)
+    assert groups == expected
+    assert counted[0] < evaluated
+
+
+def _seating(n: int, seed: int) -> list:
+    """Everyone seated at random tables of 3-5"""
+    rng = np.random.default_rng(seed + 2000)
+    order = rng.permutation(n).tolist()
+    sizes = []
+    while sum(sizes) < n:
+        left = n - sum(sizes)
+        sizes.append(left if left <= 5 else int(rng.integers(3, min(5, left - 3) + 1)))
+    groups, start = [], 0
+    for size in sizes:
+        groups.append(order[start:start + size])
+        start += size
+    return groups
+
+
+def _min_and_mean(scores: np.ndarray, groups: list) -> tuple:
+    averages = [
+        np.mean([float(scores[a, b]) for i, a in enumerate(group) for b in group[i + 1:]])
+        for group in groups
+    ]
+    return min(averages), float(np.mean(averages))
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("ties", [False, True])
+def test_refine_groups_never_lowers_min_then_mean(seed, ties):
+    n = 9 + 5 * seed
+    scores = _scores(n, seed, ties)
+    groups = _seating(n, seed)
+
+    refined = refine_groups(scores, groups, cpu_budget=5.0)
+
+    assert sorted(idx for group in refined for idx in group) == list(range(n))
+    assert all(3 <= len(group) <= 5 for group in refined)
+    assert len(refined) == len(groups)
+    old_min, old_mean = _min_and_mean(scores, groups)
+    new_min, new_mean = _min_and_mean(scores, refined)
+    assert new_min >= old_min - 1e-9
+    if new_min <= old_min + 1e-9:
+        assert new_mean >= old_mean - 1e-9
+
+
+def test_refine_groups_improves_a_poor_seating():
+    scores = _scores(40, 3)
+    groups = _seating(40, 3)
+
+    refined = refine_groups(scores, groups, cpu_budget=5.0)
+
+    assert _min_and_mean(scores, refined)[0] > _min_and_mean(scores, groups)[0]
+
+
+def test_refine_groups_without_budget_keeps_the_seating():
+    scores = _scores(20, 1)
+    groups = _seating(20, 1)
+
+    assert refine_groups(scores, groups, cpu_budget=0.0) == groups
@@ -0,0 +1,36 @@
+"""
+Matching job registry: progress entries live only while a job runs.
+"""
+import threading
+
+from app.core.jobs import MatchingJobRunner
+
+
+def _fail():
+    raise RuntimeError("scoring blew up")
+
+
+def test_failed_job_progress_is_dropped():
+    runner = MatchingJobRunner(max_workers=1)
+    runner.submit(("daylight", 1), _fail)
+    runner.shutdown(wait=True)
+
+    assert runner.get_progress(("daylight", 1)) is None
+
+
+def test_finished_job_progress_is_dropped():
+    runner = MatchingJobRunner(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def job():
+        runner.report(("sosy", 2), phase='grouping', groups_formed=3)
+        started.set()
+        release.wait(5)
+
+    runner.submit(("sosy", 2), job)
+    started.wait(5)
+    assert runner.get_progress(("sosy", 2))["groups_formed"] == 3
+
+    release.set()
+    runner.shutdown(wait=True)
+    assert runner.get_progress(("sosy", 2)) is None
@@ -0,0 +1,121 @@
+"""
+Query budgets for the paths that used to issue one query per row
+(session result, background matching run, session list creators, buyer
+profiles). Each budget is checked at two data sizes: the count must stay
+flat as the data grows.
+"""
+import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.endpoints.daylight_personality import get_all_matching_sessions
+from app.crud.daylight_personality import daylight_personality
+from app.crud.matching import matching
+from app.db.base import Base
+from app.db.query_stats import count_queries, track_queries
+from app.models.matching import UserProfile
+from app.models.personality_test import TGEAnswer, TGEQuestion, TQBUser, TQBUserAnswer
+from app.models.user import User
+from benchmarks.cohorts import TABLES, seed_daylight_cohort
+
+
+def _sqlite(tables) -> sessionmaker:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=tables)
+    track_queries(engine)
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+@pytest.fixture
+def local_db():
+    with _sqlite(TABLES)() as db:
+        yield db
+
+
+@pytest.fixture
+def wp_db():
+    tables = [TQBUser.__table__, TQBUserAnswer.__table__, TGEQuestion.__table__, TGEAnswer.__table__]
+    with _sqlite(tables)() as db:
+        yield db
+
+
+def _daylight_session(db, size: int, seed: int):
+    user_ids = seed_daylight_cohort(db, size, seed=seed)
+    return daylight_personality.create_matching_session(db, f"cohort {seed}", user_ids[0], user_ids)
+
+
+@pytest.mark.parametrize("size", [12, 60])
+def test_build_session_result_query_budget(local_db, size):
+    session = _daylight_session(local_db, size, seed=size)
+    local_db.expire_all()
+
+    with count_queries() as stats:
+        result = daylight_personality.build_session_result(local_db, session)
+
+    assert result.total_participants == size
+    # session row (expired), participants (+ tests), tables, scores, users
+    assert stats.count == 5
+
+
+@pytest.mark.parametrize("size", [30, 120])
+def test_run_matching_session_query_budget(local_db, size):
+    user_ids = seed_daylight_cohort(local_db, size, seed=size)
+    session = daylight_personality.create_pending_matching_session(local_db, f"cohort {size}", user_ids[0], user_ids)
+    local_db.expire_all()
+
+    with count_queries() as stats:
+        session = daylight_personality.run_matching_session(local_db, session)
+
+    assert session.status == "completed"
+    # status: session, update, reload; participants (+ tests), users;
+    # tables, their IDs, scores; session update, reload; result snapshot: 5 reads + update
+    assert stats.count == 15
+
+
+@pytest.mark.parametrize("sessions", [2, 8])
+def test_get_all_matching_sessions_query_budget(local_db, sessions):
+    for seed in range(sessions):
+        _daylight_session(local_db, 6, seed=100 + seed)
+    local_db.expire_all()
+
+    with count_queries() as stats:
+        summaries = get_all_matching_sessions(skip=0, limit=100, db=local_db, current_user=None)
+
+    assert len(summaries) == sessions
+    assert all(summary.creator_name != "Unknown" for summary in summaries)
+    # sessions page, creators for the whole page
+    assert stats.count == 2
+
+
+@pytest.mark.parametrize("buyers", [4, 40])
+def test_build_user_profiles_query_budget(local_db, wp_db, buyers):
+    wp_db.add(TGEQuestion(id=1, text="Favourite conversation", description=""))
+    wp_db.add(TGEAnswer(id=10, question_id=1, text="Deep talks", points=5, feedback=""))
+    buyer_rows = []
+    for user_id in range(1, buyers + 1):
+        wp_db.add(TQBUser(
+            id=user_id, wp_user_id=user_id, quiz_id=1, completed_quiz=True, points="ambivert",
+            date_started=datetime.datetime(2024, 1, 1), date_finished=datetime.datetime(2024, 1, 2)
+        ))
+        wp_db.add(TQBUserAnswer(id=user_id, user_id=user_id, question_id=1, answer_id=10))
+        if user_id % 2:
+            local_db.add(UserProfile(wp_user_id=user_id, conversation_style="deep"))
+        buyer_rows.append({
+            "user_id": user_id,
+            "user_login": f"buyer{user_id}",
+            "user_email": f"buyer{user_id}@example.com",
+            "display_name": f"Buyer {user_id}",
+            "has_personality_test": True
+        })
+    wp_db.commit()
+    local_db.commit()
+
+    with count_queries() as stats:
+        profiles = matching.build_user_profiles(wp_db, local_db, buyer_rows)
+
+    assert [profile["user_id"] for profile in profiles] == list(range(1, buyers + 1))
+    # stored profiles, latest tests, their answers
+    assert stats.count == 3
@@ -0,0 +1,125 @@
+"""
+SOSY seed exploration against the per-seed loop it replaced: the same
+groups, scores and order round after round, inline and across worker
+processes.
+"""
+import numpy as np
+import pytest
+
+from app.core.grouping_pool import SeedExplorationPool
+from app.utils.sosy_grouping import explore_seeds
+
+
+def _matrices(n: int, seed: int, ties: bool = False):
+    """Symmetric pair scores and the pairs that count (about 3 in 4)"""
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(5, 12, size=(n, n)) * 5.0 if ties else rng.uniform(20, 100, size=(n, n))
+    linked = rng.random((n, n)) < 0.75
+    scores = np.triu(scores * linked, 1)
+    linked = np.triu(linked, 1)
+    return scores + scores.T, linked | linked.T
+
+
+def _per_seed_baseline(scores, linked, alive, target_size):
+    """The original loop: grow a group from every ungrouped seed, keep the best full one"""
+    def average(values):
+        return sum(values) / len(values)
+
+    available_indices = np.flatnonzero(alive).tolist()
+    best_group = None
+    best_score = -1
+    for seed in available_indices:
+        group = [seed]
+        candidates = [i for i in available_indices if i != seed]
+        while len(group) < target_size and candidates:
+            best_next = None
+            best_next_score = -1
+            for candidate in candidates:
+                values = [scores.item(member, candidate) for member in group if linked[member, candidate]]
+                if values and average(values) > best_next_score:
+                    best_next_score = average(values)
+                    best_next = candidate
+            if best_next is None:
+                break
+            group.append(best_next)
+            candidates.remove(best_next)
+
+        if len(group) != target_size:
+            continue
+        values = [
+            scores.item(group[i], group[j])
+            for i in range(len(group)) for j in range(i + 1, len(group))
+            if linked[group[i], group[j]]
+        ]
+        if values and average(values) > best_score:
+            best_score = average(values)
+            best_group = group
+    return best_group, best_score
+
+
+def _rounds(search, n: int, target_size: int):
+    """Groups formed round by round until no seed yields a full group"""
+    alive = np.ones(n, dtype=bool)
+    groups = []
+    while alive.sum() >= target_size:
+        found = search(alive, target_size)
+        if found is None:
+            break
+        groups.append(found)
+        alive[found[0]] = False
+    return groups
+
+
+def _group(found):
+    return None if found is None else (found.members, found.score)
+
+
+def _explore(scores, linked):
+    return lambda alive, target_size: _group(
+        explore_seeds(scores, linked, alive, np.flatnonzero(alive), target_size)[0]
+    )
+
+
+def _baseline(scores, linked):
+    def search(alive, target_size):
+        group, score = _per_seed_baseline(scores, linked, alive, target_size)
+        return None if group is None else (group, score)
+    return search
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("ties", [False, True])
+@pytest.mark.parametrize("target_size", [3, 4, 6])
+def test_explore_seeds_matches_per_seed_loop(seed, ties, target_size):
+    n = 14 + 5 * seed
+    scores, linked = _matrices(n, seed, ties)
+
+    assert _rounds(_explore(scores, linked), n, target_size) == _rounds(_baseline(scores, linked), n, target_size)
+
+
+@pytest.mark.parametrize("ties", [False, True])
+def test_explore_seeds_result_does_not_depend_on_the_seed_split(ties):
+    scores, linked = _matrices(40, 3, ties)
+    alive = np.ones(40, dtype=bool)
+    whole, _ = explore_seeds(scores, linked, alive, np.arange(40), 4)
+
+    # Combined like SeedExplorationPool: chunks in seed order, a later one only wins with a higher score
+    for chunks in (2, 3, 7):
+        best = None
+        for chunk in np.array_split(np.arange(40), chunks):
+            found, _ = explore_seeds(scores, linked, alive, chunk, 4)
+            if found is not None and (best is None or found.score > best.score):
+                best = found
+        assert best == whole
+
+
+def test_seed_exploration_pool_matches_per_seed_loop():
+    scores, linked = _matrices(30, 5, ties=True)
+    pool = SeedExplorationPool(max_workers=2, min_participants=0)
+    try:
+        with pool.session(scores, linked) as search:
+            groups = _rounds(lambda alive, target_size: _group(search(alive, target_size)[0]), 30, 4)
+    finally:
+        pool.shutdown()
+
+    assert groups == _rounds(_baseline(scores, linked), 30, 4)